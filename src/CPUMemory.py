@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
 
 from src.util import byte
 
@@ -10,13 +10,46 @@ if TYPE_CHECKING:
     from src.ppu.PPU import PPU
 
 
+# Reads/writes are dispatched by page (the high byte of the address)
+PAGE_COUNT = 0x100
+PAGE_SIZE = 0x100
+
+# Page handlers take the full address, and return None for open bus
+ReadHandler = Callable[[int], Optional[int]]
+WriteHandler = Callable[[int, int], None]
+# Hooks installed on pages for debugging/cheats:
+# read hooks are given (address, value read) and return the value the CPU sees,
+# write hooks are given (address, value) and return the value actually written (or None to drop the write)
+ReadHook = Callable[[int, int], int]
+WriteHook = Callable[[int, int], Optional[int]]
+
+
 class CPUMemory:
     """
     Handles the main system memory accessible by the CPU.
     https://www.nesdev.org/wiki/CPU_memory_map
+
+    Accesses are dispatched through per-page tables. Pages which are plain memory
+    (WRAM, PRG-ROM banks) are read straight out of a buffer; everything else goes through a handler.
     """
 
-    __slots__ = ["__ppu", "__apu", "__controllers", "__mapper", "__wram", "__open_bus_value"]
+    __slots__ = [
+        "__ppu",
+        "__apu",
+        "__controllers",
+        "__mapper",
+        "__wram",
+        "__open_bus_value",
+        "__page_reads",
+        "__page_writes",
+        "__read_buffers",
+        "__read_handlers",
+        "__write_buffers",
+        "__write_handlers",
+        "__read_hooks",
+        "__write_hooks",
+        "__read_hook_callbacks",
+    ]
 
     __controllers: Optional[List[ControllerBase]]
     __mapper: Optional[Mapper]
@@ -36,28 +69,202 @@ class CPUMemory:
         # a non-mapped address
         self.__open_bus_value = 0
 
+        # What each page is mapped to (a buffer, or a handler)
+        self.__page_reads: List[Union[memoryview, ReadHandler]] = [self.__read_open_bus] * PAGE_COUNT
+        self.__page_writes: List[Union[memoryview, WriteHandler]] = [self.__write_nothing] * PAGE_COUNT
+        # Debug hooks by page
+        self.__read_hooks: Dict[int, List[ReadHook]] = {}
+        self.__write_hooks: Dict[int, List[WriteHook]] = {}
+        # Called with the page whenever its read hooks change
+        self.__read_hook_callbacks: List[Callable[[int], None]] = []
+        # Tables used by read/write, built from the above;
+        # a page has either a buffer (fast path) or a handler
+        self.__read_buffers: List[Optional[memoryview]] = [None] * PAGE_COUNT
+        self.__read_handlers: List[Optional[ReadHandler]] = [None] * PAGE_COUNT
+        self.__write_buffers: List[Optional[memoryview]] = [None] * PAGE_COUNT
+        self.__write_handlers: List[Optional[WriteHandler]] = [None] * PAGE_COUNT
+
+        self.__map_pages()
+
     def on_load(self, ppu: PPU = None, apu=None, controllers: Optional[List[ControllerBase]] = None, mapper=None):
         self.__ppu = ppu
         self.__apu = apu
         self.__controllers = controllers
         self.__mapper = mapper
 
+        self.__map_pages()
+        if mapper is not None:
+            # Keep PRG-ROM pages pointing at whichever banks are switched in
+            mapper.add_bank_switch_callback(self.__map_cartridge)
+
+    def __map_pages(self) -> None:
+        wram = memoryview(self.__wram)
+        for page in range(0x41):
+            if page < 0x20:
+                # $0000-$07FF is WRAM; every 0x800 bytes following up to $1FFF
+                # is mirrored/repeated.
+                offset = (page * PAGE_SIZE) & 0x7FF
+                self.__page_reads[page] = self.__page_writes[page] = wram[offset : offset + PAGE_SIZE]
+            elif page < 0x40:
+                # $2000-$2007 = NES PPU registers
+                # This repeats every 8 bytes.
+                has_ppu = self.__ppu is not None
+                self.__page_reads[page] = self.__read_ppu if has_ppu else self.__read_open_bus
+                self.__page_writes[page] = self.__write_ppu if has_ppu else self.__write_nothing
+            else:
+                # $4000-$401F = APU and I/O registers, the rest of the page is cartridge space
+                self.__page_reads[page] = self.__read_io
+                self.__page_writes[page] = self.__write_io
+            self.__update_page(page)
+
+        self.__map_cartridge()
+
+    def __map_cartridge(self, first: int = 0x4020, last: int = 0xFFFF) -> None:
+        # $4020-$FFFF maps to the cartridge board, which can pretty much do whatever it wants.
+        # Pages the mapper exposes as plain memory are read directly.
+        # Only the pages between the given addresses are remapped, e.g. the PRG-ROM window a bank switch changed.
+        mapper = self.__mapper
+        for page in range(max(first >> 8, 0x41), (last >> 8) + 1):
+            if mapper is None:
+                self.__page_reads[page] = self.__read_open_bus
+                self.__page_writes[page] = self.__write_nothing
+            else:
+                buffer = mapper.cpu_read_page(page)
+                self.__page_reads[page] = mapper.cpu_read if buffer is None else buffer
+                self.__page_writes[page] = mapper.cpu_write
+            self.__update_page(page)
+
+    def __update_page(self, page: int) -> None:
+        # Rebuilds the fast tables for a page, from its mapping and hooks
+        read = self.__page_reads[page]
+        read_hooks = self.__read_hooks.get(page)
+        if read_hooks:
+            self.__read_buffers[page] = None
+            self.__read_handlers[page] = self.__hooked_read(read, read_hooks)
+        elif isinstance(read, memoryview):
+            self.__read_buffers[page] = read
+            self.__read_handlers[page] = None
+        else:
+            self.__read_buffers[page] = None
+            self.__read_handlers[page] = read
+
+        write = self.__page_writes[page]
+        write_hooks = self.__write_hooks.get(page)
+        if write_hooks:
+            self.__write_buffers[page] = None
+            self.__write_handlers[page] = self.__hooked_write(write, write_hooks)
+        elif isinstance(write, memoryview):
+            self.__write_buffers[page] = write
+            self.__write_handlers[page] = None
+        else:
+            self.__write_buffers[page] = None
+            self.__write_handlers[page] = write
+
+    def __hooked_read(self, read: Union[memoryview, ReadHandler], hooks: List[ReadHook]) -> ReadHandler:
+        if isinstance(read, memoryview):
+            buffer = read
+
+            def read(address: int) -> int:
+                return buffer[address & 0xFF]
+
+        def hooked(address: int) -> int:
+            value = read(address)
+            if value is None:
+                value = self.__open_bus_value
+            for hook in hooks:
+                value = hook(address, value)
+            return value
+
+        return hooked
+
+    def __hooked_write(self, write: Union[memoryview, WriteHandler], hooks: List[WriteHook]) -> WriteHandler:
+        if isinstance(write, memoryview):
+            buffer = write
+
+            def write(address: int, value: int) -> None:
+                buffer[address & 0xFF] = value
+
+        def hooked(address: int, value: int) -> None:
+            for hook in hooks:
+                value = hook(address, value)
+                if value is None:
+                    return
+            write(address, value & 0xFF)
+
+        return hooked
+
+    def add_read_hook(self, page: int, hook: ReadHook) -> None:
+        """
+        Installs a hook called on every read from the given page (e.g. watchpoints, cheats).
+        Pages without hooks aren't affected.
+        """
+        self.__read_hooks.setdefault(page, []).append(hook)
+        self.__update_page(page)
+        self.__on_read_hooks_changed(page)
+
+    def remove_read_hook(self, page: int, hook: ReadHook) -> None:
+        hooks = self.__read_hooks.get(page, [])
+        if hook in hooks:
+            hooks.remove(hook)
+        self.__update_page(page)
+        self.__on_read_hooks_changed(page)
+
+    def has_read_hooks(self, page: int) -> bool:
+        """
+        Returns whether reads from the given page go through hooks, i.e. it can't be read ahead of time.
+        """
+        return bool(self.__read_hooks.get(page))
+
+    def add_read_hook_callback(self, callback: Callable[[int], None]) -> None:
+        """
+        Registers a function to be called with the page whenever the read hooks of a page change,
+        e.g. to drop code translated from it. Registering the same function again does nothing.
+        """
+        if callback not in self.__read_hook_callbacks:
+            self.__read_hook_callbacks.append(callback)
+
+    def __on_read_hooks_changed(self, page: int) -> None:
+        for callback in self.__read_hook_callbacks:
+            callback(page)
+
+    def add_write_hook(self, page: int, hook: WriteHook) -> None:
+        """
+        Installs a hook called on every write to the given page (e.g. watchpoints, cheats).
+        Pages without hooks aren't affected.
+        """
+        self.__write_hooks.setdefault(page, []).append(hook)
+        self.__update_page(page)
+
+    def remove_write_hook(self, page: int, hook: WriteHook) -> None:
+        hooks = self.__write_hooks.get(page, [])
+        if hook in hooks:
+            hooks.remove(hook)
+        self.__update_page(page)
+
     def read(self, address: int) -> int:
-        value = self.get_open_bus_value()
+        buffer = self.__read_buffers[address >> 8]
+        if buffer is not None:
+            value = buffer[address & 0xFF]
+        else:
+            value = self.__read_handlers[address >> 8](address)
+            # Test for open bus, i.e. we read from nowhere actually mapped.
+            # https://www.nesdev.org/wiki/Open_bus_behavior
+            if value is None:
+                # TODO: Probably want to log this behavior later.
+                return self.__open_bus_value
+            value &= 0xFF
+        self.__open_bus_value = value
+        return value
 
-        if 0x0000 <= address <= 0x1FFF:
-            # $0000-$0800 is WRAM; every 0x800 bytes following up to $1FFF
-            # is mirrored/repeated.
-            address &= 0x7FF
-            value = self.__wram[address]
-
-        elif 0x2000 <= address <= 0x3FFF:
-            # $2000-$2007 = NES PPU registers
-            # This repeats every 8 bytes.
-            address &= 0x2007
-            value = self.__ppu.registers.read(address)
-
-        elif address == 0x4016 or address == 0x4017:
+    def __read_open_bus(self, address: int) -> None:
+        return None
+
+    def __read_ppu(self, address: int) -> Optional[int]:
+        self.__ppu.catch_up()
+        return self.__ppu.registers.read(address & 0x2007)
+
+    def __read_io(self, address: int) -> Optional[int]:
+        if address == 0x4016 or address == 0x4017:
             # $4016 = controller port 0
             # $4017 = controller port 1
             controller_value = 0
@@ -65,69 +272,91 @@ class CPUMemory:
                 controller_value = self.__controllers[address - 0x4016].on_read()
             # A controller read only affects bits 0-4,
             # So we need to mask bits 5-7 of the open bus in
-            value &= 0b11100000
-            controller_value &= 0b00011111
-            value = value | controller_value
+            return (self.__open_bus_value & 0b11100000) | (controller_value & 0b00011111)
+
+        if address >= 0x4020 and self.__mapper is not None:
+            # NOTE: The mapper's cpu_read function may return None if the program reads from an unmapped
+            # address, in which case we return the open bus value
+            return self.__mapper.cpu_read(address)
+
+        return None
+
+    def peek(self, address: int) -> Optional[int]:
+        """
+        Reads a value without any side effects (including on the open bus).
+        Returns None for addresses which can't be read without side effects.
+        """
+        if 0x0000 <= address <= 0x1FFF:
+            return self.__wram[address & 0x7FF]
+
+        if 0x2000 <= address <= 0x3FFF:
+            if self.__ppu is not None:
+                return self.__ppu.registers.peek(address & 0x2007)
 
         elif 0x4020 <= address <= 0xFFFF:
-            # $4020-$FFFF maps to the cartridge board, which can pretty much do whatever it wants
             if self.__mapper is not None:
-                # NOTE: The mapper's cpu_read function may return None if the program reads from an unmapped
-                # address; this is handled at the bottom of the function where we return the open bus value
-                # (which is just the last read value from the CPU bus)
-                value = self.__mapper.cpu_read(address)
-
-        # Test for open bus, i.e. we read from nowhere actually mapped.
-        # https://www.nesdev.org/wiki/Open_bus_behavior
-        if value is None:
-            # TODO: Probably want to log this behavior later.
-            value = self.get_open_bus_value()
-        else:
-            self.set_open_bus_value(value)
-        return byte.to_u8(value)
+                return self.__mapper.cpu_read(address)
+
+        return None
 
     def read16(self, address: int) -> int:
-        return self.read(address) | (self.read(address + 1) << 8)
+        return self.read(address) | (self.read((address + 1) & 0xFFFF) << 8)
 
     def write(self, address: int, value: int) -> None:
-        value = byte.to_u8(value)
+        buffer = self.__write_buffers[address >> 8]
+        if buffer is not None:
+            buffer[address & 0xFF] = value & 0xFF
+        else:
+            self.__write_handlers[address >> 8](address, value & 0xFF)
 
-        if 0x0000 <= address <= 0x1FFF:
-            # $0000-$07FF is WRAM; every 0x800 bytes following up to $1FFF
-            # is mirrored/repeated.
-            address &= 0x7FF
-            self.__wram[address] = value
-            return
+    def __write_nothing(self, address: int, value: int) -> None:
+        pass
 
-        if 0x2000 <= address <= 0x3FFF:
-            # $2000-$2007 = NES PPU registers
-            # This repeats every 8 bytes.
-            address &= 0x2007
-            self.__ppu.registers.write(address, value)
+    def __write_ppu(self, address: int, value: int) -> None:
+        self.__ppu.catch_up()
+        self.__ppu.registers.write(address & 0x2007, value)
 
+    def __write_io(self, address: int, value: int) -> None:
         if address == 0x4016:
             # $4016 = controller port 0
-            if self.__controllers[0] is not None:
-                return self.__controllers[0].on_write(value)
+            if self.__controllers is not None and self.__controllers[0] is not None:
+                self.__controllers[0].on_write(value)
+
+        elif address == 0x4014:
+            self.__oam_dma(value)
 
-        if address == 0x4017:
+        elif address == 0x4017:
             # $4017 = APU frame counter
             pass
 
-        if 0x4020 <= address <= 0xFFFF:
-            # $4020-$FFFF maps to the cartridge board, which can pretty much do whatever it wants
-            if self.__mapper is not None:
-                return self.__mapper.cpu_write(address, value)
+        elif address >= 0x4020 and self.__mapper is not None:
+            self.__mapper.cpu_write(address, value)
+
+    def __oam_dma(self, page: int) -> None:
+        # Copies the 256 bytes of the given page into OAM, stalling the CPU while it does
+        # https://www.nesdev.org/wiki/PPU_registers#OAMDMA_-_Sprite_DMA_($4014_write)
+        ppu = self.__ppu
+        if ppu is None:
+            return
+
+        buffer = self.__read_buffers[page]
+        if buffer is not None:
+            data = bytes(buffer)
+        else:
+            data = bytes(self.read((page << 8) | i) for i in range(PAGE_SIZE))
+
+        ppu.catch_up()
+        ppu.oam_dma(data)
 
-        # If we get down here (after mapping everything)
-        # something has gone seriously wrong
-        return
+        # 513 cycles, plus one more to align if the DMA starts on an odd cycle
+        cpu = ppu.cpu
+        cpu.cycles += 513 + (cpu.cycles & 1)
 
     def write16(self, address: int, value: int) -> None:
         lo = value & 0xFF
         hi = (value >> 8) & 0xFF
         self.write(address, lo)
-        self.write(address + 1, hi)
+        self.write((address + 1) & 0xFFFF, hi)
 
     def get_open_bus_value(self) -> int:
         return self.__open_bus_value
@@ -165,5 +394,6 @@ class CPUMemory:
         if not valid:
             self.__invalid_save_state(msg)
 
-        self.__wram = bytearray(state["wram"])
+        # Update WRAM in place, since pages are views of it
+        self.__wram[:] = bytearray(state["wram"])
         self.__open_bus_value = state["open_bus"]
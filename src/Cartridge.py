@@ -129,6 +129,25 @@ class Cartridge:
         start, size = self.__sectors["chr-rom"]
         return bytes(self.__data[start : start + size])
 
+    def prg_view(self) -> memoryview:
+        """
+        Returns the PRG-ROM without copying it (when the cartridge data supports the buffer protocol).
+        """
+        return self.__sector_view("prg-rom")
+
+    def chr_view(self) -> memoryview:
+        """
+        Returns the CHR-ROM without copying it (when the cartridge data supports the buffer protocol).
+        """
+        return self.__sector_view("chr-rom")
+
+    def __sector_view(self, sector: str) -> memoryview:
+        start, size = self.__sectors[sector]
+        try:
+            return memoryview(self.__data)[start : start + size]
+        except TypeError:
+            return memoryview(bytes(self.__data[start : start + size]))
+
     # TODO: Play-choice sectors
 
     # Savestate
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Callable, List, Optional
+
+import numpy as np
 
 from src.Cartridge import Cartridge
 from src.controllers.Controller import Controller
@@ -14,13 +16,34 @@ if TYPE_CHECKING:
     from io import FileIO
 
 
+def _ignore_frame(frame_buffer: np.ndarray) -> None:
+    pass
+
+
+class RunResult:
+    """
+    Outcome of running the NES headlessly (see NES.run_frames, NES.run_cycles, NES.run_until).
+    """
+
+    def __init__(self, frame_buffer: np.ndarray, cycles: int, frames: int) -> None:
+        # A copy of the frame buffer when the run ended, including the lines drawn so far this frame
+        self.frame_buffer = frame_buffer
+        # CPU cycles and frames run
+        self.cycles = cycles
+        self.frames = frames
+
+
 class NES:
     """
     Represents an NES console.
     """
 
-    PPU_CYCLES_PER_CPU_CYCLE = 3.0
-    APU_CYCLES_PER_CPU_CYCLE = 0.5
+    # Components are clocked by dividing down a master clock
+    # (21.477272 MHz on NTSC consoles)
+    # https://www.nesdev.org/wiki/Cycle_reference_chart
+    CPU_CLOCK_DIVIDER = 12
+    PPU_CLOCK_DIVIDER = 4
+    APU_CLOCK_DIVIDER = 24
 
     def __init__(self) -> None:
         self.__cartridge: Optional[Cartridge] = None
@@ -32,43 +55,156 @@ class NES:
         self.__cpu = CPU(CPUMemory())
         self.__ppu = PPU(self.__cpu)
 
-        self.__debt_ppu_cycles = 0.0
-        self.__debt_apu_cycles = 0.0
+        # The CPU runs ahead of the PPU, which only catches up when the CPU could observe it
+        # (PPU register access, mapper CHR changes) or at the end of a time slice.
+        # The master clock is derived from the CPU cycle counter; this is how many PPU dots have run so far.
+        self.__ppu_clock = 0
+        # Interrupts raised by the PPU while catching up, serviced once the current instruction is done
+        self.__pending_interrupts: List[int] = []
+        # Master clock cycle the current time slice runs up to (see __run_slice)
+        self.__deadline = 0
+        self.__on_frame: Callable[[np.ndarray], None] = _ignore_frame
 
     def load_cartridge(self, cartridge_file: FileIO) -> None:
         self.__cartridge = Cartridge(cartridge_file.read())
-        mapper = create_mapper(self, None, self.__cartridge)
+        mapper = create_mapper(self.__cpu, self.__ppu, self.__cartridge)
 
+        self.__cpu.on_load(mapper)
         self.__cpu.memory.on_load(ppu=self.__ppu, apu=None, controllers=self.__controllers, mapper=mapper)
-        self.__ppu.on_load(self.__cartridge, mapper)
+        self.__ppu.on_load(self.__cartridge, mapper, catch_up=self.__catch_up, reschedule=self.__reschedule)
 
         # Kick the CPU
         self.__cpu.interrupt(Interrupt.RESET)
 
-    def __step(self, on_frame, on_interrupt) -> int:
-        cpu_cycles = self.__cpu.step()
+    @property
+    def cpu(self) -> CPU:
+        return self.__cpu
 
-        # Calculate how many cycles to run the PPU for
-        # based on the amount of CPU cycles we did
-        _ppu_cycles = cpu_cycles * NES.PPU_CYCLES_PER_CPU_CYCLE
-        self.__debt_ppu_cycles += _ppu_cycles % 1.0
-        ppu_cycles = int(_ppu_cycles)
-        if self.__debt_ppu_cycles >= 1.0:
-            ppu_cycles += int(self.__debt_ppu_cycles)
-            self.__debt_ppu_cycles %= 1.0
+    @property
+    def ppu(self) -> PPU:
+        return self.__ppu
 
-        for _ in range(ppu_cycles):
-            self.__ppu.step(on_frame, on_interrupt)
+    def __master_clock(self) -> int:
+        return self.__cpu.cycles * NES.CPU_CLOCK_DIVIDER
 
-    def __interrupt_cb(self, interrupt_id: int):
-        cycles = self.__cpu.interrupt(interrupt_id)
-        self.__debt_ppu_cycles += cycles * NES.PPU_CYCLES_PER_CPU_CYCLE
-        self.__debt_apu_cycles += cycles * NES.APU_CYCLES_PER_CPU_CYCLE
+    def __catch_up(self) -> None:
+        """
+        Runs the PPU up to the current CPU cycle.
+        """
+        dots = self.__master_clock() // NES.PPU_CLOCK_DIVIDER - self.__ppu_clock
+        if dots > 0:
+            self.__ppu_clock += dots
+            self.__ppu.advance(dots, self.__on_frame, self.__interrupt_cb)
 
-    def run(self, on_frame):
+    def __reschedule(self) -> None:
+        """
+        Ends the current time slice early if the PPU now has something happening sooner.
+        """
+        self.__catch_up()
+        deadline = (self.__ppu_clock + self.__ppu.dots_until_event()) * NES.PPU_CLOCK_DIVIDER
+        if deadline < self.__deadline:
+            self.__deadline = deadline
+
+    def __run_slice(self, limit: Optional[int] = None, until: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        Runs the CPU up to the next PPU event it could observe (or the given master clock cycle, if sooner),
+        then catches the PPU up. The slice ends sooner if the PPU reschedules an event earlier, e.g. a mapper
+        IRQ (see PPU.reschedule). If given, `until` is checked after every block, ending the slice early once
+        it returns True. Returns whether `until` did so.
+        """
+        cpu = self.__cpu
+        frame = self.__ppu.frame
+        deadline = (self.__ppu_clock + self.__ppu.dots_until_event()) * NES.PPU_CLOCK_DIVIDER
+        if limit is not None and limit < deadline:
+            deadline = limit
+        self.__deadline = deadline
+
+        while self.__master_clock() < self.__deadline:
+            pc = cpu.reg_pc
+            cpu.step_block()
+            if self.__pending_interrupts or cpu.irq_pending():
+                self.__service_interrupts()
+
+            if until is not None and until():
+                self.__catch_up()
+                self.__service_interrupts()
+                return True
+
+            if cpu.reg_pc == pc and self.__ppu.frame == frame:
+                # We jumped back to where we started, which could be an idle loop;
+                # if it is, skip ahead to (right before) the event ending this slice
+                # (PPU state the CPU can observe doesn't change before then).
+                cpu.skip_idle_loop((self.__deadline - self.__master_clock()) // NES.CPU_CLOCK_DIVIDER)
+
+        self.__catch_up()
+        self.__service_interrupts()
+        return False
+
+    def __interrupt_cb(self, interrupt_id: int):
+        # The PPU may catch up in the middle of an instruction (on register access),
+        # so interrupts are deferred to the next instruction boundary
+        self.__pending_interrupts.append(interrupt_id)
+
+    def __service_interrupts(self) -> None:
+        while self.__pending_interrupts:
+            self.__cpu.interrupt(self.__pending_interrupts.pop(0))
+        # IRQs are level triggered: serviced for as long as they're requested (and not masked)
+        if self.__cpu.irq_pending():
+            self.__cpu.interrupt(Interrupt.IRQ)
+
+    def run(self, on_frame: Callable[[np.ndarray], None]):
         """
         Runs the emulated NES for one frame.
         """
+        self.__on_frame = on_frame
         curr_frame = self.__ppu.frame
         while self.__ppu.frame == curr_frame:
-            self.__step(on_frame, self.__interrupt_cb)
+            self.__run_slice()
+
+    def run_frames(self, frames: int) -> RunResult:
+        """
+        Runs the emulated NES for the given amount of frames, without calling back for each frame.
+        """
+        self.__on_frame = _ignore_frame
+        start_cycles = self.__cpu.cycles
+        start_frame = self.__ppu.frame
+        end_frame = start_frame + frames
+        while self.__ppu.frame < end_frame:
+            self.__run_slice()
+        return self.__result(start_cycles, start_frame)
+
+    def run_cycles(self, cycles: int) -> RunResult:
+        """
+        Runs the emulated NES for (at least) the given amount of CPU cycles.
+        Stops at the end of the block of code running when the cycles are up.
+        """
+        self.__on_frame = _ignore_frame
+        start_cycles = self.__cpu.cycles
+        start_frame = self.__ppu.frame
+        limit = (start_cycles + cycles) * NES.CPU_CLOCK_DIVIDER
+        while self.__master_clock() < limit:
+            self.__run_slice(limit)
+        return self.__result(start_cycles, start_frame)
+
+    def run_until(self, predicate: Callable[[NES], bool], max_cycles: Optional[int] = None) -> RunResult:
+        """
+        Runs the emulated NES until the predicate (checked after each block of code) returns True,
+        or for at most the given amount of CPU cycles.
+        """
+        self.__on_frame = _ignore_frame
+        start_cycles = self.__cpu.cycles
+        start_frame = self.__ppu.frame
+        limit = None if max_cycles is None else (start_cycles + max_cycles) * NES.CPU_CLOCK_DIVIDER
+
+        def until() -> bool:
+            return predicate(self)
+
+        while limit is None or self.__master_clock() < limit:
+            if self.__run_slice(limit, until):
+                break
+        return self.__result(start_cycles, start_frame)
+
+    def __result(self, start_cycles: int, start_frame: int) -> RunResult:
+        ppu = self.__ppu
+        ppu.render_pending_lines()
+        return RunResult(ppu.frame_buffer.copy(), self.__cpu.cycles - start_cycles, ppu.frame - start_frame)
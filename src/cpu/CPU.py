@@ -2,16 +2,17 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, List, Optional, Tuple
 
-from src.cpu.addressing import addressing_modes
+from src.cpu.handlers import handlers
+from src.cpu.idle import idle_loop_cycles
 from src.cpu.Instruction import Instruction
-from src.cpu.operations import ArgumentType, Interpreter, operations
 from src.cpu.registers import FlagsRegister, Register8Bit, Register16Bit
 from src.cpu.Stack import Stack
+from src.cpu.Translator import PRG_ROM_START, Translator
 from src.interrupts import Interrupt, interrupts
 
 if TYPE_CHECKING:
-    from src.cpu.operations import Operation
     from src.CPUMemory import CPUMemory
+    from src.mappers.Mapper import Mapper
 
 
 class CPU:
@@ -21,11 +22,20 @@ class CPU:
 
         # Registers
         # https://www.nesdev.org/wiki/CPU_registers
-        self.a = Register8Bit()
-        self.x = Register8Bit()
-        self.y = Register8Bit()
-        self.pc = Register16Bit()
-        self.sp = Register8Bit()
+        # The register file is kept as plain ints, which the interpreter and opcode handlers use directly;
+        # values are always kept in range (0-0xFF, or 0-0xFFFF for PC) by whatever writes them.
+        self.reg_a = 0
+        self.reg_x = 0
+        self.reg_y = 0
+        self.reg_pc = 0
+        self.reg_sp = 0
+
+        # Register objects are views of the register file, for everything else (tests, debugging)
+        self.a = Register8Bit(self, "reg_a")
+        self.x = Register8Bit(self, "reg_x")
+        self.y = Register8Bit(self, "reg_y")
+        self.pc = Register16Bit(self, "reg_pc")
+        self.sp = Register8Bit(self, "reg_sp")
 
         # Interface for stack operations
         self.stack = Stack(self.memory, self.sp)
@@ -41,6 +51,10 @@ class CPU:
         # a page boundary); applied at the end of the execution of an operation.
         self.extra_cycles = 0
 
+        # Instruction passed to interpreter functions by the opcode handlers;
+        # reused for every step so we don't allocate one per instruction.
+        self.instruction = Instruction(self)
+
         # TODO: Test coverage
         # CLI/SEI/PLP delay
         # Interpreter handles delayed changing interrupt flag via Interpreter.post_operation
@@ -52,6 +66,12 @@ class CPU:
         # we should do an IRQ interrupt at the next available opportunity.
         self.__irq_requesters: List[int] = []
 
+        # Cache of translated PRG-ROM code, used by step_block
+        self.translator = Translator()
+
+    def on_load(self, mapper: Mapper) -> None:
+        self.translator.on_load(mapper, self.memory)
+
     def request_irq(self, source: int) -> None:
         # Sources:
         # 0 - APU DMC Finish
@@ -64,6 +84,12 @@ class CPU:
         if source in self.__irq_requesters:
             del self.__irq_requesters[self.__irq_requesters.index(source)]
 
+    def irq_pending(self) -> bool:
+        """
+        Returns whether an IRQ is requested and not masked by the interrupt flag.
+        """
+        return bool(self.__irq_requesters) and not self.flags.i
+
     def interrupt(self, interrupt_id: int) -> int:
         """
         Triggers an interrupt. Returns number of CPU cycles executed.
@@ -75,7 +101,7 @@ class CPU:
             return 0
 
         # PC, then flags (w/ B flag set depending on type of interrupt) are pushed to stack.
-        pc = self.pc.get_value()
+        pc = self.reg_pc
         flags = self.flags.to_u8(b_flag=interrupt.b_flag)
         self.stack.push16(pc)
         self.stack.push(flags)
@@ -87,59 +113,46 @@ class CPU:
         self.flags.i = True
 
         # Then jump to the address at the vector associated with the interrupt
-        self.pc.set_value(self.memory.read16(interrupt.vector))
+        self.reg_pc = self.memory.read16(interrupt.vector)
 
         return 7
 
-    def __fetch_operation(self) -> Operation | None:
-        opcode = self.memory.read(self.pc.get_value())
-        operation = operations[opcode]
-        if operation is None:
-            raise RuntimeError(f"Unknown opcode {hex(opcode)}, PC: {hex(self.pc.get_value())}")
-        self.pc.increment()
-        return operation
-
-    def __fetch_input(self, operation: Operation) -> int:
-        size = addressing_modes[operation.addressing_mode].input_size
-        value = 0
-
-        match size:
-            case 1:
-                value = self.memory.read(self.pc.get_value())
-                self.pc.increment()
-            case 2:
-                value = self.memory.read16(self.pc.get_value())
-                self.pc.set_value(self.pc.get_value() + 2)
-
-        return value
-
-    def __fetch_argument(self, operation: Operation, op_input: int) -> int:
-        mode = addressing_modes[operation.addressing_mode]
-        arg_type = operation.argument_type
+    def step(self) -> int:
+        """
+        Executes one instruction. Returns number of cycles executed.
+        """
+        pc = self.reg_pc
+        opcode = self.memory.read(pc)
+        self.reg_pc = (pc + 1) & 0xFFFF
+        return handlers[opcode](self)
 
-        if arg_type == ArgumentType.VALUE:
-            return mode.get_value(self, op_input, operation.page_cross_penalty)
+    def skip_idle_loop(self, max_cycles: int) -> int:
+        """
+        If the CPU is sitting in an idle loop (see src.cpu.idle), skips as many whole iterations of it
+        as fit in the given amount of cycles. Returns number of cycles skipped.
+        """
+        # Pending interrupt flag changes or IRQs could break out of the loop at any point
+        if self.delayed_interrupt_flag is not None or (self.__irq_requesters and not self.flags.i):
+            return 0
 
-        return mode.get_address(self, op_input, operation.page_cross_penalty)
+        loop_cycles = idle_loop_cycles(self)
+        if loop_cycles == 0 or max_cycles <= 0:
+            return 0
 
-    def __add_cycles(self, operation: Operation) -> None:
-        cycles = operation.cycles + self.extra_cycles
+        cycles = (max_cycles // loop_cycles) * loop_cycles
         self.cycles += cycles
-        self.extra_cycles = 0
         return cycles
 
-    def step(self) -> int:
+    def step_block(self) -> int:
         """
-        Executes one instruction. Returns number of cycles executed.
+        Executes a whole basic block of PRG-ROM code, or one instruction if PC is outside of PRG-ROM.
+        Returns number of cycles executed.
         """
-        original_pc = self.pc.get_value()
-        operation = self.__fetch_operation()
-        op_input = self.__fetch_input(operation)
-        argument = self.__fetch_argument(operation, op_input)
-
-        Interpreter.pre_operation(self)
-        operation.interpreter_function(Instruction(self, argument))
-        Interpreter.post_operation(self)
-
-        cycles = self.__add_cycles(operation)
-        return cycles
+        pc = self.reg_pc
+        if pc < PRG_ROM_START:
+            return self.step()
+
+        block = self.translator.blocks.get(pc)
+        if block is None:
+            block = self.translator.translate(pc)
+        return block(self)
@@ -17,16 +17,17 @@ class Stack:
     def __init__(self, memory: CPUMemory, sp: Register8Bit) -> None:
         self.memory = memory
         self.sp = sp
-
-    def __get_address(self) -> int:
-        # Stack is on page 1 (0x100-0x1FF)
-        return 0x100 | self.sp.get_value()
+        # Where the value of SP actually lives (the register itself, or the CPU's register file);
+        # accessed directly since stack operations are fairly hot
+        self.__sp_owner = sp._owner
+        self.__sp_attr = sp._attr
 
     def push(self, value: int) -> None:
-        # Push the value
-        self.memory.write(self.__get_address(), value)
+        sp = getattr(self.__sp_owner, self.__sp_attr)
+        # Push the value (stack is on page 1, 0x100-0x1FF)
+        self.memory.write(0x100 | sp, value)
         # And decrement SP
-        self.sp.decrement()
+        setattr(self.__sp_owner, self.__sp_attr, (sp - 1) & 0xFF)
 
     def push16(self, value: int) -> None:
         hi = (value >> 8) & 0xFF
@@ -36,9 +37,10 @@ class Stack:
 
     def pop(self) -> int:
         # Increment SP
-        self.sp.increment()
+        sp = (getattr(self.__sp_owner, self.__sp_attr) + 1) & 0xFF
+        setattr(self.__sp_owner, self.__sp_attr, sp)
         # Read the value SP now points to
-        return self.memory.read(self.__get_address())
+        return self.memory.read(0x100 | sp)
 
     def pop16(self) -> int:
         lo = self.pop()
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+from src.cpu.addressing import AddressingMode, addressing_modes
+from src.cpu.handlers import argument_source
+from src.cpu.operations import ArgumentType, Interpreter, Operation, operations
+from src.mappers.Mapper import PRG_WINDOW_SIZE, PRG_WINDOWS
+
+if TYPE_CHECKING:
+    from src.cpu.CPU import CPU
+    from src.CPUMemory import CPUMemory
+    from src.mappers.Mapper import Mapper
+
+Block = Callable[["CPU"], int]
+
+# Only code in PRG-ROM ($8000-$FFFF) is translated;
+# everything below can be written to by the program (WRAM, PRG-RAM)
+PRG_ROM_START = 0x8000
+
+# Upper bound on the amount of instructions in a single block
+MAX_BLOCK_LENGTH = 32
+
+# Operations which (may) transfer control, and therefore end a block.
+# CLI/SEI/PLP end a block as well so the delayed change of the interrupt flag
+# is always applied by the first instruction of the following block.
+_block_enders = {
+    Interpreter.bcc,
+    Interpreter.bcs,
+    Interpreter.beq,
+    Interpreter.bmi,
+    Interpreter.bne,
+    Interpreter.bpl,
+    Interpreter.bvc,
+    Interpreter.bvs,
+    Interpreter.brk,
+    Interpreter.jmp,
+    Interpreter.jsr,
+    Interpreter.rti,
+    Interpreter.rts,
+    Interpreter.cli,
+    Interpreter.sei,
+    Interpreter.plp,
+}
+
+# Operations which write to the address they're given
+_writers = {
+    Interpreter.asl,
+    Interpreter.dec,
+    Interpreter.inc,
+    Interpreter.lsr,
+    Interpreter.rol,
+    Interpreter.ror,
+    Interpreter.sta,
+    Interpreter.stx,
+    Interpreter.sty,
+}
+
+# Memory mapped I/O (PPU, APU and controller registers)
+_IO_START = 0x2000
+_IO_END = 0x401F
+
+# Start of cartridge space, where writes may switch banks
+_CARTRIDGE_START = 0x4020
+
+
+def _interpret(cpu: CPU) -> int:
+    # Fallback for addresses we can't translate
+    return cpu.step()
+
+
+class Translator:
+    """
+    Translates straight-line runs of 6502 code in PRG-ROM (basic blocks) into Python functions,
+    which run the whole block per call. Blocks are cached by their entry PC until the mapper
+    switches the PRG bank their code is in.
+
+    To keep memory mapped I/O in step with the rest of the system, an instruction which may access
+    I/O registers (statically known to, or through a pointer) always starts a new block, and so does
+    any write which may go into cartridge space (mapper registers, which may catch the PPU up).
+    A block also ends after such a write, since it may switch banks.
+
+    Pages with read hooks (see CPUMemory.add_read_hook) are never translated from, since the hooks
+    may change the code as it's read; blocks stop short of them and CPU.step runs that code instead.
+
+    Operands are decoded ahead of time rather than fetched from the bus, so blocks set the open bus
+    value themselves to the last byte CPU.step would have fetched, before any read which could see it
+    and at the end of the block.
+    """
+
+    def __init__(self) -> None:
+        self.mapper: Optional[Mapper] = None
+        self.memory: Optional[CPUMemory] = None
+        self.blocks: Dict[int, Block] = {}
+        # Entry PCs of the blocks with code in each PRG-ROM window (see Mapper._map_prg)
+        self.__window_blocks: List[List[int]] = [[] for _ in range(PRG_WINDOWS)]
+        # PRG-ROM as a single buffer, when the mapper has one (see Mapper.prg_image)
+        self.__prg_image: Optional[memoryview] = None
+
+    def on_load(self, mapper: Mapper, memory: Optional[CPUMemory] = None) -> None:
+        self.mapper = mapper
+        self.memory = memory
+        self.__prg_image = mapper.prg_image()
+        self.invalidate()
+        mapper.add_bank_switch_callback(self.invalidate)
+        if memory is not None:
+            memory.add_read_hook_callback(self.__on_read_hooks_changed)
+
+    def invalidate(self, first: int = PRG_ROM_START, last: int = 0xFFFF) -> None:
+        """
+        Drops every translated block with code between the given addresses (by default, every block).
+        """
+        first = max(first, PRG_ROM_START)
+        for window in range((first - PRG_ROM_START) // PRG_WINDOW_SIZE, (last - PRG_ROM_START) // PRG_WINDOW_SIZE + 1):
+            entries = self.__window_blocks[window]
+            for pc in entries:
+                self.blocks.pop(pc, None)
+            entries.clear()
+
+    def __on_read_hooks_changed(self, page: int) -> None:
+        self.invalidate(page << 8, (page << 8) | 0xFF)
+
+    def translate(self, pc: int) -> Block:
+        """
+        Translates (and caches) the block starting at the given PC.
+        """
+        if self.mapper is None or pc < PRG_ROM_START:
+            return _interpret
+
+        instructions = self.__decode(pc)
+        block = self.__compile(pc, instructions) if instructions else _interpret
+        self.blocks[pc] = block
+
+        end = pc
+        if instructions:
+            last_pc, operation, _ = instructions[-1]
+            end = last_pc + addressing_modes[operation.addressing_mode].input_size
+        for window in range((pc - PRG_ROM_START) // PRG_WINDOW_SIZE, (end - PRG_ROM_START) // PRG_WINDOW_SIZE + 1):
+            self.__window_blocks[window].append(pc)
+        return block
+
+    def __read(self, address: int) -> Optional[int]:
+        # Reads PRG-ROM directly from the mapper, so decoding has no side effects (e.g. open bus)
+        if address > 0xFFFF:
+            return None
+        if self.__prg_image is not None:
+            return self.__prg_image[address & 0x7FFF]
+        return self.mapper.cpu_read(address)
+
+    def __read_operand(self, address: int, size: int) -> Optional[int]:
+        # Reads a little endian operand of the given size the same way
+        if address + size > 0x10000:
+            return None
+        if self.__prg_image is not None:
+            offset = address & 0x7FFF
+            return int.from_bytes(self.__prg_image[offset : offset + size], "little")
+
+        operand = 0
+        for i in range(size):
+            value = self.mapper.cpu_read(address + i)
+            if value is None:
+                return None
+            operand |= value << (8 * i)
+        return operand
+
+    def __decode(self, pc: int) -> List[Tuple[int, Operation, int]]:
+        # Returns (address, operation, operand) of each instruction in the block
+        instructions = []
+
+        while len(instructions) < MAX_BLOCK_LENGTH:
+            opcode = self.__read(pc)
+            operation = operations[opcode] if opcode is not None else None
+            if operation is None:
+                # Leave unknown opcodes (and unmapped memory) to CPU.step
+                break
+
+            size = addressing_modes[operation.addressing_mode].input_size
+            if self.memory is not None and (
+                self.memory.has_read_hooks(pc >> 8) or self.memory.has_read_hooks((pc + size) >> 8)
+            ):
+                # Code on hooked pages has to be read through the hooks, by CPU.step
+                break
+            operand = self.__read_operand(pc + 1, size)
+            if operand is None:
+                return instructions
+
+            low, high = self.__static_range(operation, operand)
+            accesses_io = low <= _IO_END and high >= _IO_START
+            writes_cartridge = operation.interpreter_function in _writers and high >= _CARTRIDGE_START
+            if (accesses_io or writes_cartridge) and instructions:
+                # Start a new block from here instead, so cpu.cycles is up to date when the access happens
+                break
+
+            instructions.append((pc, operation, operand))
+            pc += 1 + size
+
+            if operation.interpreter_function in _block_enders or writes_cartridge:
+                break
+
+        return instructions
+
+    def __static_range(self, operation: Operation, operand: int) -> Tuple[int, int]:
+        # Returns the range of addresses an instruction might access in memory outside of the zero page
+        # and stack, as far as we know before running it. (-1, -1) if it doesn't access any;
+        # (0, 0xFFFF) if it goes through a pointer, since the address is only known at runtime.
+        match operation.addressing_mode:
+            case AddressingMode.INDIRECT:
+                # JMP ($xxxx) reads its target from the given address
+                return operand, operand + 1
+            case AddressingMode.INDEXED_INDIRECT | AddressingMode.INDIRECT_INDEXED:
+                return 0, 0xFFFF
+
+        fn = operation.interpreter_function
+        if operation.argument_type != ArgumentType.VALUE and fn not in _writers:
+            return -1, -1
+
+        match operation.addressing_mode:
+            case AddressingMode.ABSOLUTE:
+                return operand, operand
+            case AddressingMode.INDEXED_ABSOLUTE_X | AddressingMode.INDEXED_ABSOLUTE_Y:
+                return operand, operand + 0xFF
+        return -1, -1
+
+    def __compile(self, entry: int, instructions: List[Tuple[int, Operation, int]]) -> Block:
+        name = f"block_{entry:04X}"
+        namespace = {"post_operation": Interpreter.post_operation}
+        lines = [
+            "memory = cpu.memory",
+            "instruction = cpu.instruction",
+            "cycles = 0",
+        ]
+        static_cycles = 0
+        next_pc = entry
+
+        for i, (pc, operation, operand) in enumerate(instructions):
+            fn = operation.interpreter_function
+            namespace[fn.__name__] = fn
+            size = addressing_modes[operation.addressing_mode].input_size
+            next_pc = pc + 1 + size
+            static_cycles += operation.cycles
+
+            lines.append(f"# ${pc:04X}")
+            if i == len(instructions) - 1 or self.__static_range(operation, operand)[1] >= _IO_START:
+                # Anything past WRAM may read as open bus, i.e. the last byte fetched
+                last_fetch = operand >> (8 * (size - 1)) if size else self.__read(pc)
+                lines.append(f"memory.set_open_bus_value({last_fetch:#04x})")
+            if fn in _block_enders:
+                # PC needs to be up to date for anything which reads or sets it
+                lines.append(f"cpu.reg_pc = {next_pc & 0xFFFF:#06x}")
+            lines.append(f"operand = {operand:#x}")
+            lines += argument_source(operation)
+            lines += [
+                "instruction.argument = argument",
+                f"{fn.__name__}(instruction)",
+            ]
+            if i == 0:
+                # Apply any delayed change of the interrupt flag from a previous CLI/SEI/PLP
+                lines += [
+                    "if cpu.delayed_interrupt_flag is not None:",
+                    "    post_operation(cpu)",
+                ]
+            elif fn in (Interpreter.cli, Interpreter.sei, Interpreter.plp):
+                lines.append("post_operation(cpu)")
+            if operation.page_cross_penalty:
+                lines += [
+                    "cycles += cpu.extra_cycles",
+                    "cpu.extra_cycles = 0",
+                ]
+
+        if instructions[-1][1].interpreter_function not in _block_enders:
+            lines.append(f"cpu.reg_pc = {next_pc & 0xFFFF:#06x}")
+
+        lines += [
+            f"cycles += {static_cycles}",
+            "cpu.cycles += cycles",
+            "return cycles",
+        ]
+
+        source = f"def {name}(cpu):\n" + "\n".join("    " + line for line in lines) + "\n"
+        exec(compile(source, f"<{name}>", "exec"), namespace)
+        return namespace[name]
@@ -89,7 +89,7 @@ class _AddressingModes:
         # (In the case of relative addressing instructions, this penalty
         # actually only occurs in the event of a successful branch, which
         # we will check for later and clear if needed in the interpreter)
-        old_address = cpu.pc.get_value()
+        old_address = cpu.reg_pc
         new_address = byte.to_u16(old_address + byte.to_s8(offset))
         if page_cross_penalty and byte.high_byte_of(old_address) != byte.high_byte_of(new_address):
             cpu.extra_cycles += 1
@@ -125,7 +125,7 @@ class _AddressingModes:
     def INDEXED_ZERO_PAGE_X_address(cpu: CPU, address: int, page_cross_penalty: bool) -> int:
         # Note that the address wraps around to the zero page, e.g. 0xFF + 0x80 is 0x7F, not 0x17F
         # (We also never have a page cross penalty as such)
-        return byte.to_u8(address + cpu.x.get_value())
+        return byte.to_u8(address + cpu.reg_x)
 
     @staticmethod
     def INDEXED_ZERO_PAGE_X_value(cpu: CPU, address: int, page_cross_penalty: bool) -> int:
@@ -140,7 +140,7 @@ class _AddressingModes:
     def INDEXED_ZERO_PAGE_Y_address(cpu: CPU, address: int, page_cross_penalty: bool) -> int:
         # Note that the address wraps around to the zero page, e.g. 0xFF + 0x80 is 0x7F, not 0x17F
         # (We also never have a page cross penalty as such)
-        return byte.to_u8(address + cpu.y.get_value())
+        return byte.to_u8(address + cpu.reg_y)
 
     @staticmethod
     def INDEXED_ZERO_PAGE_Y_value(cpu: CPU, address: int, page_cross_penalty: bool) -> int:
@@ -154,7 +154,7 @@ class _AddressingModes:
     @staticmethod
     def INDEXED_ABSOLUTE_X_address(cpu: CPU, address: int, page_cross_penalty: bool) -> int:
         old_address = address
-        new_address = byte.to_u16(address + cpu.x.get_value())
+        new_address = byte.to_u16(address + cpu.reg_x)
         if page_cross_penalty and byte.high_byte_of(old_address) != byte.high_byte_of(new_address):
             cpu.extra_cycles += 1
         return new_address
@@ -171,7 +171,7 @@ class _AddressingModes:
     @staticmethod
     def INDEXED_ABSOLUTE_Y_address(cpu: CPU, address: int, page_cross_penalty: bool) -> int:
         old_address = address
-        new_address = byte.to_u16(address + cpu.y.get_value())
+        new_address = byte.to_u16(address + cpu.reg_y)
         if page_cross_penalty and byte.high_byte_of(old_address) != byte.high_byte_of(new_address):
             cpu.extra_cycles += 1
         return new_address
@@ -188,7 +188,7 @@ class _AddressingModes:
     @staticmethod
     def INDEXED_INDIRECT_address(cpu: CPU, address: int, page_cross_penalty: bool) -> int:
         # Zero page wraparound occurs here
-        address += cpu.x.get_value()
+        address += cpu.reg_x
         lo = cpu.memory.read(byte.to_u8(address))
         hi = cpu.memory.read(byte.to_u8(address + 1))
         return byte.build_u16(lo, hi)
@@ -208,7 +208,7 @@ class _AddressingModes:
         lo = cpu.memory.read(address)
         hi = cpu.memory.read(byte.to_u8(address + 1))
         base_address = byte.build_u16(lo, hi)
-        final_address = base_address + cpu.y.get_value()
+        final_address = base_address + cpu.reg_y
 
         # If a 16-bit addition is required to resolve the indirection then we take a cycle penalty
         if page_cross_penalty and byte.high_byte_of(base_address) != byte.high_byte_of(final_address):
@@ -0,0 +1,59 @@
+"""
+Precomputed results of the arithmetic and shift operations.
+
+Each table maps an operation's inputs to a (result, carry, overflow) tuple, so the interpreter can
+get the result and flags of an operation with a single lookup. Tables hold references to a small pool
+of shared tuples (there are only 1024 distinct results), so they're cheap to hold in memory.
+
+ADC and SBC are indexed by (carry << 16) | (a << 8) | value. Since A - M == A + ~M + 1,
+the compare instructions use the ADC table with the carry set and the value inverted.
+Shifts and rotates are indexed by value.
+"""
+
+from __future__ import annotations
+
+from typing import List, Tuple
+
+import numpy as np
+
+AluResult = Tuple[int, bool, bool]
+
+# Every possible result, indexed by result | (carry << 8) | (overflow << 9)
+_results: List[AluResult] = [(i & 0xFF, bool(i & 0x100), bool(i & 0x200)) for i in range(0x400)]
+
+
+def _pack(result: np.ndarray, carry: np.ndarray, overflow: np.ndarray) -> List[AluResult]:
+    packed = (result & 0xFF) | (carry.astype(np.int32) << 8) | (overflow.astype(np.int32) << 9)
+    return [_results[i] for i in packed.tolist()]
+
+
+def _build_adc_sbc() -> Tuple[List[AluResult], List[AluResult]]:
+    index = np.arange(0x20000, dtype=np.int32)
+    carry = index >> 16
+    a = (index >> 8) & 0xFF
+    value = index & 0xFF
+
+    # v = (result ^ A) & (result ^ memory) & 0x80
+    # (result's sign is different from both original accumulator value and memory's values' sign)
+    result = a + value + carry
+    adc = _pack(result, result > 0xFF, ((result ^ a) & (result ^ value) & 0x80) != 0)
+
+    result = a - value - (1 - carry)
+    sbc = _pack(result, result >= 0, ((result ^ a) & (result ^ value) & 0x80) != 0)
+    return adc, sbc
+
+
+def _build_shifts() -> Tuple[List[AluResult], ...]:
+    value = np.arange(0x100, dtype=np.int32)
+    no_overflow = np.zeros_like(value, dtype=bool)
+
+    asl = _pack(value << 1, (value & 0x80) != 0, no_overflow)
+    lsr = _pack(value >> 1, (value & 1) != 0, no_overflow)
+    # Rotates move the bit shifted out into the other end of the value
+    rol = _pack((value << 1) | (value >> 7), (value & 0x80) != 0, no_overflow)
+    ror = _pack((value >> 1) | ((value & 1) << 7), (value & 1) != 0, no_overflow)
+    return asl, lsr, rol, ror
+
+
+adc, sbc = _build_adc_sbc()
+asl, lsr, rol, ror = _build_shifts()
@@ -0,0 +1,179 @@
+"""
+Pre-specialized opcode handlers.
+
+Each handler fuses the operand fetch, addressing mode resolution, interpreter call and
+cycle accounting of a single opcode into one function, generated once at import, so that
+CPU.step doesn't need to look up the addressing mode or branch on the argument type
+(or allocate an Instruction) for every executed instruction.
+
+Handlers are called with PC pointing just past the opcode and return the number of
+cycles executed, same as CPU.step.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Callable, List
+
+from src.cpu.addressing import AddressingMode, UnsupportedAddressing, addressing_modes
+from src.cpu.operations import ArgumentType, Interpreter, Operation, operations
+
+if TYPE_CHECKING:
+    from src.cpu.CPU import CPU
+
+Handler = Callable[["CPU"], int]
+
+# Source used to fetch the operand bytes following the opcode, by input size
+_fetch_input = {
+    0: [],
+    1: [
+        "operand = memory.read(pc)",
+        "cpu.reg_pc = (pc + 1) & 0xFFFF",
+    ],
+    2: [
+        "operand = memory.read(pc) | (memory.read((pc + 1) & 0xFFFF) << 8)",
+        "cpu.reg_pc = (pc + 2) & 0xFFFF",
+    ],
+}
+
+# Source used to resolve the address an instruction operates on, by addressing mode.
+# These mirror the *_address functions in src.cpu.addressing.
+# (result is left in `address`)
+_resolve_address = {
+    AddressingMode.IMPLICIT: [
+        "address = 0",
+    ],
+    AddressingMode.IMMEDIATE: [
+        "address = 0",
+    ],
+    AddressingMode.ABSOLUTE: [
+        "address = operand",
+    ],
+    AddressingMode.ZERO_PAGE: [
+        "address = operand",
+    ],
+    AddressingMode.RELATIVE: [
+        "base = cpu.reg_pc",
+        "address = (base + (operand if operand < 0x80 else operand - 0x100)) & 0xFFFF",
+    ],
+    AddressingMode.INDIRECT: [
+        "address = memory.read(operand) | (memory.read((operand & 0xFF00) | ((operand + 1) & 0xFF)) << 8)",
+    ],
+    AddressingMode.INDEXED_ZERO_PAGE_X: [
+        "address = (operand + cpu.reg_x) & 0xFF",
+    ],
+    AddressingMode.INDEXED_ZERO_PAGE_Y: [
+        "address = (operand + cpu.reg_y) & 0xFF",
+    ],
+    AddressingMode.INDEXED_ABSOLUTE_X: [
+        "address = (operand + cpu.reg_x) & 0xFFFF",
+    ],
+    AddressingMode.INDEXED_ABSOLUTE_Y: [
+        "address = (operand + cpu.reg_y) & 0xFFFF",
+    ],
+    AddressingMode.INDEXED_INDIRECT: [
+        "operand += cpu.reg_x",
+        "address = memory.read(operand & 0xFF) | (memory.read((operand + 1) & 0xFF) << 8)",
+    ],
+    AddressingMode.INDIRECT_INDEXED: [
+        "base = memory.read(operand) | (memory.read((operand + 1) & 0xFF) << 8)",
+        "address = (base + cpu.reg_y) & 0xFFFF",
+    ],
+}
+
+# Modes which may incur a page cross penalty, mapped to the variable holding
+# the address before indexing (compared against the resolved address)
+_page_cross_base = {
+    AddressingMode.RELATIVE: "base",
+    AddressingMode.INDEXED_ABSOLUTE_X: "operand",
+    AddressingMode.INDEXED_ABSOLUTE_Y: "operand",
+    AddressingMode.INDIRECT_INDEXED: "base",
+}
+
+# Modes which have no meaningful value to read (see addressing.unsupported)
+_unsupported_value = {AddressingMode.RELATIVE, AddressingMode.INDIRECT}
+
+
+def _resolve(operation: Operation) -> List[str]:
+    mode = operation.addressing_mode
+    lines = list(_resolve_address[mode])
+    if operation.page_cross_penalty and mode in _page_cross_base:
+        lines += [
+            f"if ({_page_cross_base[mode]} ^ address) & 0xFF00:",
+            "    cpu.extra_cycles += 1",
+        ]
+    return lines
+
+
+def argument_source(operation: Operation) -> List[str]:
+    """
+    Returns source lines which compute the interpreter argument of an operation into `argument`,
+    given its raw input in `operand` (and `cpu`/`memory` in scope).
+    """
+    mode = operation.addressing_mode
+
+    if operation.argument_type == ArgumentType.VALUE:
+        if mode in _unsupported_value:
+            return ["raise UnsupportedAddressing('Unsupported addressing mode')"]
+        if mode == AddressingMode.IMMEDIATE:
+            return ["argument = operand"]
+        if mode == AddressingMode.IMPLICIT:
+            return ["argument = 0"]
+        return _resolve(operation) + ["argument = memory.read(address)"]
+
+    # ADDRESS and NONE operations both resolve the address
+    # (NONE operations, i.e. NOPs, still incur page cross penalties)
+    return _resolve(operation) + ["argument = address"]
+
+
+def _generate_source(name: str, operation: Operation) -> str:
+    lines = [
+        "memory = cpu.memory",
+        "pc = cpu.reg_pc",
+        "operand = 0",
+    ]
+    lines += _fetch_input[addressing_modes[operation.addressing_mode].input_size]
+    lines += argument_source(operation)
+
+    # Interpreter.pre_operation is a no-op, and Interpreter.post_operation only has work to do
+    # while a delayed change to the interrupt flag is pending, so we skip calling them otherwise.
+    lines += [
+        "instruction = cpu.instruction",
+        "instruction.argument = argument",
+        "fn(instruction)",
+        "if cpu.delayed_interrupt_flag is not None:",
+        "    post_operation(cpu)",
+        f"cycles = {operation.cycles} + cpu.extra_cycles",
+        "cpu.extra_cycles = 0",
+        "cpu.cycles += cycles",
+        "return cycles",
+    ]
+
+    body = "\n".join("    " + line for line in lines)
+    return f"def {name}(cpu):\n{body}\n"
+
+
+def _build_handler(opcode: int, operation: Operation) -> Handler:
+    name = f"op_{opcode:02X}"
+    namespace = {
+        "fn": operation.interpreter_function,
+        "post_operation": Interpreter.post_operation,
+        "UnsupportedAddressing": UnsupportedAddressing,
+    }
+    exec(compile(_generate_source(name, operation), f"<handler {name}>", "exec"), namespace)
+    return namespace[name]
+
+
+def _build_unknown_handler(opcode: int) -> Handler:
+    def unknown(cpu: CPU) -> int:
+        # Rewind PC so it points at the offending opcode again
+        pc = cpu.reg_pc = (cpu.reg_pc - 1) & 0xFFFF
+        raise RuntimeError(f"Unknown opcode {hex(opcode)}, PC: {hex(pc)}")
+
+    return unknown
+
+
+# Flat list of handlers indexed by opcode
+handlers: List[Handler] = [
+    _build_handler(opcode, operation) if operation is not None else _build_unknown_handler(opcode)
+    for opcode, operation in enumerate(operations)
+]
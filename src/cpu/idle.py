@@ -0,0 +1,113 @@
+"""
+Detection of idle loops, i.e. loops which do nothing but wait for something outside
+of the CPU (usually the PPU) to change state. Each iteration of such a loop leaves the
+system in the same state, so the CPU can skip straight to the next event which
+could break the loop (crediting the cycles of the skipped iterations).
+
+Recognized loops:
+    JMP *
+    loop: LDA/LDX/LDY/BIT addr ; Bxx loop
+(where addr is either WRAM or PPUSTATUS)
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from src.cpu.addressing import addressing_modes
+from src.cpu.operations import operations
+
+if TYPE_CHECKING:
+    from src.cpu.CPU import CPU
+
+_JMP_ABSOLUTE = 0x4C
+
+# LDA, LDX, LDY, BIT (zero page and absolute)
+_loads = {0xA5, 0xAD, 0xA6, 0xAE, 0xA4, 0xAC}
+_bit_tests = {0x24, 0x2C}
+
+
+def _is_taken(cpu: CPU, branch_opcode: int, load_opcode: int, value: int) -> bool:
+    # Evaluates the branch condition given the flags the load would produce
+    flags = cpu.flags
+    c = flags.c
+    v = flags.v
+    if load_opcode in _bit_tests:
+        z = (cpu.reg_a & value) == 0
+        v = bool(value & 0x40)
+    else:
+        z = value == 0
+    n = bool(value & 0x80)
+
+    match branch_opcode:
+        case 0x10:  # BPL
+            return not n
+        case 0x30:  # BMI
+            return n
+        case 0x50:  # BVC
+            return not v
+        case 0x70:  # BVS
+            return v
+        case 0x90:  # BCC
+            return not c
+        case 0xB0:  # BCS
+            return c
+        case 0xD0:  # BNE
+            return not z
+        case 0xF0:  # BEQ
+            return z
+    return False
+
+
+def idle_loop_cycles(cpu: CPU) -> int:
+    """
+    Returns the amount of cycles one iteration of the idle loop at PC takes, if the code at PC is
+    an idle loop which would keep looping given the current state of the system. Returns 0 otherwise.
+    """
+    memory = cpu.memory
+    pc = cpu.reg_pc
+    opcode = memory.peek(pc)
+
+    if opcode == _JMP_ABSOLUTE:
+        # JMP *
+        if memory.peek(pc + 1) == (pc & 0xFF) and memory.peek(pc + 2) == (pc >> 8):
+            return operations[_JMP_ABSOLUTE].cycles
+        return 0
+
+    if opcode not in _loads and opcode not in _bit_tests:
+        return 0
+
+    load = operations[opcode]
+    size = addressing_modes[load.addressing_mode].input_size
+    address = memory.peek(pc + 1)
+    if size == 2 and address is not None:
+        high = memory.peek(pc + 2)
+        address = None if high is None else address | (high << 8)
+    if address is None:
+        return 0
+
+    # Only WRAM and PPUSTATUS can be read without side effects
+    # (PPUSTATUS only so long as the vblank flag is clear, since reading it clears the flag)
+    if address >= 0x2000 and (address > 0x3FFF or address & 0x2007 != 0x2002):
+        return 0
+    value = memory.peek(address)
+    if value is None or (address >= 0x2000 and value & 0x80):
+        return 0
+
+    # The following instruction has to branch back to the load
+    branch_pc = pc + 1 + size
+    branch_opcode = memory.peek(branch_pc)
+    branch = operations[branch_opcode] if branch_opcode is not None else None
+    if branch is None or branch_opcode & 0x1F != 0x10:
+        return 0
+    offset = memory.peek(branch_pc + 1)
+    next_pc = branch_pc + 2
+    if offset is None or (next_pc + (offset if offset < 0x80 else offset - 0x100)) & 0xFFFF != pc:
+        return 0
+
+    if not _is_taken(cpu, branch_opcode, opcode, value):
+        return 0
+
+    # A taken branch takes an extra cycle, plus another if it crosses a page
+    branch_cycles = branch.cycles + 1 + (1 if (next_pc ^ pc) & 0xFF00 else 0)
+    return load.cycles + branch_cycles
@@ -3,6 +3,7 @@ from __future__ import annotations
 from enum import IntEnum
 from typing import TYPE_CHECKING, Callable, Dict, List
 
+from src.cpu import alu
 from src.cpu.addressing import AddressingMode
 from src.interrupts import Interrupt
 from src.util import byte
@@ -72,21 +73,17 @@ class Interpreter:
         See https://www.nesdev.org/wiki/Instruction_reference#ADC which describes flag changes.
         """
         cpu = instr.cpu
-        memory = instr.argument
-        a = cpu.a.get_value()
-        c = int(cpu.flags.c)
-        result = a + memory + c
-        cpu.a.set_value(byte.to_u8(result))
-
+        flags = cpu.flags
         # c = result > 0xFF
         # (unsigned overflow occurred)
-        cpu.flags.c = result > 0xFF
         # v = (result ^ A) & (result ^ memory) & 0x80
         # (result's sign is different from both original accumulator value and memory's values' sign)
-        cpu.flags.v = bool((result ^ a) & (result ^ memory) & 0x80)
+        # (see src.cpu.alu)
+        result, flags.c, flags.v = alu.adc[(flags.c << 16) | (cpu.reg_a << 8) | instr.argument]
+        cpu.reg_a = result
         # z = result == 0
         # n = result bit 7
-        cpu.flags.update_zero_and_negative(byte.to_u8(result))
+        flags.update_zero_and_negative(result)
 
     @staticmethod
     def and_bitwise(instr: Instruction) -> None:
@@ -97,8 +94,8 @@ class Interpreter:
         """
         cpu = instr.cpu
         value = instr.argument
-        result = byte.to_u8(cpu.a.get_value() & value)
-        cpu.a.set_value(result)
+        result = byte.to_u8(cpu.reg_a & value)
+        cpu.reg_a = result
         # z = result == 0
         # n = result bit 7
         cpu.flags.update_zero_and_negative(result)
@@ -106,11 +103,9 @@ class Interpreter:
     @staticmethod
     def _asl(cpu: CPU, value: int) -> None:
         # Result is just the value shifted to the left once
-        result = byte.to_u8(value << 1)
-
-        # Set the appropriate status flags
         # c = value bit 7
-        cpu.flags.c = bool(value & (1 << 7))
+        result, cpu.flags.c, _ = alu.asl[value]
+
         # z = result == 0
         # n = result bit 7
         cpu.flags.update_zero_and_negative(result)
@@ -135,9 +130,9 @@ class Interpreter:
     def asl_a(instr: Instruction) -> None:
         # Accumulator version of asl
         cpu = instr.cpu
-        value = cpu.a.get_value()
+        value = cpu.reg_a
         result = Interpreter._asl(cpu, value)
-        cpu.a.set_value(result)
+        cpu.reg_a = result
 
     @staticmethod
     def _branch(cpu: CPU, address: int, condition: bool) -> None:
@@ -148,7 +143,7 @@ class Interpreter:
 
         # Branch successful, so we add an extra cycle and set PC
         cpu.extra_cycles += 1
-        cpu.pc.set_value(address)
+        cpu.reg_pc = address
 
     @staticmethod
     def bcc(instr: Instruction) -> None:
@@ -183,7 +178,7 @@ class Interpreter:
         """
         cpu = instr.cpu
         memory = instr.argument
-        result = byte.to_u8(cpu.a.get_value() & memory)
+        result = byte.to_u8(cpu.reg_a & memory)
         # z = result == 0
         cpu.flags.z = result == 0
         # v = memory bit 6
@@ -275,9 +270,10 @@ class Interpreter:
         instr.cpu.flags.v = False
 
     def _cmp(cpu: CPU, reg_value: int, mem_value: int) -> None:
-        result = reg_value - mem_value
-        cpu.flags.c = result >= 0
-        cpu.flags.update_zero_and_negative(byte.to_u8(result))
+        # Compares are subtraction (with the carry set) which only updates flags
+        # c = reg_value >= mem_value
+        result, cpu.flags.c, _ = alu.adc[0x10000 | (reg_value << 8) | (mem_value ^ 0xFF)]
+        cpu.flags.update_zero_and_negative(result)
 
     @staticmethod
     def cmp(instr: Instruction) -> None:
@@ -288,7 +284,7 @@ class Interpreter:
         """
         cpu = instr.cpu
         memory = instr.argument
-        a = cpu.a.get_value()
+        a = cpu.reg_a
         Interpreter._cmp(cpu, a, memory)
 
     @staticmethod
@@ -300,7 +296,7 @@ class Interpreter:
         """
         cpu = instr.cpu
         memory = instr.argument
-        x = cpu.x.get_value()
+        x = cpu.reg_x
         Interpreter._cmp(cpu, x, memory)
 
     @staticmethod
@@ -312,7 +308,7 @@ class Interpreter:
         """
         cpu = instr.cpu
         memory = instr.argument
-        y = cpu.y.get_value()
+        y = cpu.reg_y
         Interpreter._cmp(cpu, y, memory)
 
     @staticmethod
@@ -338,9 +334,9 @@ class Interpreter:
         DEX subtracts 1 from the X register.
         """
         cpu = instr.cpu
-        value = cpu.x.get_value()
+        value = cpu.reg_x
         result = byte.to_u8(value - 1)
-        cpu.x.set_value(result)
+        cpu.reg_x = result
         # Also update appropriate flags
         cpu.flags.update_zero_and_negative(result)
 
@@ -352,9 +348,9 @@ class Interpreter:
         DEY subtracts 1 from the Y register.
         """
         cpu = instr.cpu
-        value = cpu.y.get_value()
+        value = cpu.reg_y
         result = byte.to_u8(value - 1)
-        cpu.y.set_value(result)
+        cpu.reg_y = result
         # Also update appropriate flags
         cpu.flags.update_zero_and_negative(result)
 
@@ -367,8 +363,8 @@ class Interpreter:
         """
         cpu = instr.cpu
         value = instr.argument
-        result = byte.to_u8(cpu.a.get_value() ^ value)
-        cpu.a.set_value(result)
+        result = byte.to_u8(cpu.reg_a ^ value)
+        cpu.reg_a = result
         # z = result == 0
         # n = result bit 7
         cpu.flags.update_zero_and_negative(result)
@@ -396,9 +392,9 @@ class Interpreter:
         INX adds 1 to the X register.
         """
         cpu = instr.cpu
-        value = cpu.x.get_value()
+        value = cpu.reg_x
         result = byte.to_u8(value + 1)
-        cpu.x.set_value(result)
+        cpu.reg_x = result
         # Also update appropriate flags
         cpu.flags.update_zero_and_negative(result)
 
@@ -410,9 +406,9 @@ class Interpreter:
         INY adds 1 to the Y register.
         """
         cpu = instr.cpu
-        value = cpu.y.get_value()
+        value = cpu.reg_y
         result = byte.to_u8(value + 1)
-        cpu.y.set_value(result)
+        cpu.reg_y = result
         # Also update appropriate flags
         cpu.flags.update_zero_and_negative(result)
 
@@ -425,7 +421,7 @@ class Interpreter:
         """
         cpu = instr.cpu
         address = instr.argument
-        cpu.pc.set_value(address)
+        cpu.reg_pc = address
 
     @staticmethod
     def jsr(instr: Instruction) -> None:
@@ -436,8 +432,8 @@ class Interpreter:
         """
         # NOTE: The CPU implementation expends the instruction bytes (3) so we push PC - 1 instead of PC + 2
         cpu = instr.cpu
-        cpu.stack.push16(cpu.pc.get_value() - 1)
-        cpu.pc.set_value(instr.argument)
+        cpu.stack.push16(cpu.reg_pc - 1)
+        cpu.reg_pc = instr.argument
 
     @staticmethod
     def lda(instr: Instruction) -> None:
@@ -450,7 +446,7 @@ class Interpreter:
         value = instr.argument
 
         # Set accumulator
-        cpu.a.set_value(value)
+        cpu.reg_a = value
 
         # Update flags of status register
         cpu.flags.update_zero_and_negative(value)
@@ -466,7 +462,7 @@ class Interpreter:
         value = instr.argument
 
         # Set X register
-        cpu.x.set_value(value)
+        cpu.reg_x = value
 
         # Update flags of status register
         cpu.flags.update_zero_and_negative(value)
@@ -482,7 +478,7 @@ class Interpreter:
         value = instr.argument
 
         # Set Y register
-        cpu.y.set_value(value)
+        cpu.reg_y = value
 
         # Update flags of status register
         cpu.flags.update_zero_and_negative(value)
@@ -490,11 +486,9 @@ class Interpreter:
     @staticmethod
     def _lsr(cpu: CPU, value: int) -> None:
         # Result is just the value shifted to the right once
-        result = value >> 1
-
-        # Set the appropriate status flags
         # c = value bit 0
-        cpu.flags.c = bool(value & 1)
+        result, cpu.flags.c, _ = alu.lsr[value]
+
         # z = result == 0
         # n = 0
         cpu.flags.update_zero_and_negative(result)
@@ -519,9 +513,9 @@ class Interpreter:
     def lsr_a(instr: Instruction) -> None:
         # Accumulator version of lsr
         cpu = instr.cpu
-        value = cpu.a.get_value()
+        value = cpu.reg_a
         result = Interpreter._lsr(cpu, value)
-        cpu.a.set_value(result)
+        cpu.reg_a = result
 
     @staticmethod
     def nop(instr: Instruction) -> None:
@@ -542,8 +536,8 @@ class Interpreter:
         """
         cpu = instr.cpu
         value = instr.argument
-        result = byte.to_u8(cpu.a.get_value() | value)
-        cpu.a.set_value(result)
+        result = byte.to_u8(cpu.reg_a | value)
+        cpu.reg_a = result
         # z = result == 0
         # n = result bit 7
         cpu.flags.update_zero_and_negative(result)
@@ -556,7 +550,7 @@ class Interpreter:
         PHA stores the value of A to the current stack position and then decrements the stack pointer.
         """
         cpu = instr.cpu
-        cpu.stack.push(cpu.a.get_value())
+        cpu.stack.push(cpu.reg_a)
 
     @staticmethod
     def php(instr: Instruction) -> None:
@@ -577,7 +571,7 @@ class Interpreter:
         """
         cpu = instr.cpu
         value = cpu.stack.pop()
-        cpu.a.set_value(value)
+        cpu.reg_a = value
         # z - result == 0
         # n - result bit 7
         cpu.flags.update_zero_and_negative(value)
@@ -605,12 +599,9 @@ class Interpreter:
     def _rol(cpu: CPU, value: int) -> None:
         # Result is just the value rotated to the left once.
         # (e.g. 0b10101000 becomes 0b01010001)
-        carry = (value & (1 << 7)) >> 7
-        result = byte.to_u8((value << 1) | carry)
-
-        # Set the appropriate status flags
         # c = value bit 7
-        cpu.flags.c = bool(carry)
+        result, cpu.flags.c, _ = alu.rol[value]
+
         # z = result == 0
         # n = result bit 7
         cpu.flags.update_zero_and_negative(result)
@@ -635,20 +626,17 @@ class Interpreter:
     def rol_a(instr: Instruction) -> None:
         # Accumulator version of rol
         cpu = instr.cpu
-        value = cpu.a.get_value()
+        value = cpu.reg_a
         result = Interpreter._rol(cpu, value)
-        cpu.a.set_value(result)
+        cpu.reg_a = result
 
     @staticmethod
     def _ror(cpu: CPU, value: int) -> None:
         # Result is just the value rotated to the right once.
         # (e.g. 0b00101001 becomes 0b10010100)
-        carry = value & 1
-        result = byte.to_u8((value >> 1) | (carry << 7))
-
-        # Set the appropriate status flags
         # c = value bit 0
-        cpu.flags.c = bool(carry)
+        result, cpu.flags.c, _ = alu.ror[value]
+
         # z = result == 0
         # n = result bit 7
         cpu.flags.update_zero_and_negative(result)
@@ -673,9 +661,9 @@ class Interpreter:
     def ror_a(instr: Instruction) -> None:
         # Accumulator version of ror
         cpu = instr.cpu
-        value = cpu.a.get_value()
+        value = cpu.reg_a
         result = Interpreter._ror(cpu, value)
-        cpu.a.set_value(result)
+        cpu.reg_a = result
 
     @staticmethod
     def rti(instr: Instruction) -> None:
@@ -686,7 +674,7 @@ class Interpreter:
         """
         cpu = instr.cpu
         cpu.flags.from_u8(cpu.stack.pop())
-        cpu.pc.set_value(cpu.stack.pop16())
+        cpu.reg_pc = cpu.stack.pop16()
 
     @staticmethod
     def rts(instr: Instruction) -> None:
@@ -696,7 +684,7 @@ class Interpreter:
         RTS pulls an address from the stack into the program counter and then increments the program counter.
         """
         cpu = instr.cpu
-        cpu.pc.set_value(cpu.stack.pop16() + 1)
+        cpu.reg_pc = (cpu.stack.pop16() + 1) & 0xFFFF
 
     @staticmethod
     def sbc(instr: Instruction) -> None:
@@ -707,21 +695,17 @@ class Interpreter:
         SBC subtracts a memory value and the NOT of the carry flag from the accumulator.
         """
         cpu = instr.cpu
-        memory = instr.argument
-        a = cpu.a.get_value()
-        c = int(not cpu.flags.c)
-        result = a - memory - c
-        cpu.a.set_value(byte.to_u8(result))
-
+        flags = cpu.flags
         # c = ~(result < $00)
         # (unsigned overflow occurred)
-        cpu.flags.c = not result < 0x0
         # v = (result ^ A) & (result ^ memory) & 0x80
         # (result's sign is different from both original accumulator value and memory's values' sign)
-        cpu.flags.v = bool((result ^ a) & (result ^ memory) & 0x80)
+        # (see src.cpu.alu)
+        result, flags.c, flags.v = alu.sbc[(flags.c << 16) | (cpu.reg_a << 8) | instr.argument]
+        cpu.reg_a = result
         # z = result == 0
         # n = result bit 7
-        cpu.flags.update_zero_and_negative(byte.to_u8(result))
+        flags.update_zero_and_negative(result)
 
     @staticmethod
     def sec(instr: Instruction) -> None:
@@ -764,7 +748,7 @@ class Interpreter:
         address = instr.argument
 
         # Store A into memory
-        cpu.memory.write(address, cpu.a.get_value())
+        cpu.memory.write(address, cpu.reg_a)
 
     @staticmethod
     def stx(instr: Instruction) -> None:
@@ -777,7 +761,7 @@ class Interpreter:
         address = instr.argument
 
         # Store X into memory
-        cpu.memory.write(address, cpu.x.get_value())
+        cpu.memory.write(address, cpu.reg_x)
 
     @staticmethod
     def sty(instr: Instruction) -> None:
@@ -790,7 +774,7 @@ class Interpreter:
         address = instr.argument
 
         # Store Y into memory
-        cpu.memory.write(address, cpu.y.get_value())
+        cpu.memory.write(address, cpu.reg_y)
 
     @staticmethod
     def tax(instr: Instruction) -> None:
@@ -800,8 +784,8 @@ class Interpreter:
         TAX copies the accumulator value to the X register.
         """
         cpu = instr.cpu
-        value = cpu.a.get_value()
-        cpu.x.set_value(value)
+        value = cpu.reg_a
+        cpu.reg_x = value
         cpu.flags.update_zero_and_negative(value)
 
     @staticmethod
@@ -812,8 +796,8 @@ class Interpreter:
         TAX copies the accumulator value to the Y register.
         """
         cpu = instr.cpu
-        value = cpu.a.get_value()
-        cpu.y.set_value(value)
+        value = cpu.reg_a
+        cpu.reg_y = value
         cpu.flags.update_zero_and_negative(value)
 
     @staticmethod
@@ -824,8 +808,8 @@ class Interpreter:
         TSX copies the stack pointer value to the X register.
         """
         cpu = instr.cpu
-        value = cpu.sp.get_value()
-        cpu.x.set_value(value)
+        value = cpu.reg_sp
+        cpu.reg_x = value
         cpu.flags.update_zero_and_negative(value)
 
     @staticmethod
@@ -836,8 +820,8 @@ class Interpreter:
         TXA copies the X register value to the accumulator.
         """
         cpu = instr.cpu
-        value = cpu.x.get_value()
-        cpu.a.set_value(value)
+        value = cpu.reg_x
+        cpu.reg_a = value
         cpu.flags.update_zero_and_negative(value)
 
     @staticmethod
@@ -848,8 +832,8 @@ class Interpreter:
         TXS copies the X register value to the stack pointer.
         """
         cpu = instr.cpu
-        value = cpu.x.get_value()
-        cpu.sp.set_value(value)
+        value = cpu.reg_x
+        cpu.reg_sp = value
         # TXS seemingly doesn't update flags.
 
     @staticmethod
@@ -860,8 +844,8 @@ class Interpreter:
         TYA copies the Y register value to the accumulator.
         """
         cpu = instr.cpu
-        value = cpu.y.get_value()
-        cpu.a.set_value(value)
+        value = cpu.reg_y
+        cpu.reg_a = value
         cpu.flags.update_zero_and_negative(value)
 
 
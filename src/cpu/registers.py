@@ -1,11 +1,27 @@
 from abc import ABC, abstractmethod
+from typing import Optional
 
 
 class RegisterBase(ABC):
-    __slots__ = ["_value"]
+    """
+    A CPU register. By default a register holds its own value, but it can also be a view of
+    an integer attribute on another object (e.g. the CPU's register file, see CPU.reg_a).
+    """
 
-    def __init__(self) -> None:
-        self._value = 0
+    __slots__ = ["_owner", "_attr", "_raw"]
+
+    def __init__(self, owner: Optional[object] = None, attr: str = "_raw") -> None:
+        self._raw = 0
+        self._owner = self if owner is None else owner
+        self._attr = attr
+
+    @property
+    def _value(self) -> int:
+        return getattr(self._owner, self._attr)
+
+    @_value.setter
+    def _value(self, value: int) -> None:
+        setattr(self._owner, self._attr, value)
 
     def get_value(self) -> int:
         return self._value
@@ -35,15 +51,22 @@ class FlagsRegister:
     """
     Represents the status register on the 6502 CPU.
     https://www.nesdev.org/wiki/Status_flags
+
+    The zero and negative flags are evaluated lazily: almost every instruction updates them,
+    but they're rarely read before being overwritten, so we only record the last result
+    and derive z/n from it when something (a branch, PHP, an interrupt, save states) asks.
     """
 
-    __slots__ = ["c", "z", "i", "d", "v", "n"]
+    __slots__ = ["c", "i", "d", "v", "_nz"]
 
     def __init__(self) -> None:
         # bit0 (Carry Flag)
         self.c = False
         # bit1 (Zero/Equal Flag)
-        self.z = False
+        # bit7 (Negative Flag)
+        # Derived from the last result: z = low byte is 0, n = bit 7 is set.
+        # Bit 8 is set to represent z and n both being set, which no 8-bit result can.
+        self._nz = 1
         # bit2 (Interrupt Flag)
         self.i = False
         # bit3 (Decimal Flag -- no effect on NES)
@@ -54,8 +77,30 @@ class FlagsRegister:
         # bit5 is always 1
         # bit6 (Overflow Flag)
         self.v = False
-        # bit7 (Negative Flag)
-        self.n = False
+
+    @property
+    def z(self) -> bool:
+        return (self._nz & 0xFF) == 0
+
+    @z.setter
+    def z(self, value: bool) -> None:
+        n = self._nz & 0x180
+        if value:
+            self._nz = 0x100 if n else 0
+        else:
+            self._nz = 0x80 if n else 1
+
+    @property
+    def n(self) -> bool:
+        return bool(self._nz & 0x180)
+
+    @n.setter
+    def n(self, value: bool) -> None:
+        z = (self._nz & 0xFF) == 0
+        if value:
+            self._nz = 0x100 if z else self._nz | 0x80
+        else:
+            self._nz = 0 if z else (self._nz & 0x7F) or 1
 
     def to_u8(self, b_flag: bool = True) -> int:
         return (
@@ -94,5 +139,4 @@ class FlagsRegister:
         Updates the zero and negative flags of the status register based on the provided value.
         (e.g. LDA sets zero and negative based on loaded value)
         """
-        self.update_zero(value)
-        self.update_negative(value)
+        self._nz = value & 0xFF
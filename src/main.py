@@ -40,17 +40,16 @@ def rainbow(tick, array):
     array.fill(color)
 
 
-def on_frame(frame_buffer):
-    pygame.surfarray.blit_array(surface, frame_buffer)
-    screen.blit(pygame.transform.scale(surface, (H * SCALE, V * SCALE)), (0, 0))
-    pygame.display.flip()
-
-
 def do_nes(file_path: str):
     nes = NES()
     with open(file_path, "rb") as cart:
         nes.load_cartridge(cart)
 
+    def on_frame(frame_buffer):
+        pygame.surfarray.blit_array(surface, nes.ppu.exporter.argb().T)
+        screen.blit(pygame.transform.scale(surface, (H * SCALE, V * SCALE)), (0, 0))
+        pygame.display.flip()
+
     while True:
         clock.tick(60.0)
         nes.run(on_frame)
@@ -0,0 +1,38 @@
+from abc import abstractmethod
+
+from src.mappers.Mapper import Mapper
+
+
+class LatchMapper(Mapper):
+    """
+    Base for discrete logic boards, whose only register is a latch written anywhere in $8000-$FFFF:
+    PRG-ROM and CHR are mapped as set by the last value written, and there's no PRG-RAM.
+    """
+
+    def cpu_read(self, address: int) -> int | None:
+        if address < 0x8000:
+            # Unused
+            return None
+        # CPU $8000-$FFFF: PRG-ROM, as mapped by the latch
+        return self._prg_windows[(address >> 13) & 3][address & 0x1FFF]
+
+    def cpu_write(self, address: int, value: int) -> None:
+        if address >= 0x8000:
+            self._write_latch(value)
+
+    def ppu_read(self, address: int) -> int | None:
+        # PPU $0000-$1FFF: CHR, as mapped by the latch
+        return self._chr_windows[address >> 10][address & 0x3FF]
+
+    def ppu_write(self, address: int, value: int) -> None:
+        if not self._cartridge.header.uses_chr_ram:
+            # Only CHR-RAM is writeable
+            return
+        self._write_chr(address, value)
+
+    @abstractmethod
+    def _write_latch(self, value: int) -> None:
+        """
+        Maps the banks selected by a value written to $8000-$FFFF.
+        """
+        pass
@@ -1,34 +1,45 @@
+from typing import Optional
+
 from src.mappers.Mapper import Mapper
 
 
 class NROM(Mapper):
     def cpu_read(self, address: int) -> int | None:
-        if 0x4020 <= address <= 0x5FFF:
-            # Unused
-            return None
-        elif 0x6000 <= address <= 0x7FFF:
-            # CPU $6000-$7FFF: Unbanked PRG-RAM, mirrored as necessary to fill entire 8 KiB window,
-            # write protectable with an external switch. (Family BASIC only)
-            size = self._cartridge.header.prg_ram_size
-            if size != 0:
-                return self.__prg_ram[(address - 0x6000) % size]
-        elif 0x8000 <= address <= 0xBFFF:
+        if address >= 0x8000:
             # CPU $8000-$BFFF: First 16 KB of PRG-ROM
-            return self.get_prg_page(0)[(address - 0x8000) % self.prg_rom_page_size()]
-        elif 0xC000 <= address <= 0xFFFF:
             # CPU $C000-$FFFF: Last 16 KB of PRG-ROM (or mirror of $8000-$BFFF)
-            return self.get_prg_page(1)[(address - 0xC000) % self.prg_rom_page_size()]
+            return self.__prg_image[address & 0x7FFF]
+        elif address >= 0x6000:
+            # CPU $6000-$7FFF: Unbanked PRG-RAM, mirrored as necessary to fill entire 8 KiB window,
+            # write protectable with an external switch. (Family BASIC only)
+            if self.__prg_ram_size != 0:
+                return self.__prg_ram[address & 0x1FFF]
+        # $4020-$5FFF: Unused
+        return None
+
+    def cpu_read_page(self, page: int) -> Optional[memoryview]:
+        if 0x60 <= page <= 0x7F:
+            if self.__prg_ram_size == 0:
+                return None
+            offset = (page - 0x60) << 8
+            return memoryview(self.__prg_ram)[offset : offset + 0x100]
+        return super().cpu_read_page(page)
+
+    def prg_image(self) -> Optional[memoryview]:
+        return self.__prg_image
 
     def cpu_write(self, address: int, value: int) -> None:
         if 0x6000 <= address <= 0x7FFF:
             # CPU $6000-$7FFF: Unbanked PRG-RAM, mirrored as necessary to fill entire 8 KiB window,
             # write protectable with an external switch. (Family BASIC only)
-            size = self._cartridge.header.prg_ram_size
+            size = self.__prg_ram_size
             if size != 0:
-                self.__prg_ram[(address - 0x6000) % size] = value
+                for offset in range(address & (size - 1), 0x2000, size):
+                    self.__prg_ram[offset] = value
 
     def ppu_read(self, address: int) -> int | None:
-        return self.get_chr_page(0)[address]
+        # PPU $0000-$1FFF: 8 KB of CHR
+        return self._chr_windows[address >> 10][address & 0x3FF]
 
     def ppu_write(self, address: int, value: int) -> int:
         if not self._cartridge.header.uses_chr_ram:
@@ -36,8 +47,16 @@ class NROM(Mapper):
             return
 
         # PPU $0000-$1FFF: 8 KB of CHR-RAM
-        self.get_chr_page(0)[address] = value
+        self._write_chr(address, value)
 
     def on_load(self):
-        # For Family BASIC
+        # PRG-ROM and PRG-RAM as seen by the CPU, with smaller sizes already mirrored to fill their windows,
+        # so reading them is a single subscript. NROM-128 has its 16 KB of PRG-ROM twice.
+        prg = self.prg_memory()
+        if len(prg) < 0x8000:
+            prg = memoryview(bytes(prg) * (0x8000 // max(len(prg), 1)))
+        self.__prg_image = prg[:0x8000]
+
+        # For Family BASIC; writes go to every mirror
+        self.__prg_ram_size = min(self._cartridge.header.prg_ram_size, 0x2000)
         self.__prg_ram = bytearray(0x2000)
@@ -0,0 +1,169 @@
+from typing import Optional
+
+from src.mappers.Mapper import Mapper
+from src.util.InMemoryRegister import BitField, InMemoryRegister
+from src.util.mirroring_modes import MirroringMode
+
+# Name table arrangement selected by the control register
+_mirroring_modes = [
+    MirroringMode.ONE_SCREEN_LOWER_BANK,
+    MirroringMode.ONE_SCREEN_UPPER_BANK,
+    MirroringMode.VERTICAL,
+    MirroringMode.HORIZONTAL,
+]
+
+
+class MMC1Control(InMemoryRegister):
+    # https://www.nesdev.org/wiki/MMC1#Control_(internal,_$8000-$9FFF)
+    # 0: one-screen, lower bank; 1: one-screen, upper bank; 2: vertical; 3: horizontal
+    mirroring = BitField(0, 2)
+    # 0, 1: switch 32 KB at $8000; 2: fix first bank at $8000 and switch 16 KB at $C000;
+    # 3: fix last bank at $C000 and switch 16 KB at $8000
+    prg_rom_bank_mode = BitField(2, 2)
+    # 0: switch 8 KB at a time; 1: switch two separate 4 KB banks
+    chr_rom_bank_mode = BitField(4)
+
+    def on_load(self) -> None:
+        # PRG-ROM bank mode 3 at power on, so the reset vector is in the last bank
+        self.set_value(0x0C)
+
+
+class MMC1(Mapper):
+    """
+    MMC1 (SxROM): PRG-ROM in 16 or 32 KB banks, CHR in 4 or 8 KB banks and switchable mirroring,
+    all set through 5 bit registers which are written one bit at a time.
+    https://www.nesdev.org/wiki/MMC1
+
+    Registers are only decoded when their last bit is written; the banks they select are then mapped
+    as windows (see Mapper._map_prg), so reading PRG-ROM costs the same as it does without a mapper.
+    """
+
+    def cpu_read(self, address: int) -> int | None:
+        if 0x4020 <= address <= 0x5FFF:
+            # Unused
+            return None
+        elif 0x6000 <= address <= 0x7FFF:
+            # CPU $6000-$7FFF: 8 KB PRG-RAM bank, (optional)
+            if self.__prg_ram_enabled():
+                return self.__prg_ram[address - 0x6000]
+        else:
+            # CPU $8000-$BFFF: 16 KB PRG-ROM bank, either switchable or fixed to the first bank
+            # CPU $C000-$FFFF: 16 KB PRG-ROM bank, either fixed to the last bank or switchable
+            return self._prg_windows[(address >> 13) & 3][address & 0x1FFF]
+
+    def cpu_read_page(self, page: int) -> Optional[memoryview]:
+        if 0x60 <= page <= 0x7F:
+            if not self.__prg_ram_enabled():
+                return None
+            offset = (page - 0x60) << 8
+            return memoryview(self.__prg_ram)[offset : offset + 0x100]
+        return super().cpu_read_page(page)
+
+    def cpu_write(self, address: int, value: int) -> None:
+        if 0x6000 <= address <= 0x7FFF:
+            # CPU $6000-$7FFF: 8 KB PRG-RAM bank, (optional)
+            if self.__prg_ram_enabled():
+                self.__prg_ram[address - 0x6000] = value
+        elif address >= 0x8000:
+            # Load register ($8000-$FFFF)
+            # https://www.nesdev.org/wiki/MMC1#Load_register_($8000-$FFFF)
+            if value & 0x80:
+                # Writing a value with bit 7 set clears the shift register, and sets PRG-ROM bank mode 3
+                self.__shift = 0x10
+                self.control.set_value(self.control.get_value() | 0x0C)
+                self.__update_prg_banks()
+                return
+
+            # The shift register is filled from bit 4 down, starting from 0x10: once that bit reaches
+            # bit 0, this is the 5th write and the value goes to the register selected by the address.
+            full = self.__shift & 1
+            self.__shift = (self.__shift >> 1) | ((value & 1) << 4)
+            if full:
+                self.__write_register(address, self.__shift)
+                self.__shift = 0x10
+
+    def ppu_read(self, address: int) -> int | None:
+        # PPU $0000-$0FFF: 4 KB switchable CHR bank
+        # PPU $1000-$1FFF: 4 KB switchable CHR bank
+        return self._chr_windows[address >> 10][address & 0x3FF]
+
+    def ppu_write(self, address: int, value: int) -> None:
+        if not self._cartridge.header.uses_chr_ram:
+            # Only CHR-RAM is writeable
+            return
+        self._write_chr(address, value)
+
+    def on_load(self):
+        self.__prg_ram = bytearray(0x2000)
+        self.__shift = 0x10
+
+        self.control = MMC1Control()
+        self.chr_bank_0 = 0
+        self.chr_bank_1 = 0
+        self.prg_bank = 0
+
+        self.__update_prg_banks()
+        self.__update_chr_banks()
+
+    def __write_register(self, address: int, value: int) -> None:
+        if address <= 0x9FFF:
+            # Control (internal, $8000-$9FFF)
+            self.control.set_value(value)
+            self._set_name_table_mirroring(_mirroring_modes[self.control.mirroring])
+            self.__update_prg_banks()
+            self.__update_chr_banks()
+        elif address <= 0xBFFF:
+            # CHR bank 0 (internal, $A000-$BFFF)
+            self.chr_bank_0 = value
+            self.__update_chr_banks()
+            # On 512 KB boards (SUROM) it also selects which 256 KB of PRG-ROM is used
+            self.__update_prg_banks()
+        elif address <= 0xDFFF:
+            # CHR bank 1 (internal, $C000-$DFFF)
+            self.chr_bank_1 = value
+            self.__update_chr_banks()
+        else:
+            # PRG bank (internal, $E000-$FFFF)
+            prg_ram_enabled = self.__prg_ram_enabled()
+            self.prg_bank = value
+            self.__update_prg_banks()
+            if self.__prg_ram_enabled() != prg_ram_enabled:
+                # PRG-RAM is read as plain memory too, when it's enabled
+                self._on_bank_switch(0x6000, 0x7FFF)
+
+    def __update_prg_banks(self) -> None:
+        # https://www.nesdev.org/wiki/MMC1#PRG_bank_(internal,_$E000-$FFFF)
+        bank = self.prg_bank & 0x0F
+        last = 0x0F
+        if len(self._prg) > 0x40000:
+            # SUROM: bit 4 of the CHR bank selects the 256 KB outer bank
+            outer = self.chr_bank_0 & 0x10
+            bank |= outer
+            last |= outer
+
+        mode = self.control.prg_rom_bank_mode
+        if mode <= 1:
+            # Switch 32 KB at $8000, ignoring the low bit of the bank number
+            self._map_prg(0x8000, bank >> 1, 0x8000)
+        elif mode == 2:
+            # Fix the first bank at $8000 and switch 16 KB at $C000
+            self._map_prg(0x8000, bank & 0x10, 0x4000)
+            self._map_prg(0xC000, bank, 0x4000)
+        else:
+            # Fix the last bank at $C000 and switch 16 KB at $8000
+            self._map_prg(0x8000, bank, 0x4000)
+            self._map_prg(0xC000, last, 0x4000)
+
+    def __update_chr_banks(self) -> None:
+        # https://www.nesdev.org/wiki/MMC1#CHR_bank_0_(internal,_$A000-$BFFF)
+        if self.control.chr_rom_bank_mode:
+            # Two separate 4 KB banks
+            self._map_chr(0x0000, self.chr_bank_0, 0x1000)
+            self._map_chr(0x1000, self.chr_bank_1, 0x1000)
+        else:
+            # One 8 KB bank, ignoring the low bit of the bank number
+            self._map_chr(0x0000, self.chr_bank_0 >> 1, 0x2000)
+
+    def __prg_ram_enabled(self) -> bool:
+        # Bit 4 of the PRG bank disables PRG-RAM (MMC1B and later)
+        return not self.prg_bank & 0x10
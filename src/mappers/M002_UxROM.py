@@ -0,0 +1,12 @@
+from src.mappers.LatchMapper import LatchMapper
+
+
+class UxROM(LatchMapper):
+    """
+    UxROM: a switchable 16 KB PRG-ROM bank at $8000, the last bank fixed at $C000 and 8 KB of (usually) CHR-RAM.
+    https://www.nesdev.org/wiki/UxROM
+    """
+
+    def _write_latch(self, value: int) -> None:
+        # Bank select ($8000-$FFFF): 16 KB PRG-ROM bank at $8000
+        self._map_prg(0x8000, value, 0x4000)
@@ -0,0 +1,12 @@
+from src.mappers.LatchMapper import LatchMapper
+
+
+class CNROM(LatchMapper):
+    """
+    CNROM: 16 or 32 KB of PRG-ROM like NROM, and a switchable 8 KB CHR-ROM bank.
+    https://www.nesdev.org/wiki/CNROM
+    """
+
+    def _write_latch(self, value: int) -> None:
+        # Bank select ($8000-$FFFF): 8 KB CHR-ROM bank
+        self._map_chr(0x0000, value, 0x2000)
@@ -0,0 +1,165 @@
+from typing import Optional
+
+from src.mappers.Mapper import IRQ_SOURCE, Mapper
+from src.util.mirroring_modes import MirroringMode
+
+
+class MMC3(Mapper):
+    """
+    MMC3 (TxROM): two switchable 8 KB PRG-ROM banks, six switchable CHR banks (two of 2 KB, four of 1 KB),
+    switchable mirroring and a scanline counter which can raise IRQs.
+    https://www.nesdev.org/wiki/MMC3
+
+    The real counter is clocked by PPU A12 rising, which (with the usual setup of background tiles at $0000
+    and sprites at $1000) happens once per rendering scanline, when sprite patterns start being fetched.
+    Here it's clocked by a PPU event at that dot instead (see Mapper.scanline_dot).
+    """
+
+    scanline_dot = 260
+
+    def cpu_read(self, address: int) -> int | None:
+        if 0x4020 <= address <= 0x5FFF:
+            # Unused
+            return None
+        elif 0x6000 <= address <= 0x7FFF:
+            # CPU $6000-$7FFF: 8 KB PRG-RAM bank (optional)
+            if self.__prg_ram_protect & 0x80:
+                return self.__prg_ram[address - 0x6000]
+        else:
+            # CPU $8000-$9FFF (or $C000-$DFFF): 8 KB switchable PRG-ROM bank
+            # CPU $A000-$BFFF: 8 KB switchable PRG-ROM bank
+            # CPU $C000-$DFFF (or $8000-$9FFF): 8 KB PRG-ROM bank, fixed to the second-last bank
+            # CPU $E000-$FFFF: 8 KB PRG-ROM bank, fixed to the last bank
+            return self._prg_windows[(address >> 13) & 3][address & 0x1FFF]
+
+    def cpu_read_page(self, page: int) -> Optional[memoryview]:
+        if 0x60 <= page <= 0x7F:
+            if not self.__prg_ram_protect & 0x80:
+                return None
+            offset = (page - 0x60) << 8
+            return memoryview(self.__prg_ram)[offset : offset + 0x100]
+        return super().cpu_read_page(page)
+
+    def cpu_write(self, address: int, value: int) -> None:
+        if 0x6000 <= address <= 0x7FFF:
+            # CPU $6000-$7FFF: 8 KB PRG-RAM bank (optional), unless write protected
+            if self.__prg_ram_protect & 0xC0 == 0x80:
+                self.__prg_ram[address - 0x6000] = value
+            return
+        elif address < 0x8000:
+            return
+
+        # Each register is mirrored across its 8 KB, at even and odd addresses
+        # https://www.nesdev.org/wiki/MMC3#Registers
+        odd = address & 1
+        if address <= 0x9FFF:
+            if not odd:
+                # Bank select ($8000-$9FFE, even)
+                self.__bank_select = value
+            else:
+                # Bank data ($8001-$9FFF, odd)
+                self.__banks[self.__bank_select & 7] = value
+            self.__update_prg_banks()
+            self.__update_chr_banks()
+        elif address <= 0xBFFF:
+            if not odd:
+                # Mirroring ($A000-$BFFE, even)
+                self._set_name_table_mirroring(MirroringMode.HORIZONTAL if value & 1 else MirroringMode.VERTICAL)
+            else:
+                # PRG RAM protect ($A001-$BFFF, odd)
+                enabled = self.__prg_ram_protect & 0x80
+                self.__prg_ram_protect = value
+                if value & 0x80 != enabled:
+                    # PRG-RAM is read as plain memory too, when it's enabled
+                    self._on_bank_switch(0x6000, 0x7FFF)
+        else:
+            # The IRQ registers; clock the counter for the scanlines the PPU has reached first
+            self._catch_up_ppu()
+            if address <= 0xDFFF:
+                if not odd:
+                    # IRQ latch ($C000-$DFFE, even)
+                    self.__irq_latch = value
+                else:
+                    # IRQ reload ($C001-$DFFF, odd): reload the counter on the next scanline
+                    self.__irq_counter = 0
+                    self.__irq_reload = True
+            elif not odd:
+                # IRQ disable ($E000-$FFFE, even), which also acknowledges any pending IRQ
+                self.__irq_enabled = False
+                self._cpu.clear_irq(IRQ_SOURCE)
+            else:
+                # IRQ enable ($E001-$FFFF, odd)
+                self.__irq_enabled = True
+            self._reschedule()
+
+    def ppu_read(self, address: int) -> int | None:
+        # PPU $0000-$1FFF: two 2 KB and four 1 KB switchable CHR banks
+        return self._chr_windows[address >> 10][address & 0x3FF]
+
+    def ppu_write(self, address: int, value: int) -> None:
+        if not self._cartridge.header.uses_chr_ram:
+            # Only CHR-RAM is writeable
+            return
+        self._write_chr(address, value)
+
+    def on_scanline(self) -> None:
+        # https://www.nesdev.org/wiki/MMC3#IRQ_Specifics
+        if self.__irq_counter == 0 or self.__irq_reload:
+            self.__irq_counter = self.__irq_latch
+            self.__irq_reload = False
+        else:
+            self.__irq_counter -= 1
+
+        if self.__irq_counter == 0 and self.__irq_enabled:
+            self._cpu.request_irq(IRQ_SOURCE)
+
+    def scanlines_until_irq(self) -> Optional[int]:
+        if not self.__irq_enabled:
+            return None
+        if self.__irq_counter == 0 or self.__irq_reload:
+            counter = self.__irq_latch
+        else:
+            counter = self.__irq_counter - 1
+        # Once the counter reaches 0, it's clocked that many more times before reaching 0 again
+        return counter + 1
+
+    def on_load(self):
+        self.__prg_ram = bytearray(0x2000)
+        self.__prg_ram_protect = 0x80
+
+        # Bank select, then bank registers R0-R7
+        self.__bank_select = 0
+        self.__banks = [0, 2, 4, 5, 6, 7, 0, 1]
+
+        self.__irq_latch = 0
+        self.__irq_counter = 0
+        self.__irq_reload = False
+        self.__irq_enabled = False
+
+        self.__update_prg_banks()
+        self.__update_chr_banks()
+
+    def __update_prg_banks(self) -> None:
+        # https://www.nesdev.org/wiki/MMC3#PRG_Banks
+        banks = self.__banks
+        if self.__bank_select & 0x40:
+            # $C000-$DFFF swappable, $8000-$9FFF fixed to the second-last bank
+            self._map_prg(0x8000, -2, 0x2000)
+            self._map_prg(0xC000, banks[6], 0x2000)
+        else:
+            # $8000-$9FFF swappable, $C000-$DFFF fixed to the second-last bank
+            self._map_prg(0x8000, banks[6], 0x2000)
+            self._map_prg(0xC000, -2, 0x2000)
+        self._map_prg(0xA000, banks[7], 0x2000)
+        self._map_prg(0xE000, -1, 0x2000)
+
+    def __update_chr_banks(self) -> None:
+        # https://www.nesdev.org/wiki/MMC3#CHR_Banks
+        # R0 and R1 are 2 KB banks (ignoring the low bit), R2-R5 1 KB banks; bit 7 of bank select swaps
+        # which pattern table each kind of bank is in
+        banks = self.__banks
+        inversion = (self.__bank_select & 0x80) << 5
+        self._map_chr(0x0000 ^ inversion, banks[0] >> 1, 0x800)
+        self._map_chr(0x0800 ^ inversion, banks[1] >> 1, 0x800)
+        for i in range(4):
+            self._map_chr((0x1000 + i * 0x400) ^ inversion, banks[2 + i], 0x400)
@@ -0,0 +1,24 @@
+from typing import Optional
+
+from src.mappers.LatchMapper import LatchMapper
+from src.util.mirroring_modes import MirroringMode
+
+
+class AxROM(LatchMapper):
+    """
+    AxROM: a switchable 32 KB PRG-ROM bank, 8 KB of CHR-RAM and switchable one-screen mirroring.
+    https://www.nesdev.org/wiki/AxROM
+    """
+
+    def on_load(self):
+        # Left as the header says until the first write
+        self.__mirroring: Optional[MirroringMode] = None
+        self._map_prg(0x8000, 0, 0x8000)
+
+    def _write_latch(self, value: int) -> None:
+        # Bank select ($8000-$FFFF): 32 KB PRG-ROM bank, and which 1 KB of VRAM all name tables use
+        self._map_prg(0x8000, value & 0x07, 0x8000)
+        mirroring = MirroringMode.ONE_SCREEN_UPPER_BANK if value & 0x10 else MirroringMode.ONE_SCREEN_LOWER_BANK
+        if mirroring != self.__mirroring:
+            self.__mirroring = mirroring
+            self._set_name_table_mirroring(mirroring)
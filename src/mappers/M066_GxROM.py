@@ -0,0 +1,16 @@
+from src.mappers.LatchMapper import LatchMapper
+
+
+class GxROM(LatchMapper):
+    """
+    GxROM: a switchable 32 KB PRG-ROM bank and a switchable 8 KB CHR-ROM bank.
+    https://www.nesdev.org/wiki/GxROM
+    """
+
+    def on_load(self):
+        self._map_prg(0x8000, 0, 0x8000)
+
+    def _write_latch(self, value: int) -> None:
+        # Bank select ($8000-$FFFF): 32 KB PRG-ROM bank in bits 4-5, 8 KB CHR-ROM bank in bits 0-1
+        self._map_prg(0x8000, (value >> 4) & 0x03, 0x8000)
+        self._map_chr(0x0000, value & 0x03, 0x2000)
@@ -1,26 +1,56 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
 
 if TYPE_CHECKING:
     from src.Cartridge import Cartridge
     from src.cpu.CPU import CPU
 
 
+# CPU $8000-$FFFF is mapped in 8 KiB windows and PPU $0000-$1FFF in 1 KiB windows, the smallest banks
+# mappers switch; bigger banks take up several consecutive windows.
+PRG_WINDOW_SIZE = 0x2000
+PRG_WINDOWS = 4
+CHR_WINDOW_SIZE = 0x400
+CHR_WINDOWS = 8
+
+# The IRQ source ID (see CPU.request_irq) mappers raise their IRQs with
+IRQ_SOURCE = 100
+
+
 class Mapper(ABC):
     def __init__(self, cpu: CPU, ppu, cartridge: Cartridge) -> None:
         self._cpu = cpu
         self._ppu = ppu
         self._cartridge = cartridge
 
-        prg = self._cartridge.prg()
-        chr = self._cartridge.chr()
-        total_prg_pages = len(prg) // self.prg_rom_page_size()
-        total_chr_pages = len(chr) // self.chr_rom_page_size()
+        # All of PRG-ROM and all of CHR (ROM, or RAM if the cartridge has no CHR-ROM), each in one buffer.
+        # What's mapped into CPU and PPU memory is a list of fixed size windows into those buffers, along with
+        # the offset each window starts at (the bank index arrays), so switching banks only replaces a window
+        # and reading is a single subscript. See _map_prg and _map_chr.
+        self._prg = bytearray(self._cartridge.prg_view())
+        if self._cartridge.header.uses_chr_ram:
+            self._chr = bytearray(self._cartridge.header.chr_ram_size)
+        else:
+            self._chr = bytearray(self._cartridge.chr_view())
+        self.__prg_view = memoryview(self._prg)
+        self.__chr_view = memoryview(self._chr)
+
+        # Like NROM until the mapper says otherwise: the first 16 KiB of PRG-ROM at $8000,
+        # the last 16 KiB at $C000 and the first 8 KiB of CHR at $0000
+        self._prg_banks = [0] * PRG_WINDOWS
+        self._prg_windows = [self.__prg_view[:PRG_WINDOW_SIZE]] * PRG_WINDOWS
+        self._chr_banks = [0] * CHR_WINDOWS
+        self._chr_windows = [self.__chr_view[:CHR_WINDOW_SIZE]] * CHR_WINDOWS
+        for address, bank in ((0x8000, 0), (0xC000, -1)):
+            first, offsets = self.__bank_offsets(self._prg, PRG_WINDOW_SIZE, address - 0x8000, bank, 0x4000)
+            self.__set_windows(self._prg_banks, self._prg_windows, self.__prg_view, PRG_WINDOW_SIZE, first, offsets)
+        first, offsets = self.__bank_offsets(self._chr, CHR_WINDOW_SIZE, 0x0000, 0, 0x2000)
+        self.__set_windows(self._chr_banks, self._chr_windows, self.__chr_view, CHR_WINDOW_SIZE, first, offsets)
 
-        self.__prg_pages = [self._get_page(prg, self.prg_rom_page_size(), i) for i in range(total_prg_pages)]
-        self.__chr_pages = [self._get_page(chr, self.chr_rom_page_size(), i) for i in range(total_chr_pages)]
+        self.__bank_switch_callbacks: List[Callable[[int, int], None]] = []
+        self.__chr_write_callbacks: List[Callable[[int, int], None]] = []
 
         self.on_load()
 
@@ -47,6 +77,26 @@ class Mapper(ABC):
         """
         pass
 
+    def cpu_read_page(self, page: int) -> Optional[memoryview]:
+        """
+        Returns the 256 bytes mapped at the given CPU page ($41-$FF), if reading from that page
+        is a plain memory read without side effects (e.g. PRG-ROM), so the CPU can read it directly.
+        Returns None otherwise, in which case reads go through cpu_read.
+        By default that's the PRG-ROM banks mapped at $8000-$FFFF (see _map_prg); mappers which change
+        what's mapped some other way should call _on_bank_switch afterwards.
+        """
+        if page < 0x80:
+            return None
+        offset = (page << 8) & (PRG_WINDOW_SIZE - 1)
+        return self._prg_windows[(page >> 5) & 3][offset : offset + 0x100]
+
+    def prg_image(self) -> Optional[memoryview]:
+        """
+        Returns the 32 KB at CPU $8000-$FFFF as a single buffer (indexed by address & 0x7FFF), for mappers
+        which never switch PRG-ROM banks, so code can be fetched straight from it. Returns None otherwise.
+        """
+        return None
+
     @abstractmethod
     def cpu_write(self, address: int, value: int) -> None:
         """
@@ -61,6 +111,15 @@ class Mapper(ABC):
         """
         pass
 
+    def ppu_chr_bank(self, bank: int) -> Optional[Tuple[int, int]]:
+        """
+        Returns which CHR page, and offset within it, the 1 KiB of PPU memory at the given bank
+        (0-7, i.e. $0000-$1FFF in 1 KiB steps) is mapped to, if reading from it is a plain memory read.
+        Returns None otherwise, in which case reads go through ppu_read.
+        By default that's the CHR banks mapped with _map_chr.
+        """
+        return divmod(self._chr_banks[bank], self.chr_rom_page_size())
+
     @abstractmethod
     def ppu_write(self, address: int, value: int) -> None:
         """
@@ -68,18 +127,148 @@ class Mapper(ABC):
         """
         pass
 
-    def tick(self):
+    # The dot (0-340) of each rendering scanline at which on_scanline is called, for mappers which count
+    # scanlines; None for mappers which don't. Rather than the mapper watching what the PPU does every dot,
+    # the PPU schedules an event at that dot of the pre-render line and every visible line.
+    scanline_dot: Optional[int] = None
+
+    def on_scanline(self) -> None:
+        """
+        Called by the PPU at scanline_dot of each scanline it renders (only while rendering is enabled).
+        """
         pass
 
+    def scanlines_until_irq(self) -> Optional[int]:
+        """
+        Returns after how many calls to on_scanline from now the mapper will raise an IRQ,
+        as far as it knows from its current state, or None if it won't. Lets the CPU run ahead until then.
+        Mappers should call _reschedule after changing anything which could make that sooner.
+        """
+        return None
+
+    def add_bank_switch_callback(self, callback: Callable[[int, int], None]) -> None:
+        """
+        Registers a function to be called with (first, last) CPU address whenever what's mapped
+        into that part of CPU memory changes, e.g. PRG-ROM banks.
+        Registering the same function again does nothing, so it's safe to do on every load.
+        """
+        if callback not in self.__bank_switch_callbacks:
+            self.__bank_switch_callbacks.append(callback)
+
+    def add_chr_write_callback(self, callback: Callable[[int, int], None]) -> None:
+        """
+        Registers a function to be called with (CHR page, offset) whenever CHR-RAM is written to.
+        Like add_bank_switch_callback, registering the same function again does nothing.
+        """
+        if callback not in self.__chr_write_callbacks:
+            self.__chr_write_callbacks.append(callback)
+
+    def _on_chr_write(self, page: int, offset: int) -> None:
+        """
+        Should be called by derived mappers after writing to CHR-RAM.
+        """
+        for callback in self.__chr_write_callbacks:
+            callback(page, offset)
+
+    def _catch_up_ppu(self) -> None:
+        """
+        Should be called by derived mappers before changing anything the PPU sees
+        (CHR banks, name table mirroring), so the PPU has rendered everything up to this point first.
+        """
+        if self._ppu is not None:
+            self._ppu.catch_up()
+            self._ppu.render_pending_lines()
+
+    def _set_name_table_mirroring(self, mirror_id: int) -> None:
+        """
+        Should be called by derived mappers which control name table mirroring, to change it.
+        """
+        if self._ppu is not None:
+            self._catch_up_ppu()
+            self._ppu.memory.set_name_table_mirroring(mirror_id)
+
+    def _reschedule(self) -> None:
+        """
+        Should be called by derived mappers after changing anything scanlines_until_irq depends on.
+        """
+        if self._ppu is not None:
+            self._ppu.reschedule()
+
+    def _on_bank_switch(self, first: int = 0x4020, last: int = 0xFFFF) -> None:
+        """
+        Should be called by derived mappers after changing what's mapped into CPU memory between the given
+        addresses (by default all of cartridge space); _map_prg already does so for PRG-ROM banks.
+        """
+        for callback in self.__bank_switch_callbacks:
+            callback(first, last)
+
     def on_load(self):
         pass
 
-    def _get_page(self, buf: bytes, page_size: int, page: int) -> bytearray:
-        offset = page * page_size
-        return bytearray(buf[offset : offset + page_size])
+    def _map_prg(self, address: int, bank: int, size: int) -> None:
+        """
+        Maps PRG-ROM bank number `bank` (counting in banks of `size` bytes; negative numbers count from the end,
+        and banks past the end wrap around) into CPU memory at the given address ($8000-$FFFF).
+        Calls _on_bank_switch if that changes what's mapped.
+        """
+        first, offsets = self.__bank_offsets(self._prg, PRG_WINDOW_SIZE, address - 0x8000, bank, size)
+        if self._prg_banks[first : first + len(offsets)] != offsets:
+            self.__set_windows(self._prg_banks, self._prg_windows, self.__prg_view, PRG_WINDOW_SIZE, first, offsets)
+            start = 0x8000 + first * PRG_WINDOW_SIZE
+            self._on_bank_switch(start, start + len(offsets) * PRG_WINDOW_SIZE - 1)
+
+    def _map_chr(self, address: int, bank: int, size: int) -> None:
+        """
+        Maps CHR bank number `bank` (counting in banks of `size` bytes, like _map_prg) into PPU memory
+        at the given address ($0000-$1FFF). Catches the PPU up first if that changes what's mapped.
+        """
+        first, offsets = self.__bank_offsets(self._chr, CHR_WINDOW_SIZE, address, bank, size)
+        if self._chr_banks[first : first + len(offsets)] != offsets:
+            self._catch_up_ppu()
+            self.__set_windows(self._chr_banks, self._chr_windows, self.__chr_view, CHR_WINDOW_SIZE, first, offsets)
+
+    def _write_chr(self, address: int, value: int) -> None:
+        """
+        Writes to CHR (RAM) through the banks mapped at the given PPU address ($0000-$1FFF).
+        """
+        self._chr_windows[address >> 10][address & 0x3FF] = value
+        self._on_chr_write(*divmod(self._chr_banks[address >> 10] + (address & 0x3FF), self.chr_rom_page_size()))
+
+    @staticmethod
+    def __bank_offsets(buf: bytearray, window_size: int, start: int, bank: int, size: int) -> Tuple[int, List[int]]:
+        # Returns the first window a bank mapped at `start` takes up, and where in buf each of its windows starts
+        total = max(len(buf), window_size)
+        return start // window_size, [(bank * size + i) % total for i in range(0, max(size, window_size), window_size)]
+
+    @staticmethod
+    def __set_windows(
+        banks: List[int], windows: List[memoryview], view: memoryview, window_size: int, first: int, offsets: List[int]
+    ) -> None:
+        for i, offset in enumerate(offsets, first):
+            banks[i] = offset
+            windows[i] = view[offset : offset + window_size]
+
+    def prg_memory(self) -> memoryview:
+        """
+        Returns all of PRG-ROM.
+        """
+        return self.__prg_view
+
+    def chr_memory(self) -> memoryview:
+        """
+        Returns all of CHR-ROM (or CHR-RAM).
+        """
+        return self.__chr_view
+
+    def get_prg_page(self, page: int) -> memoryview:
+        size = self.prg_rom_page_size()
+        offset = (page % (len(self._prg) // size)) * size
+        return self.__prg_view[offset : offset + size]
 
-    def get_prg_page(self, page: int) -> bytearray:
-        return self.__prg_pages[page % len(self.__prg_pages)]
+    def get_chr_page(self, page: int) -> memoryview:
+        size = self.chr_rom_page_size()
+        offset = (page % self.chr_page_count()) * size
+        return self.__chr_view[offset : offset + size]
 
-    def get_chr_page(self, page: int) -> bytearray:
-        return self.__chr_pages[page % len(self.__chr_pages)]
+    def chr_page_count(self) -> int:
+        return len(self._chr) // self.chr_rom_page_size()
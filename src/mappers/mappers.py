@@ -3,6 +3,13 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 from src.mappers.M000_NROM import NROM
+from src.mappers.M001_MMC1 import MMC1
+from src.mappers.M002_UxROM import UxROM
+from src.mappers.M003_CNROM import CNROM
+from src.mappers.M004_MMC3 import MMC3
+from src.mappers.M007_AxROM import AxROM
+from src.mappers.M011_ColorDreams import ColorDreams
+from src.mappers.M066_GxROM import GxROM
 from src.mappers.Mapper import Mapper
 
 if TYPE_CHECKING:
@@ -11,6 +18,13 @@ if TYPE_CHECKING:
 
 __mappers = {
     0: NROM,
+    1: MMC1,
+    2: UxROM,
+    3: CNROM,
+    4: MMC3,
+    7: AxROM,
+    11: ColorDreams,
+    66: GxROM,
 }
 
 
@@ -1,41 +1,120 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
-from src.ppu.Tile import Tile
+import numpy as np
 
 if TYPE_CHECKING:
     from src.ppu.PPU import PPU
 
 
+# Offsets of the pixels of a line from the line's scroll X
+_columns = np.arange(256)
+
+
 class BackgroundRenderer:
     def __init__(self, ppu: PPU) -> None:
         self.ppu = ppu
 
-    def render_scanline(self) -> None:
-        y = self.ppu.scanline
+        # Every 1 KiB of VRAM drawn as a full screen of palette indices, kept between frames so only
+        # the tiles which changed need drawing again. Along with what each was drawn with
+        # (tiles, CHR version, pattern table indices); if any of those change the whole screen is redrawn.
+        self.__screens = np.zeros((4, 240, 256), dtype=np.uint8)
+        self.__screen_sources: List[Optional[Tuple[np.ndarray, int, np.ndarray]]] = [None] * 4
+        self.__screen_versions = [0] * 4
+
+        # The 4 name tables laid out as in PPU memory ($2000 $2400 above $2800 $2C00), so that every
+        # line drawn is a window into it starting at the scroll position. Along with the (VRAM bank,
+        # screen version) copied into each quarter of it, so quarters are only copied when they change.
+        self.__plane = np.zeros((480, 512), dtype=np.uint8)
+        self.__plane_sources: List[Optional[Tuple[int, int]]] = [None] * 4
+
+        # Which pixels of the frame drawn so far are opaque, for sprite priority
+        self.opaque = np.zeros((240, 256), dtype=bool)
+
+    def render_lines(self, start: int, end: int) -> None:
+        """
+        Draws visible lines start to end (exclusive) at once, with the PPU in its current state.
+        """
+        lines = self.lines(start, end)
+        # Lines hold (attribute palette << 2) | color index, i.e. the first 16 colors of palette RAM
+        colors = self.ppu.color_indices()
+        self.ppu.frame_buffer[start:end] = colors[lines]
+        self.ppu.frame_emphasis[start:end] = self.ppu.registers.ppumask.emphasis
+        np.not_equal(lines & 3, 0, out=self.opaque[start:end])
+
+    def lines(self, start: int, end: int) -> np.ndarray:
+        """
+        Returns visible lines start to end (exclusive) as they'd be drawn with the PPU in its current state,
+        as (attribute palette << 2) | color index. The scroll registers hold the scroll position of the
+        first line the PPU hasn't drawn yet (PPU.rendered_lines), so start can't be before that.
+        """
+        registers = self.ppu.registers
+        mask = registers.ppumask
+        if not mask.show_background:
+            return np.zeros((end - start, 256), dtype=np.uint8)
+
+        plane = self.__update_plane(registers.ppuctrl.background_pattern_table)
+
+        scroll_x, scroll_y = registers.scroll_position()
+        first = scroll_y + start - self.ppu.rendered_lines
+        rows = np.arange(first, first + end - start) % 480
+        if scroll_x <= 256:
+            lines = plane[rows, scroll_x : scroll_x + 256]
+        else:
+            # Wraps around horizontally
+            lines = plane[rows[:, None], (scroll_x + _columns) % 512]
+
+        if not mask.show_background_left:
+            lines[:, :8] = 0
+        return lines
+
+    def __update_plane(self, pattern_table_id: int) -> np.ndarray:
+        # Brings every quarter of the plane up to date with the name table mapped there
+        memory = self.ppu.memory
+        tiles, indices = self.ppu.patterns.pattern_table(pattern_table_id)
+        for name_table_id in range(4):
+            bank = memory.name_table_bank(name_table_id)
+            screen = self.__update_screen(bank, tiles, indices)
+            source = (bank, self.__screen_versions[bank])
+            if self.__plane_sources[name_table_id] != source:
+                top = (name_table_id >> 1) * 240
+                left = (name_table_id & 1) * 256
+                self.__plane[top : top + 240, left : left + 256] = screen
+                self.__plane_sources[name_table_id] = source
+        return self.__plane
 
-        for i in range(32):
-            # TODO: Get name table ID and pattern table ID
-            # (these come from the PPU registers)
-            name_table_id = 1
-            pattern_table_id = 0
+    def __update_screen(self, bank: int, tiles: np.ndarray, indices: np.ndarray) -> np.ndarray:
+        # Redraws the tiles of a 1 KiB of VRAM which changed since it was last drawn
+        memory = self.ppu.memory
+        patterns = self.ppu.patterns
+        dirty = memory.dirty_tiles(bank)
 
-            # Calculate the tile index address
-            # and retrieve the ID
-            pos_offset = i + (32 * (y >> 3))
-            name_table_offset = name_table_id * 0x400
-            name_table_start = 0x2000
-            tile_offset = name_table_start + name_table_offset + pos_offset
-            tile_id = self.ppu.memory.read(tile_offset)
+        source = self.__screen_sources[bank]
+        if (
+            source is None
+            or source[0] is not tiles
+            or source[1] != patterns.version
+            or not np.array_equal(source[2], indices)
+        ):
+            dirty[:] = True
+            self.__screen_sources[bank] = (tiles, patterns.version, indices)
 
-            tile = Tile(self.ppu, pattern_table_id, tile_id, y % 8)
+        screen = self.__screens[bank]
+        if not dirty.any():
+            return screen
 
-            # temp
-            palette = [0xFF000000, 0xFF555555, 0xFFAAAAAA, 0xFFFFFFFF]
+        rows, columns = np.nonzero(dirty)
+        name_table = memory.vram_bank(bank)
+        tile_ids = name_table[rows * 32 + columns]
 
-            for j in range(8):
-                color = palette[tile.get_color_index(j)]
-                x = i * 8 + j
+        # Each attribute byte holds the palettes of a 4x4 tile area, 2 bits per 2x2 tile quadrant
+        # https://www.nesdev.org/wiki/PPU_attribute_tables
+        attributes = name_table[960 + (rows >> 2) * 8 + (columns >> 2)]
+        palettes = (attributes >> (((rows & 2) << 1) | (columns & 2))) & 3
 
-                self.ppu.plot(x, y, color)
+        pixels = tiles[indices[tile_ids]] | (palettes << 2)[:, None, None].astype(np.uint8)
+        screen.reshape(30, 8, 32, 8)[rows, :, columns, :] = pixels
+        dirty[:] = False
+        self.__screen_versions[bank] += 1
+        return screen
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+
+from src.ppu.palette import system_palettes
+
+if TYPE_CHECKING:
+    from src.ppu.PPU import PPU
+
+
+def _build_luts():
+    # Colors for each emphasis, flattened so they're indexed by (emphasis << 6) | color index
+    argb = system_palettes.reshape(-1)
+    red = (argb >> 16) & 0xFF
+    green = (argb >> 8) & 0xFF
+    blue = argb & 0xFF
+
+    # Packed so that their bytes are R, G, B, A in memory
+    rgba = (0xFF000000 | (blue << 16) | (green << 8) | red).astype("<u4")
+    rgb = np.stack([red, green, blue], axis=-1).astype(np.uint8)
+    # ITU-R BT.601 luma
+    grey = np.round(red * 0.299 + green * 0.587 + blue * 0.114).astype(np.uint8)
+    return argb.astype(np.uint32), rgba, rgb, grey
+
+
+_argb_lut, _rgba_lut, _rgb_lut, _grey_lut = _build_luts()
+
+
+class FrameExporter:
+    """
+    Converts the PPU's frame buffer of color indices into pictures in common layouts.
+    All of them are row-major (y, x) and written into buffers allocated once, so getting a frame doesn't
+    allocate anything; the arrays returned are overwritten by the next call (copy them to keep them).
+    They support the buffer protocol, so memoryview(array) or array.data gives the pixels without copying.
+    """
+
+    def __init__(self, ppu: PPU) -> None:
+        self.ppu = ppu
+
+        height, width = ppu.frame_buffer.shape
+        self.__indices = np.zeros((height, width), dtype=np.uint16)
+        self.__argb = np.zeros((height, width), dtype=np.uint32)
+        self.__rgba = np.zeros((height, width), dtype="<u4")
+        self.__rgb = np.zeros((height, width, 3), dtype=np.uint8)
+        self.__grey = np.zeros((height, width), dtype=np.uint8)
+
+    def argb(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Returns the frame as a (240, 256) uint32 array of 0xAARRGGBB, as used by e.g. pygame surfaces.
+        """
+        return np.take(_argb_lut, self.__color_indices(), out=self.__argb if out is None else out)
+
+    def rgba(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Returns the frame as a (240, 256, 4) uint8 array of R, G, B, A.
+        """
+        packed = np.take(_rgba_lut, self.__color_indices(), out=self.__rgba if out is None else out.view("<u4")[..., 0])
+        return packed.view(np.uint8).reshape(packed.shape + (4,))
+
+    def rgb(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Returns the frame as a (240, 256, 3) uint8 array of R, G, B (24 bits per pixel).
+        """
+        return np.take(_rgb_lut, self.__color_indices(), axis=0, out=self.__rgb if out is None else out)
+
+    def grey(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Returns the frame as a (240, 256) uint8 array of luminance.
+        """
+        return np.take(_grey_lut, self.__color_indices(), out=self.__grey if out is None else out)
+
+    def __color_indices(self) -> np.ndarray:
+        # Indices into the LUTs, taking each line's emphasis into account
+        ppu = self.ppu
+        offsets = ppu.frame_emphasis.astype(np.uint16) << 6
+        return np.bitwise_or(offsets[:, None], ppu.frame_buffer, out=self.__indices)
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Callable, Optional
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
 
 import numpy as np
 
 from src.interrupts import Interrupt
 from src.ppu.BackgroundRenderer import BackgroundRenderer
+from src.ppu.FrameExporter import FrameExporter
+from src.ppu.PatternCache import PatternCache
 from src.ppu.PPUMemory import PPUMemory
+from src.ppu.SpriteRenderer import SpriteRenderer
 from src.ppu.VideoRegisters import VideoRegisters
 
 if TYPE_CHECKING:
@@ -19,6 +23,25 @@ V = 240
 H_BLANK = 85
 V_BLANK = 21
 
+# Dots per scanline, and per frame (including the pre-render line)
+LINE_DOTS = H + H_BLANK
+FRAME_DOTS = LINE_DOTS * (V + V_BLANK + 1)
+
+
+def _position(scanline: int, cycle: int) -> int:
+    # Position of a dot within the frame, counting from the start of the pre-render line
+    return (scanline + 1) * LINE_DOTS + cycle
+
+
+# Which palette RAM entry each palette color is; the first color of every palette is the backdrop color
+_palette_entries = np.array([0 if i & 3 == 0 else i for i in range(0x20)])
+
+# Dots at which the PPU does something observable by the CPU
+CLEAR_VBLANK_DOT = _position(-1, 1)
+SET_VBLANK_DOT = _position(V + 1, 1)
+VISIBLE_END_DOT = _position(V, 0)
+RELOAD_SCROLL_DOT = _position(-1, 304)
+
 
 class PPU:
     def __init__(self, cpu: CPU) -> None:
@@ -28,58 +51,255 @@ class PPU:
         self.scanline = -1
         self.frame = 0
 
-        self.frame_buffer = np.ndarray((256, 240), dtype=np.uint32)
+        # The picture as (y, x) system color indices (see palette.py), along with the PPUMASK emphasis
+        # each line was drawn with. Colors are only looked up when asked for (see FrameExporter).
+        self.frame_buffer = np.zeros((V, H), dtype=np.uint8)
+        self.frame_emphasis = np.zeros(V, dtype=np.uint8)
+        self.exporter = FrameExporter(self)
 
         self.memory = PPUMemory()
 
+        # Decoded CHR data
+        self.patterns = PatternCache(self.memory)
+
         self.mapper: Optional[Mapper] = None
 
         self.registers = VideoRegisters(self)
 
+        # Object attribute memory: 64 sprites of 4 bytes (Y, tile, attributes, X)
+        # https://www.nesdev.org/wiki/PPU_OAM
+        self.oam = bytearray(0x100)
+        self.oam_array = np.frombuffer(self.oam, dtype=np.uint8)
+
         self.background_renderer = BackgroundRenderer(self)
+        self.sprite_renderer = SpriteRenderer(self)
+
+        # The PPU only does work at a handful of dots each frame, so rather than stepping through
+        # every dot we keep a schedule of those (position, handler) and jump from one to the next.
+        self.__events: List[Tuple[int, Callable[[Callable[[int], None]], None]]] = []
+        # Dots at which the mapper is told about each rendering scanline, if it counts them (see Mapper.scanline_dot)
+        self.__scanline_dots: List[int] = []
+        self.__schedule_events()
+        self.__next_event = 0
+        self.__position = 0
+
+        # Visible lines are drawn lazily, as many at once as possible: lines are only drawn once something
+        # they depend on is about to change (see render_pending_lines), or at the end of the visible area.
+        # Frames without any raster effects are then drawn in a single pass.
+        self.__rendered_lines = 0
+
+        # Where in the frame sprite 0 will hit the background, as far as we know from the current state
+        # (FRAME_DOTS if it won't); None until needed. Forgotten whenever anything rendering depends on changes.
+        self.__sprite_zero_hit_dot: Optional[int] = None
 
-    def on_load(self, cartridge: Cartridge, mapper: Mapper) -> None:
+        self.__catch_up: Optional[Callable[[], None]] = None
+        self.__reschedule: Optional[Callable[[], None]] = None
+
+    def on_load(
+        self,
+        cartridge: Cartridge,
+        mapper: Mapper,
+        catch_up: Optional[Callable[[], None]] = None,
+        reschedule: Optional[Callable[[], None]] = None,
+    ) -> None:
         self.mapper = mapper
         self.memory.on_load(cartridge, mapper)
+        self.patterns.on_load(mapper)
+        self.__catch_up = catch_up
+        self.__reschedule = reschedule
+        self.__schedule_events()
+        self.__next_event = bisect_left(self.__events, self.__position, key=lambda event: event[0])
+
+    def __schedule_events(self) -> None:
+        events = [
+            (CLEAR_VBLANK_DOT, self.__clear_vblank),
+            (RELOAD_SCROLL_DOT, self.__reload_scroll),
+            (SET_VBLANK_DOT, self.__set_vblank),
+            (VISIBLE_END_DOT, self.__finish_rendering),
+        ]
+        self.__scanline_dots = []
+        if self.mapper is not None and self.mapper.scanline_dot is not None:
+            # The pre-render line and every visible line
+            self.__scanline_dots = [_position(scanline, self.mapper.scanline_dot) for scanline in range(-1, V)]
+            events += [(position, self.__mapper_scanline) for position in self.__scanline_dots]
+        self.__events = sorted(events, key=lambda event: event[0])
+
+    def catch_up(self) -> None:
+        """
+        Runs the PPU up to the current CPU cycle, so the CPU sees (and affects) up to date state.
+        Should be called before anything the CPU does that interacts with the PPU.
+        """
+        if self.__catch_up is not None:
+            self.__catch_up()
+
+    def reschedule(self) -> None:
+        """
+        Should be called after changing anything which could make the PPU (or mapper) do something observable
+        by the CPU sooner than dots_until_event said before, so the CPU stops running ahead in time.
+        """
+        if self.__reschedule is not None:
+            self.__reschedule()
+
+    def render_pending_lines(self) -> None:
+        """
+        Draws every visible line the PPU has reached so far but not drawn yet.
+        Should be called (after catching up) before changing anything that affects rendering,
+        so those lines are drawn as they were before the change.
+        """
+        start = self.__rendered_lines
+        end = min(max((self.__position - 1) // LINE_DOTS, 0), V)
+        if end > start:
+            self.background_renderer.render_lines(start, end)
+            self.sprite_renderer.render_lines(start, end)
+            self.__rendered_lines = end
+            if self.rendering_enabled():
+                self.registers.increment_lines(end - start)
+        self.__sprite_zero_hit_dot = None
+
+    @property
+    def rendered_lines(self) -> int:
+        """
+        How many visible lines of the current frame have been drawn so far.
+        """
+        return self.__rendered_lines
+
+    def rendering_enabled(self) -> bool:
+        mask = self.registers.ppumask
+        return bool(mask.show_background or mask.show_sprites)
+
+    def oam_dma(self, data: bytes) -> None:
+        """
+        Copies 256 bytes into OAM, starting at OAMADDR (and wrapping around).
+        https://www.nesdev.org/wiki/PPU_registers#OAMDMA_-_Sprite_DMA_($4014_write)
+        """
+        self.render_pending_lines()
+        address = self.registers.oamaddr.get_value()
+        self.oam[address:] = data[: 0x100 - address]
+        self.oam[:address] = data[0x100 - address :]
+
+    def update_sprite_zero_hit(self) -> None:
+        """
+        Sets the sprite 0 hit flag if sprite 0 has hit the background by now.
+        Should be called before the CPU looks at PPUSTATUS.
+        """
+        status = self.registers.ppustatus
+        if not status.sprite_zero_hit and self.__position >= self.__next_sprite_zero_hit():
+            status.sprite_zero_hit = 1
+
+    def __next_sprite_zero_hit(self) -> int:
+        if self.__sprite_zero_hit_dot is None:
+            # Lines drawn already have set the flag themselves
+            hit = self.sprite_renderer.find_sprite_zero_hit(self.__rendered_lines)
+            self.__sprite_zero_hit_dot = FRAME_DOTS if hit is None else _position(hit[0], hit[1] + 1)
+        return self.__sprite_zero_hit_dot
+
+    def color_indices(self) -> np.ndarray:
+        """
+        Returns the 32 colors of palette RAM (4 background palettes, then 4 sprite palettes) as system color
+        indices, as they'd currently be output. The first color of every palette is the backdrop color.
+        """
+        indices = self.memory.palette_ram()[_palette_entries]
+        if self.registers.ppumask.greyscale:
+            indices &= 0x30
+        return indices
 
     def plot(self, x: int, y: int, color: int) -> None:
         """
-        Plots a pixel into the frame buffer.
+        Plots a pixel (a system color index) into the frame buffer.
         """
-        self.frame_buffer[x][y] = color
+        self.frame_buffer[y][x] = color
 
     def step(self, on_frame: Callable[[np.ndarray], None], on_interrupt: Callable[[int], None]) -> None:
-        if self.scanline == -1:
-            self.__pre_line()
-        elif self.scanline < V:
-            self.__visible_line()
-        elif self.scanline == V + 1:
-            self.__vblank_line(on_interrupt)
-
-        self.cycle += 1
-        if self.cycle >= H + H_BLANK:
-            # Line is done; new line
-            self.cycle = 0
-            self.scanline += 1
-
-            if self.scanline >= V + V_BLANK:
-                # Frame is done; new frame
-                self.scanline = -1
-                self.frame += 1
-                on_frame(self.frame_buffer)
-
-    def __pre_line(self) -> None:
-        if self.cycle == 1:
-            self.registers.ppustatus.vblank_flag = 0
-
-    def __visible_line(self) -> None:
-        if self.cycle == 0:
-            # Draw the entire scanline at once
-            self.background_renderer.render_scanline()
-
-    def __vblank_line(self, on_interrupt: Callable[[int], None]) -> None:
-        if self.cycle == 1:
-            self.registers.ppustatus.vblank_flag = 1
-
-            if self.registers.ppuctrl.nmi_enable == 1:
-                on_interrupt(Interrupt.NMI)
+        """
+        Runs the PPU for a single dot.
+        """
+        self.advance(1, on_frame, on_interrupt)
+
+    def advance(self, dots: int, on_frame: Callable[[np.ndarray], None], on_interrupt: Callable[[int], None]) -> None:
+        """
+        Runs the PPU for the given amount of dots, handling every scheduled event on the way.
+        """
+        events = self.__events
+
+        while dots > 0:
+            target = self.__position + dots
+
+            # Run every event before the target dot
+            i = self.__next_event
+            while i < len(events) and events[i][0] < target:
+                position, handler = events[i]
+                i += 1
+                self.__next_event = i
+                self.__seek(position)
+                handler(on_interrupt)
+
+            if target < FRAME_DOTS:
+                self.__seek(target)
+                return
+
+            # Frame is done; new frame
+            dots = target - FRAME_DOTS
+            self.__next_event = 0
+            self.__seek(0)
+            self.__rendered_lines = 0
+            self.__sprite_zero_hit_dot = None
+            self.frame += 1
+            on_frame(self.frame_buffer)
+
+    def dots_until_event(self) -> int:
+        """
+        Returns how many dots the PPU can advance before something happens which the CPU
+        could observe (vblank flag changes/NMI, sprite 0 hit, mapper IRQ or the end of the frame).
+        """
+        position = self.__position
+        if position < CLEAR_VBLANK_DOT:
+            return CLEAR_VBLANK_DOT - position
+        if position < SET_VBLANK_DOT:
+            event = min(SET_VBLANK_DOT, self.__next_mapper_irq())
+            if position < VISIBLE_END_DOT and not self.registers.ppustatus.sprite_zero_hit:
+                hit = self.__next_sprite_zero_hit()
+                if position < hit:
+                    event = min(event, hit)
+            return event - position
+        return FRAME_DOTS - position
+
+    def __next_mapper_irq(self) -> int:
+        # The dot right after the scanline at which the mapper says it'll raise an IRQ, as far as we know
+        # from the current state (FRAME_DOTS if it won't this frame)
+        dots = self.__scanline_dots
+        if not dots or not self.rendering_enabled():
+            return FRAME_DOTS
+        scanlines = self.mapper.scanlines_until_irq()
+        if scanlines is None:
+            return FRAME_DOTS
+        i = bisect_left(dots, self.__position) + scanlines - 1
+        return dots[i] + 1 if i < len(dots) else FRAME_DOTS
+
+    def __seek(self, position: int) -> None:
+        self.__position = position
+        scanline, self.cycle = divmod(position, LINE_DOTS)
+        self.scanline = scanline - 1
+
+    def __clear_vblank(self, on_interrupt: Callable[[int], None]) -> None:
+        status = self.registers.ppustatus
+        status.vblank_flag = 0
+        status.sprite_zero_hit = 0
+        status.sprite_overflow = 0
+
+    def __reload_scroll(self, on_interrupt: Callable[[int], None]) -> None:
+        if self.rendering_enabled():
+            self.registers.reload_scroll()
+
+    def __mapper_scanline(self, on_interrupt: Callable[[int], None]) -> None:
+        if self.rendering_enabled():
+            self.mapper.on_scanline()
+
+    def __finish_rendering(self, on_interrupt: Callable[[int], None]) -> None:
+        # Draw whatever's left of the visible area
+        self.render_pending_lines()
+
+    def __set_vblank(self, on_interrupt: Callable[[int], None]) -> None:
+        self.registers.ppustatus.vblank_flag = 1
+
+        if self.registers.ppuctrl.nmi_enable == 1:
+            on_interrupt(Interrupt.NMI)
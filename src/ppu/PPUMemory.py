@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, Optional
 
+import numpy as np
+
 from src.util.mirroring_modes import MirroringMode, mirroring_modes
 
 if TYPE_CHECKING:
@@ -12,10 +14,21 @@ if TYPE_CHECKING:
 class PPUMemory:
     def __init__(self) -> None:
         self.__vram = bytearray(0x1000)
+        # View of VRAM for the renderers
+        self.__vram_array = np.frombuffer(self.__vram, dtype=np.uint8)
         self.__cartridge: Optional[Cartridge] = None
         self.__mapper: Optional[Mapper] = None
         self.__mirror_id = MirroringMode.HORIZONTAL
 
+        # Which of the 30x32 tiles of each 1 KiB of VRAM have changed (their ID or attribute) since
+        # the renderer last drew them. Starts with everything dirty, since nothing's been drawn yet.
+        self.__dirty_tiles = np.ones((4, 30, 32), dtype=bool)
+
+        # Palette RAM: 8 palettes (4 background, then 4 sprite) of 4 6-bit colors each
+        # https://www.nesdev.org/wiki/PPU_palettes
+        self.__palette_ram = bytearray(0x20)
+        self.__palette_array = np.frombuffer(self.__palette_ram, dtype=np.uint8)
+
     def on_load(self, cartridge: Cartridge, mapper: Mapper) -> None:
         self.__cartridge = cartridge
         self.__mapper = mapper
@@ -28,6 +41,54 @@ class PPUMemory:
             mirror_id = MirroringMode.FOUR_SCREEN
         self.__mirror_id = mirror_id
 
+    def name_table(self, name_table_id: int) -> np.ndarray:
+        """
+        Returns a view of the 1 KiB of VRAM name table 0-3 ($2000, $2400, $2800, $2C00) is mapped to.
+        """
+        bank = mirroring_modes[self.__mirror_id][0x2000 + (name_table_id & 3) * 0x400]
+        return self.__vram_array[bank : bank + 0x400]
+
+    def vram_bank(self, bank: int) -> np.ndarray:
+        """
+        Returns a view of the given 1 KiB of VRAM (0-3).
+        """
+        return self.__vram_array[bank << 10 : (bank + 1) << 10]
+
+    def name_table_bank(self, name_table_id: int) -> int:
+        """
+        Returns which 1 KiB of VRAM (0-3) name table 0-3 is mapped to.
+        """
+        return mirroring_modes[self.__mirror_id][0x2000 + (name_table_id & 3) * 0x400] >> 10
+
+    def dirty_tiles(self, bank: int) -> np.ndarray:
+        """
+        Returns a (30, 32) view of which tiles in the given 1 KiB of VRAM have been written to
+        (either their tile ID or their attribute). Whoever draws them should clear it afterwards.
+        """
+        return self.__dirty_tiles[bank]
+
+    def palette_ram(self) -> np.ndarray:
+        """
+        Returns a view of the 32 bytes of palette RAM ($3F00-$3F1F).
+        """
+        return self.__palette_array
+
+    def pattern_table(self, pattern_table_id: int) -> np.ndarray:
+        """
+        Returns the 4 KiB of pattern table 0 or 1 ($0000 or $1000), as currently mapped.
+        """
+        banks = []
+        for bank in range(pattern_table_id * 4, pattern_table_id * 4 + 4):
+            source = self.__mapper.ppu_chr_bank(bank) if self.__mapper is not None else None
+            if source is not None:
+                page, offset = source
+                data = memoryview(self.__mapper.get_chr_page(page))[offset : offset + 0x400]
+                banks.append(np.frombuffer(data, dtype=np.uint8))
+            else:
+                start = bank * 0x400
+                banks.append(np.array([self.read(address) for address in range(start, start + 0x400)], dtype=np.uint8))
+        return np.concatenate(banks)
+
     def read(self, address: int) -> int | None:
         value = None
 
@@ -55,7 +116,9 @@ class PPUMemory:
             # Mirrors of $2000-$2EFF
             return self.read(address - 0x1000)
 
-        # TODO: Palette RAM/mirrors
+        if 0x3F00 <= address <= 0x3FFF:
+            # Palette RAM + mirrors
+            value = self.__palette_ram[self.__palette_address(address)]
 
         # TODO: Handle PPU open bus
         return value if value else 0
@@ -71,9 +134,31 @@ class PPUMemory:
             bank = mirroring_modes[self.__mirror_id][address & 0xFC00]
             address = bank + (address & 0x3FF)
             self.__vram[address] = value
+            self.__mark_dirty(address)
 
         if 0x3000 <= address <= 0x3EFF:
             # Mirrors of $2000-$2EFF
             return self.write(address - 0x1000, value)
 
-        # TODO: Palette RAM + mirrors
+        if 0x3F00 <= address <= 0x3FFF:
+            # Palette RAM + mirrors
+            self.__palette_ram[self.__palette_address(address)] = value & 0x3F
+
+    def __palette_address(self, address: int) -> int:
+        # Palette RAM is mirrored every 32 bytes, and the sprite palettes' first colors
+        # ($3F10/$3F14/$3F18/$3F1C) are the background palettes' first colors
+        address &= 0x1F
+        if address & 0x13 == 0x10:
+            address &= 0x0F
+        return address
+
+    def __mark_dirty(self, address: int) -> None:
+        dirty = self.__dirty_tiles[address >> 10]
+        offset = address & 0x3FF
+        if offset < 960:
+            dirty[offset >> 5, offset & 31] = True
+        else:
+            # Each attribute byte covers a 4x4 tile area
+            row = ((offset - 960) >> 3) * 4
+            column = (offset & 7) * 4
+            dirty[row : row + 4, column : column + 4] = True
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional, Set, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from src.mappers.Mapper import Mapper
+    from src.ppu.PPUMemory import PPUMemory
+
+# Each tile is 16 bytes: 8 bytes of the low bit plane, then 8 bytes of the high bit plane
+# https://www.nesdev.org/wiki/PPU_pattern_tables
+TILE_SIZE = 16
+TILES_PER_BANK = 0x400 // TILE_SIZE
+
+
+def _build_row_lut() -> np.ndarray:
+    # Color indices of the 8 pixels of a tile row, indexed by (high plane byte << 8) | low plane byte.
+    planes = np.arange(0x10000, dtype=np.int32)
+    bits = 7 - np.arange(8)
+    low = (planes[:, None] >> bits) & 1
+    high = (planes[:, None] >> (bits + 8)) & 1
+    return ((high << 1) | low).astype(np.uint8)
+
+
+_row_lut = _build_row_lut()
+
+
+def decode_tiles(data: np.ndarray) -> np.ndarray:
+    """
+    Decodes raw pattern data (a multiple of 16 bytes) into a (tiles, 8, 8) array of 2-bit color indices.
+    """
+    planes = data.reshape(-1, 2, 8).astype(np.intp)
+    return _row_lut[(planes[:, 1] << 8) | planes[:, 0]]
+
+
+class PatternCache:
+    """
+    Holds all of the cartridge's CHR data decoded into tiles of color indices, so renderers can
+    gather pixels directly. Tiles are numbered by their position in CHR memory
+    (page * page size + offset) // 16. Tiles written to in CHR-RAM are decoded again on next use.
+    """
+
+    def __init__(self, memory: PPUMemory) -> None:
+        self.memory = memory
+        self.mapper: Optional[Mapper] = None
+        self.__tiles = np.zeros((0, 8, 8), dtype=np.uint8)
+        self.__dirty: Set[int] = set()
+        self.__tiles_per_page = 0
+
+        # Incremented whenever CHR-RAM is written to, so users can tell when tiles they've drawn are stale
+        self.version = 0
+
+    def on_load(self, mapper: Mapper) -> None:
+        self.mapper = mapper
+        self.__tiles_per_page = mapper.chr_rom_page_size() // TILE_SIZE
+        data = np.frombuffer(mapper.chr_memory(), dtype=np.uint8)
+        self.__tiles = decode_tiles(data[: len(data) - len(data) % TILE_SIZE])
+        self.__dirty.clear()
+        mapper.add_chr_write_callback(self.__on_chr_write)
+
+    def __on_chr_write(self, page: int, offset: int) -> None:
+        self.__dirty.add(page * self.__tiles_per_page + offset // TILE_SIZE)
+        self.version += 1
+
+    def tiles(self) -> np.ndarray:
+        """
+        Returns every decoded tile, as a (tiles, 8, 8) array.
+        """
+        if self.__dirty:
+            self.__decode_dirty()
+        return self.__tiles
+
+    def __decode_dirty(self) -> None:
+        data = self.mapper.chr_memory()
+        for tile in self.__dirty:
+            offset = tile * TILE_SIZE
+            self.__tiles[tile] = decode_tiles(np.frombuffer(data[offset : offset + TILE_SIZE], dtype=np.uint8))[0]
+        self.__dirty.clear()
+
+    def pattern_table(self, pattern_table_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (tiles, indices) for pattern table 0 or 1 ($0000 or $1000) as currently mapped,
+        where tile N of the pattern table is tiles[indices[N]].
+        """
+        mapper = self.mapper
+        indices = []
+        for bank in range(pattern_table_id * 4, pattern_table_id * 4 + 4):
+            source = mapper.ppu_chr_bank(bank) if mapper is not None else None
+            if source is None:
+                # Not plain memory, so decode whatever the PPU reads
+                return decode_tiles(self.memory.pattern_table(pattern_table_id)), np.arange(256)
+            page, offset = source
+            first = (page % mapper.chr_page_count()) * self.__tiles_per_page + offset // TILE_SIZE
+            indices.append(np.arange(first, first + TILES_PER_BANK))
+        return self.tiles(), np.concatenate(indices)
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from src.ppu.PPU import PPU
+
+# Most sprites the PPU draws on a single line
+# https://www.nesdev.org/wiki/PPU_sprite_evaluation
+SPRITES_PER_LINE = 8
+
+_pixel_offsets = np.arange(8)
+
+
+class SpriteRenderer:
+    """
+    Draws sprites over the background. Sprites for a whole range of lines are evaluated at once:
+    every line each sprite covers is listed, then sorted by line to keep the first 8 sprites of each line.
+    """
+
+    def __init__(self, ppu: PPU) -> None:
+        self.ppu = ppu
+
+    def render_lines(self, start: int, end: int) -> None:
+        """
+        Draws the sprites on visible lines start to end (exclusive), with the PPU in its current state.
+        Expects the background of those lines to be drawn already.
+        """
+        ppu = self.ppu
+        mask = ppu.registers.ppumask
+        if not mask.show_sprites:
+            return
+
+        lines, sprites, xs, pixels, overflow = self.__evaluate(start, end)
+        if overflow:
+            ppu.registers.ppustatus.sprite_overflow = 1
+        if len(sprites) == 0:
+            return
+
+        visible = pixels != 0
+        np.logical_and(visible, xs < 256, out=visible)
+        if not mask.show_sprites_left:
+            np.logical_and(visible, xs >= 8, out=visible)
+
+        lines = np.broadcast_to(lines[:, None], xs.shape)[visible]
+        sprites = np.broadcast_to(sprites[:, None], xs.shape)[visible]
+        xs = xs[visible]
+        pixels = pixels[visible]
+
+        background_opaque = ppu.background_renderer.opaque[lines, xs]
+
+        # Sprite 0 hit: an opaque pixel of sprite 0 over an opaque background pixel (except at x=255)
+        if mask.show_background and not ppu.registers.ppustatus.sprite_zero_hit:
+            hits = background_opaque & (sprites == 0) & (xs != 255)
+            if not mask.show_background_left:
+                hits &= xs >= 8
+            if hits.any():
+                ppu.registers.ppustatus.sprite_zero_hit = 1
+
+        # Where sprites overlap, the one first in OAM is in front. Pixels are in OAM order within each line,
+        # so that's the first pixel at each position.
+        _, front = np.unique(lines * 256 + xs, return_index=True)
+        lines = lines[front]
+        xs = xs[front]
+        pixels = pixels[front]
+        attributes = ppu.oam_array[sprites[front] * 4 + 2]
+
+        # Sprites with the priority bit set are only drawn over transparent background pixels
+        shown = ((attributes & 0x20) == 0) | ~background_opaque[front]
+        palettes = (attributes & 3) << 2
+        colors = ppu.color_indices()[0x10 | palettes | pixels]
+        ppu.frame_buffer[lines[shown], xs[shown]] = colors[shown]
+
+    def find_sprite_zero_hit(self, start: int) -> Optional[Tuple[int, int]]:
+        """
+        Returns the (line, x) where sprite 0 first hits the background on visible lines start to 239,
+        with the PPU in its current state, or None if it doesn't.
+        """
+        ppu = self.ppu
+        mask = ppu.registers.ppumask
+        if not (mask.show_sprites and mask.show_background):
+            return None
+
+        # Only the lines sprite 0 is on matter
+        top = int(ppu.oam_array[0]) + 1
+        start = max(start, top)
+        end = min(top + self.__sprite_height(), 240)
+        if start >= end:
+            return None
+
+        lines, sprites, xs, pixels, _ = self.__evaluate(start, end, 1)
+        hits = (pixels != 0) & (xs < 255)
+        if not mask.show_sprites_left or not mask.show_background_left:
+            hits &= xs >= 8
+        if not hits.any():
+            return None
+
+        background = ppu.background_renderer.lines(start, end)
+        hits &= (background[lines[:, None] - start, np.minimum(xs, 255)] & 3) != 0
+        if not hits.any():
+            return None
+
+        row, column = np.argwhere(hits)[0]
+        return int(lines[row]), int(xs[row, column])
+
+    def __sprite_height(self) -> int:
+        return 16 if self.ppu.registers.ppuctrl.sprite_size else 8
+
+    def __evaluate(
+        self, start: int, end: int, count: int = 64
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, bool]:
+        """
+        Finds the rows of the first `count` sprites drawn on lines start to end (exclusive).
+        Returns (lines, sprites, xs, pixels, overflow): for each sprite row drawn, its line and sprite number,
+        and the X position and color index of its 8 pixels, ordered by line and then OAM order;
+        along with whether any line had more sprites than could be drawn.
+        """
+        ppu = self.ppu
+        oam = ppu.oam_array[: count * 4].reshape(count, 4)
+        height = self.__sprite_height()
+
+        # Every line each sprite covers (sprites are drawn a line below their Y position)
+        lines = (oam[:, 0].astype(np.intp) + 1)[:, None] + np.arange(height)
+        sprites, rows = np.nonzero((lines >= start) & (lines < end))
+        lines = lines[sprites, rows]
+
+        # Order by line, keeping OAM order within each line, to find the first 8 sprites of each line
+        order = np.argsort(lines, kind="stable")
+        lines = lines[order]
+        rank = np.arange(len(lines)) - np.searchsorted(lines, lines)
+        drawn = rank < SPRITES_PER_LINE
+        overflow = not drawn.all()
+        lines = lines[drawn]
+        sprites = sprites[order[drawn]]
+        rows = rows[order[drawn]]
+
+        tiles = oam[sprites, 1].astype(np.intp)
+        attributes = oam[sprites, 2]
+
+        # Vertical flip
+        rows = np.where(attributes & 0x80, height - 1 - rows, rows)
+
+        if height == 16:
+            # 8x16 sprites take their pattern table from bit 0 of the tile number,
+            # and are made of that tile and the next one
+            tiles = ((tiles & 1) << 8) | (tiles & 0xFE) | (rows >> 3)
+            rows &= 7
+        else:
+            tiles |= ppu.registers.ppuctrl.sprite_pattern_table << 8
+
+        pattern_tiles, indices = self.__pattern_tables()
+        pixels = pattern_tiles[indices[tiles], rows]
+
+        # Horizontal flip
+        flipped = (attributes & 0x40) != 0
+        pixels[flipped] = pixels[flipped, ::-1]
+
+        xs = oam[sprites, 3].astype(np.intp)[:, None] + _pixel_offsets
+        return lines, sprites, xs, pixels, overflow
+
+    def __pattern_tables(self) -> Tuple[np.ndarray, np.ndarray]:
+        # Both pattern tables as (tiles, indices), where tile N of pattern table T is tiles[indices[T * 256 + N]]
+        patterns = self.ppu.patterns
+        tiles0, indices0 = patterns.pattern_table(0)
+        tiles1, indices1 = patterns.pattern_table(1)
+        if tiles0 is tiles1:
+            return tiles0, np.concatenate([indices0, indices1])
+        return np.concatenate([tiles0[indices0], tiles1[indices1]]), np.arange(512)
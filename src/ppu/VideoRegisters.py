@@ -1,44 +1,119 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Optional, Tuple
 
-from src.util.InMemoryRegister import PPUInMemoryRegister
+from src.util.InMemoryRegister import BitField, PPUInMemoryRegister
 
 if TYPE_CHECKING:
     from src.ppu.PPU import PPU
 
 
 class PPUCtrl(PPUInMemoryRegister):
-    nmi_enable: int
+    # https://www.nesdev.org/wiki/PPU_registers#PPUCTRL_-_Miscellaneous_settings_($2000_write)
+    # Base name table ($2000, $2400, $2800, $2C00)
+    name_table = BitField(0, 2)
+    # 0: add 1 to the VRAM address per PPUDATA access, 1: add 32
+    vram_increment = BitField(2)
+    sprite_pattern_table = BitField(3)
+    background_pattern_table = BitField(4)
+    # 0: 8x8 sprites, 1: 8x16 sprites
+    sprite_size = BitField(5)
+    master_slave = BitField(6)
+    nmi_enable = BitField(7)
 
-    def on_load(self):
-        self.add_field("nmi_enable", 7, 1)
+    def on_write(self, value: int) -> None:
+        self.set_value(value)
+        # The name table bits are also the name table bits of t
+        registers = self.ppu.registers
+        registers.t = (registers.t & ~0x0C00) | ((value & 0x03) << 10)
+
+
+class PPUMask(PPUInMemoryRegister):
+    # https://www.nesdev.org/wiki/PPU_registers#PPUMASK_-_Rendering_settings_($2001_write)
+    greyscale = BitField(0)
+    show_background_left = BitField(1)
+    show_sprites_left = BitField(2)
+    show_background = BitField(3)
+    show_sprites = BitField(4)
+    # Emphasize red, green, blue
+    emphasis = BitField(5, 3)
+
+    def on_write(self, value: int) -> None:
+        self.set_value(value)
+        # Turning rendering on or off changes whether (and when) sprite 0 hits and mappers count scanlines
+        self.ppu.reschedule()
 
 
 class PPUStatus(PPUInMemoryRegister):
-    vblank_flag: int
+    sprite_overflow = BitField(5)
+    sprite_zero_hit = BitField(6)
+    vblank_flag = BitField(7)
+
+    def on_read(self) -> int:
+        # Reading PPUSTATUS clears the vblank flag
+        # https://www.nesdev.org/wiki/PPU_registers#PPUSTATUS_-_Rendering_events_($2002_read)
+        self.ppu.update_sprite_zero_hit()
+        value = self.get_value()
+        self.vblank_flag = 0
+        # It also resets the write toggle of PPUSCROLL/PPUADDR
+        self.ppu.registers.w = 0
+        return value
+
 
-    def on_load(self):
-        self.add_field("vblank_flag", 7, 1)
+class OAMAddr(PPUInMemoryRegister):
+    # https://www.nesdev.org/wiki/PPU_registers#OAMADDR_-_Sprite_RAM_address_($2003_write)
+    pass
+
+
+class OAMData(PPUInMemoryRegister):
+    # https://www.nesdev.org/wiki/PPU_registers#OAMDATA_-_Sprite_RAM_data_($2004_read/write)
+    def on_read(self) -> int:
+        return self.ppu.oam[self.ppu.registers.oamaddr.get_value()]
+
+    def on_write(self, value: int) -> None:
+        # Write the value and increment OAMADDR
+        oamaddr = self.ppu.registers.oamaddr
+        address = oamaddr.get_value()
+        self.ppu.oam[address] = value
+        oamaddr.set_value((address + 1) & 0xFF)
+
+
+class PPUScroll(PPUInMemoryRegister):
+    # https://www.nesdev.org/wiki/PPU_scrolling#$2005_first_write_(w_is_0)
+    def on_write(self, value: int) -> None:
+        registers = self.ppu.registers
+        if not registers.w:
+            # X scroll first: coarse X into t, fine X into x
+            registers.t = (registers.t & ~0x001F) | (value >> 3)
+            registers.x = value & 0x07
+        else:
+            # Then Y scroll: fine Y and coarse Y into t
+            registers.t = (registers.t & ~0x73E0) | ((value & 0x07) << 12) | ((value & 0xF8) << 2)
+        registers.w ^= 1
 
 
 class PPUAddr(PPUInMemoryRegister):
     # https://www.nesdev.org/wiki/PPU_registers#PPUADDR_-_VRAM_address_($2006_write)
-    __latch: bool
-    address: int
+    # https://www.nesdev.org/wiki/PPU_scrolling#$2006_first_write_(w_is_0)
+    @property
+    def address(self) -> int:
+        # The VRAM address PPUDATA accesses
+        return self.ppu.registers.v
 
-    def on_load(self):
-        self.__latch = False
-        self.address = 0
+    @address.setter
+    def address(self, value: int) -> None:
+        self.ppu.registers.v = value & 0x7FFF
 
     def on_write(self, value: int) -> None:
-        if not self.__latch:
-            # Write the high byte of the address first
-            self.address = (self.address & 0x00FF) | (value << 8)
+        registers = self.ppu.registers
+        if not registers.w:
+            # Write the high byte of the address first (bit 14 is cleared)
+            registers.t = (registers.t & 0x00FF) | ((value & 0x3F) << 8)
         else:
-            # Now the low byte of the address
-            self.address = (self.address & 0xFF00) | value
-        self.__latch = not self.__latch
+            # Now the low byte of the address, after which the address is used
+            registers.t = (registers.t & 0xFF00) | value
+            registers.v = registers.t
+        registers.w ^= 1
 
 
 class PPUData(PPUInMemoryRegister):
@@ -52,10 +127,11 @@ class PPUData(PPUInMemoryRegister):
         # Reading from PPUDATA does not directly return the value at the current VRAM address,
         # but instead returns the contents of an internal read buffer.
         data = self.__buffer
-        address = self.ppu.registers.ppuaddr.address
+        address = self.ppu.registers.v & 0x3FFF
 
         # Read from the address specified by PPUADDR
-        self.__buffer = self.ppu.memory.read(self.ppu.registers.ppuaddr.address)
+        self.__buffer = self.ppu.memory.read(address)
+        self.__increment_address()
 
         # If the address being read from is $3F00-$3FFF
         # we return the read value immediately
@@ -67,42 +143,102 @@ class PPUData(PPUInMemoryRegister):
 
     def on_write(self, value: int) -> None:
         # Write the value and increment the address of PPUADDR
-        self.ppu.memory.write(self.ppu.registers.ppuaddr.address, value)
+        self.ppu.memory.write(self.ppu.registers.v & 0x3FFF, value)
         self.__increment_address()
 
     def __increment_address(self) -> None:
-        # TODO
-        # PPUCTRL has a flag to increment address by 32,
-        # not yet implemented
-        address = self.ppu.registers.ppuaddr.address
-        address += 1
-        address &= 0xFFFF
-        self.ppu.registers.ppuaddr.address = address
+        registers = self.ppu.registers
+        registers.v = (registers.v + (32 if registers.ppuctrl.vram_increment else 1)) & 0x7FFF
 
 
 class VideoRegisters:
     def __init__(self, ppu: PPU) -> None:
+        self.ppu = ppu
+
+        # Internal registers shared by PPUCTRL, PPUSCROLL, PPUADDR and PPUDATA ("loopy" registers)
+        # https://www.nesdev.org/wiki/PPU_scrolling#PPU_internal_registers
+        # v: current VRAM address (15 bits); while rendering, the scroll position of the current line
+        self.v = 0
+        # t: temporary VRAM address (15 bits); the scroll position of the top left of the screen
+        self.t = 0
+        # x: fine X scroll (3 bits)
+        self.x = 0
+        # w: first or second write toggle of PPUSCROLL and PPUADDR
+        self.w = 0
+
         self.ppuctrl = PPUCtrl(ppu)
+        self.ppumask = PPUMask(ppu)
         self.ppustatus = PPUStatus(ppu)
+        self.oamaddr = OAMAddr(ppu)
+        self.oamdata = OAMData(ppu)
+        self.ppuscroll = PPUScroll(ppu)
         self.ppudata = PPUData(ppu)
         self.ppuaddr = PPUAddr(ppu)
 
+    def scroll_position(self) -> Tuple[int, int]:
+        """
+        Returns the (x, y) position, in the 512x480 plane of the 4 name tables, of the first pixel
+        drawn on the current line: X from t (reloaded at the start of every line) and Y from v.
+        """
+        t = self.t
+        v = self.v
+        x = ((t >> 10) & 1) * 256 + (t & 0x1F) * 8 + self.x
+        # NOTE: Coarse Y values of 30 and 31 (attribute data as tiles) wrap into the next name table here
+        y = ((v >> 11) & 1) * 240 + ((v >> 5) & 0x1F) * 8 + ((v >> 12) & 7)
+        return x, y % 480
+
+    def reload_scroll(self) -> None:
+        """
+        Copies t into v, as the PPU does on the pre-render line while rendering is enabled.
+        """
+        self.v = self.t
+
+    def increment_lines(self, lines: int) -> None:
+        """
+        Updates v as rendering the given amount of lines does (Y incremented, X reloaded from t).
+        """
+        y = (self.scroll_position()[1] + lines) % 480
+        name_table_y, y = divmod(y, 240)
+        self.v = (self.t & 0x041F) | ((y & 7) << 12) | (name_table_y << 11) | ((y >> 3) << 5)
+
     def read(self, address: int) -> Optional[int]:
         register = self.__get_register(address)
         if register is not None:
             return register.on_read()
 
+    def peek(self, address: int) -> Optional[int]:
+        """
+        Returns the value a read of the given register would return, for registers
+        which can be read without side effects. Returns None otherwise.
+        """
+        if address == 0x2002:
+            self.ppu.update_sprite_zero_hit()
+            return self.ppustatus.get_value()
+        if address == 0x2004:
+            return self.oamdata.on_read()
+        return None
+
     def write(self, address: int, value: int) -> None:
         register = self.__get_register(address)
         if register is not None:
+            # Draw the lines up to here as they were before this write
+            self.ppu.render_pending_lines()
             register.on_write(value)
 
     def __get_register(self, address: int) -> Optional[PPUInMemoryRegister]:
         match address:
             case 0x2000:
                 return self.ppuctrl
+            case 0x2001:
+                return self.ppumask
             case 0x2002:
                 return self.ppustatus
+            case 0x2003:
+                return self.oamaddr
+            case 0x2004:
+                return self.oamdata
+            case 0x2005:
+                return self.ppuscroll
             case 0x2006:
                 return self.ppuaddr
             case 0x2007:
@@ -0,0 +1,43 @@
+"""
+The 64 colors the NTSC PPU (2C02) can output, as 0xAARRGGBB.
+
+Colors are indexed by their 6-bit value in palette RAM. PPUMASK can additionally emphasize red, green
+and/or blue (which darkens the other channels), so every combination of those is precomputed into its
+own table: system_palettes[emphasis] holds the 64 colors as they'd be output with that emphasis.
+Greyscale only changes which color is output, so it's applied to the indices (see PPU.color_indices).
+https://www.nesdev.org/wiki/PPU_palettes
+"""
+
+import numpy as np
+
+# fmt: off
+_colors = np.array([
+    0x545454, 0x001E74, 0x081090, 0x300088, 0x440064, 0x5C0030, 0x540400, 0x3C1800,
+    0x202A00, 0x083A00, 0x004000, 0x003C00, 0x00323C, 0x000000, 0x000000, 0x000000,
+    0x989698, 0x084CC4, 0x3032EC, 0x5C1EE4, 0x8814B0, 0xA01464, 0x982220, 0x783C00,
+    0x545A00, 0x287200, 0x087C00, 0x007628, 0x006678, 0x000000, 0x000000, 0x000000,
+    0xECEEEC, 0x4C9AEC, 0x787CEC, 0xB062EC, 0xE454EC, 0xEC58B4, 0xEC6A64, 0xD48820,
+    0xA0AA00, 0x74C400, 0x4CD020, 0x38CC6C, 0x38B4CC, 0x3C3C3C, 0x000000, 0x000000,
+    0xECEEEC, 0xA8CCEC, 0xBCBCEC, 0xD4B2EC, 0xECAEEC, 0xECAED4, 0xECB4B0, 0xE4C490,
+    0xCCD278, 0xB4DE78, 0xA8E290, 0x98E2B4, 0xA0D6E4, 0xA0A2A0, 0x000000, 0x000000,
+], dtype=np.uint32)
+# fmt: on
+
+# How much emphasizing a color darkens the channels which aren't emphasized
+EMPHASIS_ATTENUATION = 0.816
+
+
+def _build_system_palettes() -> np.ndarray:
+    rgb = np.stack([(_colors >> 16) & 0xFF, (_colors >> 8) & 0xFF, _colors & 0xFF], axis=-1).astype(np.float64)
+
+    palettes = np.empty((8, 64), dtype=np.uint32)
+    for emphasis in range(8):
+        # PPUMASK emphasis bits are red, green, blue from lowest to highest
+        emphasized = np.array([(emphasis >> channel) & 1 for channel in range(3)], dtype=bool)
+        scale = np.where(emphasized | (emphasis == 0), 1.0, EMPHASIS_ATTENUATION)
+        channels = np.round(rgb * scale).astype(np.uint32)
+        palettes[emphasis] = 0xFF000000 | (channels[:, 0] << 16) | (channels[:, 1] << 8) | channels[:, 2]
+    return palettes
+
+
+system_palettes = _build_system_palettes()
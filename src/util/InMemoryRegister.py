@@ -1,18 +1,74 @@
 from __future__ import annotations
 
 from abc import ABC
-from typing import TYPE_CHECKING, List, Tuple
+from typing import TYPE_CHECKING, Dict, Optional, Union
 
 if TYPE_CHECKING:
     from src.ppu.PPU import PPU
 
 
+class BitField:
+    """
+    A field of a register, i.e. a segment of its u8 value: `size` bits starting at `start_bit`.
+    Declared on register classes (`vblank_flag = BitField(7, 1)`); reading or writing
+    the field is a single masked operation on the register's value.
+    """
+
+    __slots__ = ["name", "start_bit", "size", "_mask", "_clear_mask"]
+
+    def __init__(self, start_bit: int, size: int = 1) -> None:
+        self.name = ""
+        self.start_bit = start_bit
+        self.size = size
+        self._mask = (1 << size) - 1
+        self._clear_mask = ~(self._mask << start_bit) & 0xFF
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance: Optional[InMemoryRegister], owner: type) -> Union[int, BitField]:
+        if instance is None:
+            return self
+        return (instance._value >> self.start_bit) & self._mask
+
+    def __set__(self, instance: InMemoryRegister, value: int) -> None:
+        instance._value = ((int(value) & self._mask) << self.start_bit) | (instance._value & self._clear_mask)
+
+
+class _AddedField:
+    """
+    Class attribute standing in for a field added with InMemoryRegister.add_field, which is per instance.
+    Instances which didn't add the field see a plain attribute instead.
+    """
+
+    __slots__ = ["name"]
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance: Optional[InMemoryRegister], owner: type) -> Union[int, _AddedField]:
+        if instance is None:
+            return self
+        field = instance._fields.get(self.name)
+        if field is not None:
+            return field.__get__(instance, owner)
+        try:
+            return instance.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(f"{owner.__name__!r} object has no attribute {self.name!r}") from None
+
+    def __set__(self, instance: InMemoryRegister, value: int) -> None:
+        field = instance._fields.get(self.name)
+        if field is not None:
+            field.__set__(instance, value)
+        else:
+            instance.__dict__[self.name] = value
+
+
 class InMemoryRegister(ABC):
     def __init__(self):
         super().__init__()
 
-        self._fields: List[Tuple[str, int, int]] = []
-
         self._value = 0
 
         self.on_load()
@@ -39,10 +95,9 @@ class InMemoryRegister(ABC):
 
     def set_value(self, value: int) -> None:
         """
-        Sets the value of this register and updates its fields.
+        Sets the value of this register (and so its fields).
         """
         self._value = value
-        self.__extract_fields()
 
     def get_value(self) -> int:
         """
@@ -50,42 +105,30 @@ class InMemoryRegister(ABC):
         """
         return self._value
 
-    def __extract_field(self, name: str, start_bit: int, size: int = 1) -> None:
-        mask = ((1 << size) - 1) << start_bit
-        value = (self._value & mask) >> start_bit
-        setattr(self, name, value)
-
-    def __extract_fields(self) -> None:
-        for name, start_bit, size in self._fields:
-            self.__extract_field(name, start_bit, size)
-
     def add_field(self, name: str, start_bit: int, size: int) -> InMemoryRegister:
         """
-        Adds a read-only field to this register.
+        Adds a field to this register, for registers which don't declare their fields as BitFields.
         These fields represent certain segments of the register value.
+        The layout is kept by the instance, so other instances of the class can declare their own.
 
         Returns the InMemoryRegister instance so this can be chained.
         """
-        self._fields.append((name, start_bit, size))
-        self.__extract_field(name, start_bit, size)
+        attribute = getattr(type(self), name, None)
+        if attribute is None:
+            # The class only gets a stand-in which reads and writes the instance's field
+            setattr(type(self), name, _AddedField(name))
+        elif not isinstance(attribute, _AddedField):
+            raise ValueError(f"{type(self).__name__}.{name} is already defined")
+
+        if "_fields" not in self.__dict__:
+            self._fields = {}
+        field = BitField(start_bit, size)
+        field.__set_name__(type(self), name)
+        self._fields[name] = field
         return self
 
-    def __setattr__(self, name, value):
-        if name.startswith("_"):
-            return object.__setattr__(self, name, value)
-
-        for field_name, start_bit, size in self._fields:
-            if name == field_name:
-                value = int(value)
-                value &= (1 << size) - 1
-                value <<= start_bit
-
-                mask = (~(((1 << size) - 1) << start_bit)) & 0xFF
-                value |= self._value & mask
-                object.__setattr__(self, "_value", value)
-                object.__setattr__(self, name, value)
-                return
-        return object.__setattr__(self, name, value)
+    # Fields added with add_field, by name (per instance once one is added)
+    _fields: Dict[str, BitField] = {}
 
 
 class PPUInMemoryRegister(InMemoryRegister):
@@ -0,0 +1,33 @@
+from src.cpu import alu
+
+
+class TestALU:
+    def test_adc_sbc(self):
+        # Tables should match computing the result and flags by hand, for every input
+        for c in (0, 1):
+            for a in range(0x100):
+                for value in range(0x100):
+                    index = (c << 16) | (a << 8) | value
+
+                    result = a + value + c
+                    v = bool((result ^ a) & (result ^ value) & 0x80)
+                    assert alu.adc[index] == (result & 0xFF, result > 0xFF, v)
+
+                    result = a - value - (1 - c)
+                    v = bool((result ^ a) & (result ^ value) & 0x80)
+                    assert alu.sbc[index] == (result & 0xFF, result >= 0, v)
+
+    def test_compare(self):
+        # Compares use the ADC table with the carry set and the value inverted
+        for a in range(0x100):
+            for value in range(0x100):
+                result, c, _ = alu.adc[0x10000 | (a << 8) | (value ^ 0xFF)]
+                assert result == (a - value) & 0xFF
+                assert c is (a >= value)
+
+    def test_shifts(self):
+        for value in range(0x100):
+            assert alu.asl[value] == ((value << 1) & 0xFF, bool(value & 0x80), False)
+            assert alu.lsr[value] == (value >> 1, bool(value & 1), False)
+            assert alu.rol[value] == (((value << 1) | (value >> 7)) & 0xFF, bool(value & 0x80), False)
+            assert alu.ror[value] == ((value >> 1) | ((value & 1) << 7), bool(value & 1), False)
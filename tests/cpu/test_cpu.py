@@ -25,3 +25,25 @@ class TestCPU:
         assert cpu.cycles == 0
         assert type(getattr(cpu, "extra_cycles", None)) is int
         assert cpu.extra_cycles == 0
+
+    def test_register_file(self):
+        # Register objects should be views of the CPU's register file
+        cpu = CPU(CPUMemory())
+        for name, mask in (("a", 0xFF), ("x", 0xFF), ("y", 0xFF), ("sp", 0xFF), ("pc", 0xFFFF)):
+            register = getattr(cpu, name)
+
+            register.set_value(0x12345)
+            assert getattr(cpu, f"reg_{name}") == 0x12345 & mask
+
+            setattr(cpu, f"reg_{name}", 0x42)
+            assert register.get_value() == 0x42
+
+            register.increment()
+            assert getattr(cpu, f"reg_{name}") == 0x43
+
+        # The stack should work on the register file as well
+        cpu.reg_sp = 0xFD
+        cpu.stack.push(0x99)
+        assert cpu.sp.get_value() == 0xFC
+        assert cpu.stack.pop() == 0x99
+        assert cpu.reg_sp == 0xFD
@@ -0,0 +1,101 @@
+from src.cpu.addressing import addressing_modes
+from src.cpu.CPU import CPU
+from src.cpu.handlers import handlers
+from src.cpu.Instruction import Instruction
+from src.cpu.operations import ArgumentType, Interpreter, operations
+from src.CPUMemory import CPUMemory
+
+
+def reference_step(cpu: CPU) -> int:
+    # Executes one instruction the long way around, going through the addressing mode
+    # table and the interpreter functions directly.
+    operation = operations[cpu.memory.read(cpu.pc.get_value())]
+    cpu.pc.increment()
+
+    mode = addressing_modes[operation.addressing_mode]
+    op_input = 0
+    if mode.input_size == 1:
+        op_input = cpu.memory.read(cpu.pc.get_value())
+    elif mode.input_size == 2:
+        op_input = cpu.memory.read16(cpu.pc.get_value())
+    cpu.pc.set_value(cpu.pc.get_value() + mode.input_size)
+
+    if operation.argument_type == ArgumentType.VALUE:
+        argument = mode.get_value(cpu, op_input, operation.page_cross_penalty)
+    else:
+        argument = mode.get_address(cpu, op_input, operation.page_cross_penalty)
+
+    Interpreter.pre_operation(cpu)
+    operation.interpreter_function(Instruction(cpu, argument))
+    Interpreter.post_operation(cpu)
+
+    cycles = operation.cycles + cpu.extra_cycles
+    cpu.cycles += cycles
+    cpu.extra_cycles = 0
+    return cycles
+
+
+def new_cpu(opcode: int, seed: int) -> CPU:
+    cpu = CPU(CPUMemory())
+    # Keep bits 5-6 clear so any pointer built out of WRAM lands in either WRAM or
+    # (unmapped) cartridge space, never on the PPU/APU/controller registers
+    for i in range(0, 0x800):
+        cpu.memory.write(i, (i * 7 + seed * 13) & 0x9F)
+    cpu.memory.write(0x400, opcode)
+    cpu.pc.set_value(0x400)
+    cpu.a.set_value(seed * 37)
+    cpu.x.set_value(seed * 91)
+    cpu.y.set_value(seed * 53)
+    cpu.sp.set_value(0xFD)
+    cpu.flags.from_u8(seed * 29)
+    return cpu
+
+
+def cpu_state(cpu: CPU):
+    return (
+        cpu.pc.get_value(),
+        cpu.a.get_value(),
+        cpu.x.get_value(),
+        cpu.y.get_value(),
+        cpu.sp.get_value(),
+        cpu.flags.to_u8(),
+        cpu.cycles,
+        cpu.delayed_interrupt_flag,
+        cpu.memory.get_save_state()["wram"],
+    )
+
+
+class TestHandlers:
+    def test_handler_count(self):
+        # There should be a handler for every opcode, including undefined ones
+        assert len(handlers) == 0x100
+        assert all(callable(handler) for handler in handlers)
+
+    def test_matches_reference(self):
+        # Each handler should behave exactly like resolving the addressing mode
+        # and calling the interpreter function by hand
+        for opcode, operation in enumerate(operations):
+            if operation is None:
+                continue
+
+            for seed in range(8):
+                expected = new_cpu(opcode, seed)
+                expected_cycles = reference_step(expected)
+
+                actual = new_cpu(opcode, seed)
+                actual_cycles = actual.step()
+
+                assert actual_cycles == expected_cycles, f"Cycle mismatch for opcode {hex(opcode)}"
+                assert cpu_state(actual) == cpu_state(expected), f"State mismatch for opcode {hex(opcode)}"
+
+    def test_unknown_opcode(self):
+        # Executing an undefined opcode should raise and leave PC pointing at the opcode
+        cpu = CPU(CPUMemory())
+        cpu.memory.write(0x200, 0x02)
+        cpu.pc.set_value(0x200)
+        try:
+            cpu.step()
+            assert False, "Executing an unknown opcode should raise a RuntimeError"
+        except RuntimeError:
+            pass
+        assert cpu.pc.get_value() == 0x200
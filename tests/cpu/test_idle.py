@@ -0,0 +1,75 @@
+from src.cpu.CPU import CPU
+from src.cpu.idle import idle_loop_cycles
+from src.CPUMemory import CPUMemory
+from src.ppu.PPU import PPU
+
+
+def new_cpu(program, address: int = 0x200) -> CPU:
+    cpu = CPU(CPUMemory())
+    ppu = PPU(cpu)
+    cpu.memory.on_load(ppu=ppu)
+    for i, value in enumerate(program):
+        cpu.memory.write(address + i, value)
+    cpu.pc.set_value(address)
+    return cpu
+
+
+class TestIdleLoops:
+    def test_jump_to_self(self):
+        # JMP * is an idle loop taking 3 cycles per iteration
+        cpu = new_cpu([0x4C, 0x00, 0x02])
+        assert idle_loop_cycles(cpu) == 3
+
+        # But a jump anywhere else isn't
+        cpu = new_cpu([0x4C, 0x03, 0x02])
+        assert idle_loop_cycles(cpu) == 0
+
+    def test_wram_flag(self):
+        # loop: LDA $10 ; BEQ loop
+        cpu = new_cpu([0xA5, 0x10, 0xF0, 0xFC])
+
+        # Idle while the flag is clear (3 cycles for LDA, 3 for the taken branch)
+        cpu.memory.write(0x10, 0)
+        assert idle_loop_cycles(cpu) == 6
+
+        # But not once the loop is about to exit
+        cpu.memory.write(0x10, 1)
+        assert idle_loop_cycles(cpu) == 0
+
+        # Loops with other instructions inside aren't idle
+        # loop: INC $10 ; BNE loop
+        cpu = new_cpu([0xE6, 0x10, 0xD0, 0xFC])
+        assert idle_loop_cycles(cpu) == 0
+
+    def test_ppustatus(self):
+        # loop: BIT $2002 ; BPL loop
+        cpu = new_cpu([0x2C, 0x02, 0x20, 0x10, 0xFB])
+
+        # Idle until vblank starts
+        assert idle_loop_cycles(cpu) == 7
+
+        # Reading PPUSTATUS with the vblank flag set has side effects, so we never skip it
+        # loop: BIT $2002 ; BMI loop
+        cpu = new_cpu([0x2C, 0x02, 0x20, 0x30, 0xFB])
+        ppu = PPU(cpu)
+        cpu.memory.on_load(ppu=ppu)
+        ppu.registers.ppustatus.vblank_flag = 1
+        assert idle_loop_cycles(cpu) == 0
+
+    def test_skip(self):
+        # Skipping should credit whole iterations only, without moving PC
+        cpu = new_cpu([0xA5, 0x10, 0xF0, 0xFC])
+        assert cpu.skip_idle_loop(100) == 96
+        assert cpu.cycles == 96
+        assert cpu.pc.get_value() == 0x200
+
+        # Nothing is skipped while a change to the interrupt flag is pending
+        cpu.delayed_interrupt_flag = (0, False)
+        assert cpu.skip_idle_loop(100) == 0
+
+    def test_skip_without_budget(self):
+        # Nothing should be skipped once there's no time left before the next event (or it's already past)
+        cpu = new_cpu([0x4C, 0x00, 0x02])
+        assert cpu.skip_idle_loop(0) == 0
+        assert cpu.skip_idle_loop(-10) == 0
+        assert cpu.cycles == 0
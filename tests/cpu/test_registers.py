@@ -269,3 +269,30 @@ class TestRegisters:
             register.update_zero_and_negative(i)
             assert register.z is False
             assert register.n is True
+
+    def test_lazy_zero_and_negative(self):
+        # z/n derived from the last result should read the same as setting them directly
+        register = FlagsRegister()
+        for value in (0x00, 0x01, 0x7F, 0x80, 0xFF, 0x100, 0x180):
+            register.update_zero_and_negative(value)
+            assert register.z is ((value & 0xFF) == 0)
+            assert register.n is bool(value & 0x80)
+
+        # Setting either flag on its own shouldn't disturb the other
+        for z in (False, True):
+            for n in (False, True):
+                for value in (0x00, 0x01, 0x80):
+                    register.update_zero_and_negative(value)
+                    register.z = z
+                    register.n = n
+                    assert (register.z, register.n) == (z, n)
+
+                    register.update_zero_and_negative(value)
+                    register.n = n
+                    register.z = z
+                    assert (register.z, register.n) == (z, n)
+
+        # And should survive a round trip through to_u8/from_u8
+        for value in range(0x100):
+            register.from_u8(value)
+            assert register.to_u8() == value | 0x30
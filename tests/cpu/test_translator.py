@@ -0,0 +1,250 @@
+from src.Cartridge import Cartridge
+from src.cpu.CPU import CPU
+from src.CPUMemory import CPUMemory
+from src.interrupts import Interrupt
+from src.mappers.mappers import create_mapper
+from tests.roms import build_rom
+
+# fmt: off
+PROGRAM = bytes([
+    0xA2, 0x00,        # $8000 LDX #0
+    0xA9, 0x01,        # $8002 LDA #1
+    0x18,              # $8004 CLC
+    0x69, 0x03,        # $8005 ADC #3
+    0x95, 0x10,        # $8007 STA $10,X
+    0xB5, 0x10,        # $8009 LDA $10,X
+    0x9D, 0xF0, 0x02,  # $800B STA $02F0,X
+    0x20, 0x20, 0x80,  # $800E JSR $8020
+    0xE8,              # $8011 INX
+    0xD0, 0xF0,        # $8012 BNE $8004
+    0x58,              # $8014 CLI
+    0x78,              # $8015 SEI
+    0x4C, 0x00, 0x80,  # $8016 JMP $8000
+] + [0xEA] * (0x20 - 0x19) + [
+    0x0A,              # $8020 ASL A
+    0x6A,              # $8021 ROR A
+    0xC9, 0x10,        # $8022 CMP #$10
+    0xE6, 0x20,        # $8024 INC $20
+    0x60,              # $8026 RTS
+])
+# fmt: on
+
+
+def new_cpu(program: bytes = PROGRAM) -> CPU:
+    cartridge = Cartridge(build_rom(program))
+    cpu = CPU(CPUMemory())
+    mapper = create_mapper(cpu, None, cartridge)
+    cpu.on_load(mapper)
+    cpu.memory.on_load(mapper=mapper)
+    cpu.interrupt(Interrupt.RESET)
+    return cpu
+
+
+def cpu_state(cpu: CPU):
+    return (
+        cpu.pc.get_value(),
+        cpu.a.get_value(),
+        cpu.x.get_value(),
+        cpu.y.get_value(),
+        cpu.sp.get_value(),
+        cpu.flags.to_u8(),
+        cpu.cycles,
+        cpu.delayed_interrupt_flag,
+        cpu.memory.get_save_state()["wram"],
+        cpu.memory.get_open_bus_value(),
+    )
+
+
+class TestTranslator:
+    def test_matches_step(self):
+        # Running whole blocks should end up in the same state as stepping
+        # one instruction at a time, at the end of every block.
+        expected = new_cpu()
+        actual = new_cpu()
+
+        while actual.cycles < 20000:
+            actual.step_block()
+            while expected.cycles < actual.cycles:
+                expected.step()
+            assert cpu_state(actual) == cpu_state(expected)
+
+    def test_caches_rom_blocks(self):
+        # Blocks should be cached by entry PC, and only for PRG-ROM
+        cpu = new_cpu()
+        cpu.step_block()
+        assert 0x8000 in cpu.translator.blocks
+        # (the first block runs up to and including the JSR)
+        assert cpu.pc.get_value() == 0x8020
+
+        # Code running from WRAM should never be translated
+        cpu.memory.write(0x200, 0xE8)  # INX
+        cpu.memory.write(0x201, 0x4C)  # JMP $0200
+        cpu.memory.write(0x202, 0x00)
+        cpu.memory.write(0x203, 0x02)
+        cpu.pc.set_value(0x200)
+        cpu.step_block()
+        cpu.step_block()
+        assert all(pc >= 0x8000 for pc in cpu.translator.blocks)
+        assert cpu.pc.get_value() == 0x200
+
+        # Since WRAM code is interpreted, changes are picked up immediately
+        x = cpu.x.get_value()
+        cpu.memory.write(0x200, 0xCA)  # DEX
+        cpu.step_block()
+        assert cpu.x.get_value() == (x - 1) & 0xFF
+
+    def test_io_starts_block(self):
+        # An instruction accessing memory mapped I/O should always start its own block
+        # fmt: off
+        program = bytes([
+            0xA9, 0x80,        # $8000 LDA #$80
+            0x8D, 0x16, 0x40,  # $8002 STA $4016
+            0x4C, 0x00, 0x80,  # $8005 JMP $8000
+        ])
+        # fmt: on
+        cpu = new_cpu(program)
+        cpu.memory.on_load(mapper=cpu.translator.mapper, controllers=[None])
+        cpu.step_block()
+        assert cpu.pc.get_value() == 0x8002
+        cpu.step_block()
+        assert cpu.pc.get_value() == 0x8000
+
+    def test_bank_switch_invalidates(self):
+        # Switching banks should drop every translated block
+        cpu = new_cpu()
+        cpu.step_block()
+        assert len(cpu.translator.blocks) != 0
+        cpu.translator.mapper._on_bank_switch()
+        assert len(cpu.translator.blocks) == 0
+
+    def test_partial_bank_switch(self):
+        # Switching one PRG window should only drop the blocks with code in it
+        # fmt: off
+        program = bytes([
+            0x4C, 0xFE, 0x9F,  # $8000 JMP $9FFE
+        ] + [0xEA] * (0x1FFE - 3) + [
+            0xEA,              # $9FFE NOP
+            0xEA,              # $9FFF NOP
+            0x4C, 0x00, 0xC0,  # $A000 JMP $C000
+        ] + [0xEA] * (0x4000 - 0x2003) + [
+            0x4C, 0x00, 0x80,  # $C000 JMP $8000
+        ])
+        # fmt: on
+        cpu = new_cpu(program)
+        for _ in range(3):
+            cpu.step_block()
+        translator = cpu.translator
+        assert sorted(translator.blocks) == [0x8000, 0x9FFE, 0xC000]
+
+        translator.invalidate(0xC000, 0xDFFF)
+        assert sorted(translator.blocks) == [0x8000, 0x9FFE]
+        # The block at $9FFE runs into $A000
+        translator.invalidate(0xA000, 0xBFFF)
+        assert sorted(translator.blocks) == [0x8000]
+        # Switching PRG-RAM doesn't affect any blocks
+        translator.invalidate(0x6000, 0x7FFF)
+        assert sorted(translator.blocks) == [0x8000]
+
+    def test_indirect_access(self):
+        # Accesses through a pointer could go anywhere, so an indirect read should start a new block
+        # and an indirect write should be a block of its own
+        # fmt: off
+        program = bytes([
+            0xA0, 0x00,        # $8000 LDY #0
+            0xB1, 0x10,        # $8002 LDA ($10),Y
+            0xA2, 0x00,        # $8004 LDX #0
+            0x81, 0x12,        # $8006 STA ($12,X)
+            0xE8,              # $8008 INX
+            0x4C, 0x00, 0x80,  # $8009 JMP $8000
+        ])
+        # fmt: on
+        cpu = new_cpu(program)
+        cpu.memory.write(0x11, 0x20)
+        for pc in (0x8002, 0x8006, 0x8008, 0x8000):
+            cpu.step_block()
+            assert cpu.pc.get_value() == pc
+
+    def test_open_bus(self):
+        # Reading unmapped memory should see the last byte fetched, same as when stepping
+        # fmt: off
+        program = bytes([
+            0xA9, 0x12,        # $8000 LDA #$12
+            0xAD, 0x00, 0x50,  # $8002 LDA $5000
+            0x85, 0x00,        # $8005 STA $00
+            0xA9, 0x50,        # $8007 LDA #$50
+            0x85, 0x21,        # $8009 STA $21
+            0xA0, 0x34,        # $800B LDY #$34
+            0xB1, 0x20,        # $800D LDA ($20),Y
+            0x85, 0x01,        # $800F STA $01
+            0x4C, 0x11, 0x80,  # $8011 JMP $8011
+        ])
+        # fmt: on
+        expected = new_cpu(program)
+        actual = new_cpu(program)
+        while actual.cycles < 100:
+            actual.step_block()
+            while expected.cycles < actual.cycles:
+                expected.step()
+        assert cpu_state(actual) == cpu_state(expected)
+        assert actual.memory.read(0x00) == 0x50
+        assert actual.memory.read(0x01) == 0x50
+
+    def test_cartridge_write_starts_block(self):
+        # Mapper registers should see the same cycle count as when stepping, e.g. to catch the PPU up
+        # fmt: off
+        program = bytes([
+            0xA9, 0x01,        # $8000 LDA #1
+        ] + [0xEA] * 20 + [    # $8002 NOP (x20)
+            0x8D, 0x00, 0x80,  # $8016 STA $8000 (CNROM bank select)
+            0x4C, 0x19, 0x80,  # $8019 JMP $8019
+        ])
+        # fmt: on
+        cycles = []
+        for run in (CPU.step, CPU.step_block):
+            cartridge = Cartridge(build_rom(program, mapper_id=3))
+            cpu = CPU(CPUMemory())
+            mapper = create_mapper(cpu, None, cartridge)
+            cpu.on_load(mapper)
+            cpu.memory.on_load(mapper=mapper)
+            cpu.interrupt(Interrupt.RESET)
+
+            seen = []
+            cpu_write = mapper.cpu_write
+            mapper.cpu_write = lambda address, value: seen.append(cpu.cycles) or cpu_write(address, value)
+            # Map the pages again, so they write through the wrapper
+            cpu.memory.on_load(mapper=mapper)
+            while not seen:
+                run(cpu)
+            cycles.append(seen[0])
+        assert cycles[0] == cycles[1] == 7 + 2 + 20 * 2
+
+    def test_read_hooks(self):
+        # Code on a page with read hooks should be read through them, even after it's been translated
+        # fmt: off
+        program = bytes([
+            0xA9, 0x05,        # $8000 LDA #5
+            0x85, 0x10,        # $8002 STA $10
+            0x4C, 0x00, 0x80,  # $8005 JMP $8000
+        ])
+        # fmt: on
+        cpu = new_cpu(program)
+        cpu.step_block()
+        assert cpu.memory.read(0x10) == 0x05
+        assert 0x8000 in cpu.translator.blocks
+
+        def patch(address: int, value: int) -> int:
+            return 0x63 if address == 0x8001 else value
+
+        cpu.memory.add_read_hook(0x80, patch)
+        assert 0x8000 not in cpu.translator.blocks
+        cpu.step_block()
+        cpu.step_block()
+        assert cpu.pc.get_value() == 0x8004
+        assert cpu.memory.read(0x10) == 0x63
+
+        # Removing the hook lets the code be translated again
+        cpu.memory.remove_read_hook(0x80, patch)
+        cpu.pc.set_value(0x8000)
+        cpu.step_block()
+        assert cpu.memory.read(0x10) == 0x05
+        assert cpu.pc.get_value() == 0x8000
@@ -0,0 +1,79 @@
+import io
+
+from src.NES import NES
+from tests.roms import build_rom
+
+
+def new_nes(mapper_id: int, prg_pages: int, chr_pages: int) -> NES:
+    # Every byte of PRG-ROM holds the number of the 16 KiB it's in, and of CHR-ROM the number of the 8 KiB
+    program = bytes((i >> 14) & 0xFF for i in range(0x4000 * prg_pages - 6))
+    chr_data = bytes((i >> 13) & 0xFF for i in range(0x2000 * chr_pages))
+    rom = build_rom(program, mapper_id=mapper_id, prg_pages=prg_pages, chr_pages=chr_pages, chr_data=chr_data)
+    nes = NES()
+    nes.load_cartridge(io.BytesIO(rom))
+    return nes
+
+
+def banks(nes: NES):
+    # The PRG-ROM banks at $8000 and $C000, and the CHR bank at $0000
+    return nes.cpu.memory.read(0x8000), nes.cpu.memory.read(0xC000), nes.ppu.memory.read(0x0000)
+
+
+class TestUxROM:
+    def test_banks(self):
+        nes = new_nes(2, 8, 0)
+        assert banks(nes) == (0, 7, 0)
+        nes.cpu.memory.write(0x8000, 5)
+        assert banks(nes) == (5, 7, 0)
+        nes.cpu.memory.write(0xFFFF, 9)
+        assert banks(nes) == (1, 7, 0)
+
+    def test_chr_ram(self):
+        nes = new_nes(2, 8, 0)
+        nes.ppu.memory.write(0x1234, 0x42)
+        assert nes.ppu.memory.read(0x1234) == 0x42
+
+
+class TestCNROM:
+    def test_banks(self):
+        nes = new_nes(3, 2, 4)
+        assert banks(nes) == (0, 1, 0)
+        nes.cpu.memory.write(0x8000, 3)
+        assert banks(nes) == (0, 1, 3)
+        assert nes.ppu.patterns.pattern_table(0)[1][0] == 3 * 0x2000 // 16
+
+        # CHR-ROM isn't writeable
+        nes.ppu.memory.write(0x0000, 0x42)
+        assert nes.ppu.memory.read(0x0000) == 3
+
+
+class TestAxROM:
+    def test_banks(self):
+        nes = new_nes(7, 8, 0)
+        assert banks(nes) == (0, 1, 0)
+        nes.cpu.memory.write(0x8000, 3)
+        assert banks(nes) == (6, 7, 0)
+
+    def test_mirroring(self):
+        # Bit 4 selects which 1 KiB of VRAM all name tables are
+        nes = new_nes(7, 8, 0)
+        nes.cpu.memory.write(0x8000, 0x10)
+        assert [nes.ppu.memory.name_table_bank(i) for i in range(4)] == [1, 1, 1, 1]
+        nes.cpu.memory.write(0x8000, 0x00)
+        assert [nes.ppu.memory.name_table_bank(i) for i in range(4)] == [0, 0, 0, 0]
+
+
+class TestColorDreams:
+    def test_banks(self):
+        nes = new_nes(11, 8, 16)
+        assert banks(nes) == (0, 1, 0)
+        nes.cpu.memory.write(0x8000, 0xA2)
+        assert banks(nes) == (4, 5, 10)
+
+
+class TestGxROM:
+    def test_banks(self):
+        nes = new_nes(66, 8, 4)
+        assert banks(nes) == (0, 1, 0)
+        nes.cpu.memory.write(0x8000, 0x32)
+        assert banks(nes) == (6, 7, 2)
@@ -0,0 +1,65 @@
+from src.Cartridge import Cartridge
+from src.cpu.CPU import CPU
+from src.CPUMemory import CPUMemory
+from src.mappers.mappers import create_mapper
+from tests.roms import build_rom
+
+
+def new_mapper(prg_pages: int = 4, chr_pages: int = 2):
+    # Every byte of PRG-ROM/CHR-ROM holds the number of the 1 KiB it's in
+    program = bytes((i >> 10) & 0xFF for i in range(0x4000 * prg_pages - 6))
+    chr_data = bytes((i >> 10) & 0xFF for i in range(0x2000 * chr_pages))
+    cartridge = Cartridge(build_rom(program, prg_pages=prg_pages, chr_pages=chr_pages, chr_data=chr_data))
+    memory = CPUMemory()
+    mapper = create_mapper(CPU(memory), None, cartridge)
+    memory.on_load(mapper=mapper)
+    return memory, mapper
+
+
+class TestBanks:
+    def test_default(self):
+        # Without switching, the first and last 16 KiB of PRG-ROM and the first 8 KiB of CHR are mapped
+        memory, mapper = new_mapper()
+        assert memory.read(0x8000) == 0
+        assert memory.read(0xBC00) == 15
+        assert memory.read(0xC000) == 48
+        assert memory.read(0xF000) == 60
+        assert [mapper.ppu_read(address) for address in range(0, 0x2000, 0x400)] == list(range(8))
+
+    def test_map_prg(self):
+        # Mapping a bank should repoint CPU reads (and direct page reads) at it, with banks wrapping around
+        memory, mapper = new_mapper()
+        switches = []
+        mapper.add_bank_switch_callback(lambda first, last: switches.append((first, last)))
+        mapper._map_prg(0x8000, 1, 0x2000)
+        mapper._map_prg(0xA000, -3, 0x2000)
+        mapper._map_prg(0xC000, 5, 0x4000)
+        assert memory.read(0x8000) == 8
+        assert memory.read(0xA000) == 40
+        assert memory.read(0xC400) == 17
+        assert mapper.cpu_read(0xE000) == 24
+        # Callbacks are told which addresses changed
+        assert switches == [(0x8000, 0x9FFF), (0xA000, 0xBFFF), (0xC000, 0xFFFF)]
+
+        # Mapping what's already there isn't a bank switch
+        mapper._map_prg(0xC000, 1, 0x4000)
+        assert len(switches) == 3
+
+    def test_map_chr(self):
+        # CHR banks should be readable through ppu_read, and tell the pattern cache where they are
+        _, mapper = new_mapper()
+        mapper._map_chr(0x0000, 3, 0x1000)
+        mapper._map_chr(0x1C00, 1, 0x400)
+        assert mapper.ppu_read(0x0000) == 12
+        assert mapper.ppu_read(0x0FFF) == 15
+        assert mapper.ppu_read(0x1C00) == 1
+        assert mapper.ppu_chr_bank(1) == (1, 0x1400)
+        assert mapper.ppu_chr_bank(7) == (0, 0x400)
+
+    def test_no_copies(self):
+        # Pages and banks should be views of the same memory
+        memory, mapper = new_mapper()
+        mapper.get_prg_page(0)[0x2000] = 0x42
+        mapper._map_prg(0xE000, 1, 0x2000)
+        assert memory.read(0xE000) == 0x42
+        assert mapper.prg_memory()[0x2000] == 0x42
@@ -0,0 +1,106 @@
+import io
+
+from src.NES import NES
+from tests.roms import build_rom
+
+
+def new_nes(prg_pages: int = 8, chr_pages: int = 4) -> NES:
+    # Every byte of PRG-ROM/CHR-ROM holds the number of the 4 KiB it's in
+    program = bytes((i >> 12) & 0xFF for i in range(0x4000 * prg_pages - 6))
+    chr_data = bytes((i >> 12) & 0xFF for i in range(0x2000 * chr_pages))
+    rom = build_rom(program, reset=0xFFF0, mapper_id=1, prg_pages=prg_pages, chr_pages=chr_pages, chr_data=chr_data)
+    nes = NES()
+    nes.load_cartridge(io.BytesIO(rom))
+    return nes
+
+
+def write_register(nes: NES, address: int, value: int) -> None:
+    # Registers are written a bit at a time, through bit 0 of 5 writes
+    for i in range(5):
+        nes.cpu.memory.write(address, (value >> i) & 1)
+
+
+def prg_bank(nes: NES, address: int) -> int:
+    # Which 16 KiB of PRG-ROM is mapped at the given address
+    return nes.cpu.memory.read(address) >> 2
+
+
+class TestMMC1:
+    def test_power_on(self):
+        # The last PRG-ROM bank should be fixed at $C000, so the reset vector can be found
+        nes = new_nes()
+        assert prg_bank(nes, 0x8000) == 0
+        assert prg_bank(nes, 0xC000) == 7
+
+    def test_prg_modes(self):
+        nes = new_nes()
+        write_register(nes, 0xE000, 3)
+        assert prg_bank(nes, 0x8000) == 3
+        assert prg_bank(nes, 0xC000) == 7
+
+        # Fix the first bank at $8000 and switch $C000
+        write_register(nes, 0x8000, 0x08)
+        assert prg_bank(nes, 0x8000) == 0
+        assert prg_bank(nes, 0xC000) == 3
+
+        # Switch 32 KiB, ignoring the low bit
+        write_register(nes, 0x8000, 0x00)
+        assert prg_bank(nes, 0x8000) == 2
+        assert prg_bank(nes, 0xC000) == 3
+        assert nes.cpu.memory.read(0xF000) == 15
+
+    def test_reset(self):
+        # Writing bit 7 should clear the shift register and go back to PRG-ROM bank mode 3
+        nes = new_nes()
+        write_register(nes, 0x8000, 0x00)
+        nes.cpu.memory.write(0xE000, 1)
+        nes.cpu.memory.write(0xE000, 0x80)
+        write_register(nes, 0xE000, 2)
+        assert prg_bank(nes, 0x8000) == 2
+        assert prg_bank(nes, 0xC000) == 7
+
+    def test_chr_modes(self):
+        nes = new_nes()
+        memory = nes.ppu.memory
+        write_register(nes, 0xA000, 3)
+        assert memory.read(0x0000) == 2
+        assert memory.read(0x1000) == 3
+
+        # Two separate 4 KiB banks
+        write_register(nes, 0x8000, 0x10)
+        write_register(nes, 0xC000, 6)
+        assert memory.read(0x0000) == 3
+        assert memory.read(0x1FFF) == 6
+        assert nes.ppu.patterns.pattern_table(1)[1][0] == 6 * 0x1000 // 16
+
+    def test_mirroring(self):
+        nes = new_nes()
+        memory = nes.ppu.memory
+        for control, banks in ((0, [0, 0, 0, 0]), (1, [1, 1, 1, 1]), (2, [0, 1, 0, 1]), (3, [0, 0, 1, 1])):
+            write_register(nes, 0x8000, control)
+            assert [memory.name_table_bank(i) for i in range(4)] == banks
+
+    def test_prg_ram(self):
+        # PRG-RAM should be readable and writable, unless disabled through bit 4 of the PRG bank
+        nes = new_nes()
+        memory = nes.cpu.memory
+        memory.write(0x6000, 0x42)
+        memory.write(0x7FFF, 0x43)
+        assert memory.read(0x6000) == 0x42
+        assert memory.read(0x7FFF) == 0x43
+
+        write_register(nes, 0xE000, 0x10)
+        memory.write(0x6000, 0x99)
+        assert memory.read(0x6000) != 0x42
+
+        write_register(nes, 0xE000, 0x00)
+        assert memory.read(0x6000) == 0x42
+
+    def test_surom(self):
+        # On 512 KiB boards, bit 4 of CHR bank 0 selects the outer 256 KiB of PRG-ROM
+        nes = new_nes(prg_pages=32, chr_pages=0)
+        assert prg_bank(nes, 0xC000) == 15
+        write_register(nes, 0xA000, 0x10)
+        write_register(nes, 0xE000, 2)
+        assert prg_bank(nes, 0x8000) == 18
+        assert prg_bank(nes, 0xC000) == 31
@@ -0,0 +1,112 @@
+import io
+
+from src.NES import NES
+from tests.roms import build_rom
+
+# fmt: off
+IRQ_PROGRAM = bytes([
+    0xA9, 0x09,        # 8000 LDA #$09
+    0x8D, 0x00, 0xC0,  # 8002 STA $C000 (IRQ latch)
+    0x8D, 0x01, 0xC0,  # 8005 STA $C001 (IRQ reload)
+    0x8D, 0x01, 0xE0,  # 8008 STA $E001 (IRQ enable)
+    0xA9, 0x18,        # 800B LDA #$18
+    0x8D, 0x01, 0x20,  # 800D STA $2001 (show background and sprites)
+    0x58,              # 8010 CLI
+    0x4C, 0x11, 0x80,  # 8011 JMP $8011
+    # IRQ handler
+    0x8D, 0x00, 0xE0,  # 8014 STA $E000 (acknowledge)
+    0x8D, 0x01, 0xE0,  # 8017 STA $E001 (IRQ enable)
+    0xE6, 0x00,        # 801A INC $00
+    0x40,              # 801C RTI
+])
+# fmt: on
+IRQ_HANDLER = 0x8014
+
+
+def new_nes(program: bytes = bytes(), prg_pages: int = 4, chr_pages: int = 4, irq: int = 0x8000) -> NES:
+    # Every byte of CHR-ROM holds the number of the 1 KiB it's in; the rest of PRG-ROM the number of its 8 KiB
+    prg = bytearray((i >> 13) & 0xFF for i in range(0x4000 * prg_pages - 6))
+    prg[: len(program)] = program
+    chr_data = bytes((i >> 10) & 0xFF for i in range(0x2000 * chr_pages))
+    rom = bytearray(build_rom(bytes(prg), mapper_id=4, prg_pages=prg_pages, chr_pages=chr_pages, chr_data=chr_data))
+    # Only the last bank is fixed, so reset there and jump to the program
+    end = 16 + 0x4000 * prg_pages
+    rom[end - 4 : end] = bytes([0x00, 0xE0, irq & 0xFF, irq >> 8])
+    rom[end - 0x2000 : end - 0x2000 + 3] = bytes([0x4C, 0x00, 0x80])
+    nes = NES()
+    nes.load_cartridge(io.BytesIO(bytes(rom)))
+    return nes
+
+
+class TestMMC3:
+    def test_prg_banks(self):
+        nes = new_nes()
+        memory = nes.cpu.memory
+        assert [memory.read(address) for address in (0x8100, 0xA000, 0xC000, 0xE100)] == [0, 1, 6, 7]
+
+        memory.write(0x8000, 6)
+        memory.write(0x8001, 3)
+        memory.write(0x8000, 7)
+        memory.write(0x8001, 2)
+        assert [memory.read(address) for address in (0x8100, 0xA000, 0xC000, 0xE100)] == [3, 2, 6, 7]
+
+        # Swap $8000 and $C000
+        memory.write(0x8000, 0x40)
+        assert [memory.read(address) for address in (0x8100, 0xA000, 0xC000, 0xE100)] == [6, 2, 3, 7]
+
+    def test_chr_banks(self):
+        nes = new_nes()
+        cpu_memory = nes.cpu.memory
+        memory = nes.ppu.memory
+        for register, bank in enumerate([5, 10, 20, 21, 22, 23]):
+            cpu_memory.write(0x8000, register)
+            cpu_memory.write(0x8001, bank)
+        assert [memory.read(address) for address in range(0, 0x2000, 0x400)] == [4, 5, 10, 11, 20, 21, 22, 23]
+
+        # Swap the 2 KiB and 1 KiB banks between pattern tables
+        cpu_memory.write(0x8000, 0x80)
+        assert [memory.read(address) for address in range(0, 0x2000, 0x400)] == [20, 21, 22, 23, 4, 5, 10, 11]
+
+    def test_mirroring(self):
+        nes = new_nes()
+        nes.cpu.memory.write(0xA000, 0)
+        assert [nes.ppu.memory.name_table_bank(i) for i in range(4)] == [0, 1, 0, 1]
+        nes.cpu.memory.write(0xA000, 1)
+        assert [nes.ppu.memory.name_table_bank(i) for i in range(4)] == [0, 0, 1, 1]
+
+    def test_scanline_irq(self):
+        # With a latch of 9, an IRQ should happen every 10th rendering scanline (counting the pre-render line)
+        nes = new_nes(IRQ_PROGRAM, irq=IRQ_HANDLER)
+        mapper = nes.ppu.mapper
+        cpu_write = mapper.cpu_write
+        scanlines = []
+
+        def acknowledge(address: int, value: int) -> None:
+            # The handler acknowledges the IRQ (catching the PPU up) straight away
+            cpu_write(address, value)
+            if address == 0xE000:
+                scanlines.append((nes.ppu.frame, nes.ppu.scanline))
+
+        mapper.cpu_write = acknowledge
+        mapper._on_bank_switch()
+        nes.run_frames(1)
+        nes.run_cycles(1500)
+
+        assert scanlines[:3] == [(0, 8), (0, 18), (0, 28)]
+        assert scanlines[23] == (0, 238)
+        # The counter carries on from the last visible line into the next frame's pre-render line
+        assert scanlines[24] == (1, 7)
+        assert nes.cpu.memory.read(0x00) == 25
+
+    def test_irq_disabled(self):
+        # No IRQs without rendering, or once disabled
+        nes = new_nes(IRQ_PROGRAM[:11] + bytes([0x58, 0x4C, 0x0C, 0x80]), irq=IRQ_HANDLER)
+        nes.run_frames(2)
+        assert nes.cpu.memory.read(0x00) == 0
+
+        nes = new_nes(IRQ_PROGRAM, irq=IRQ_HANDLER)
+        nes.run_frames(1)
+        nes.cpu.memory.write(0xE000, 0)
+        count = nes.cpu.memory.read(0x00)
+        nes.run_frames(1)
+        assert nes.cpu.memory.read(0x00) == count
@@ -0,0 +1,38 @@
+from src.Cartridge import Cartridge
+from src.cpu.CPU import CPU
+from src.CPUMemory import CPUMemory
+from src.mappers.mappers import create_mapper
+from tests.roms import build_rom
+
+
+def new_mapper(prg_pages: int, prg_ram_shift: int = 0):
+    program = bytes((i >> 8) & 0xFF for i in range(0x4000 * prg_pages - 6))
+    rom = bytearray(build_rom(program, prg_pages=prg_pages))
+    if prg_ram_shift:
+        # NES 2.0 header with the given PRG-RAM size
+        rom[7] |= 0x08
+        rom[10] = prg_ram_shift
+    memory = CPUMemory()
+    mapper = create_mapper(CPU(memory), None, Cartridge(bytes(rom)))
+    memory.on_load(mapper=mapper)
+    return memory, mapper
+
+
+class TestNROM:
+    def test_prg_image(self):
+        # The image should be the 32 KiB at $8000-$FFFF, with NROM-128 mirrored
+        for prg_pages in (1, 2):
+            memory, mapper = new_mapper(prg_pages)
+            image = mapper.prg_image()
+            assert len(image) == 0x8000
+            assert image.tobytes() == bytes(memory.read(address) for address in range(0x8000, 0x10000))
+        assert image[0x4000] != image[0]
+
+    def test_prg_ram_mirroring(self):
+        # PRG-RAM smaller than 8 KiB should be mirrored across $6000-$7FFF
+        memory, mapper = new_mapper(1, prg_ram_shift=5)
+        memory.write(0x6001, 0x42)
+        assert [memory.read(address) for address in (0x6001, 0x6801, 0x7001, 0x7801)] == [0x42] * 4
+        memory.write(0x7FFF, 0x43)
+        assert memory.read(0x67FF) == 0x43
+        assert mapper.cpu_read(0x6FFF) == 0x43
@@ -0,0 +1,245 @@
+import random
+
+import numpy as np
+
+from src.Cartridge import Cartridge
+from src.cpu.CPU import CPU
+from src.CPUMemory import CPUMemory
+from src.mappers.mappers import create_mapper
+from src.ppu.palette import system_palettes
+from src.ppu.PPU import LINE_DOTS, PPU
+from tests.roms import build_rom
+
+
+def new_ppu(seed: int) -> PPU:
+    rng = random.Random(seed)
+    chr_data = bytes(rng.randrange(0x100) for _ in range(0x2000))
+    cartridge = Cartridge(build_rom(bytes(), chr_data=chr_data))
+    cpu = CPU(CPUMemory())
+    ppu = PPU(cpu)
+    ppu.on_load(cartridge, create_mapper(cpu, ppu, cartridge))
+
+    for address in range(0x2000, 0x3000):
+        ppu.memory.write(address, rng.randrange(0x100))
+    for address in range(0x3F00, 0x3F20):
+        ppu.memory.write(address, rng.randrange(0x40))
+    # Show the background (name table 1, unscrolled)
+    ppu.registers.write(0x2000, 0x01)
+    ppu.registers.write(0x2001, 0x0A)
+    return ppu
+
+
+def reference_pixel(ppu: PPU, x: int, y: int, name_table: int = 0x2400) -> int:
+    # Looks up the color of a background pixel one step at a time
+    tile_id = ppu.memory.read(name_table + (y >> 3) * 32 + (x >> 3))
+    low = ppu.memory.read(tile_id * 16 + (y & 7))
+    high = ppu.memory.read(tile_id * 16 + (y & 7) + 8)
+    bit = 7 - (x & 7)
+    color_index = (((high >> bit) & 1) << 1) | ((low >> bit) & 1)
+    attribute = ppu.memory.read(name_table + 960 + (y >> 5) * 8 + (x >> 5))
+    palette = (attribute >> (((y >> 4) & 1) * 4 + ((x >> 4) & 1) * 2)) & 3
+    color = ppu.memory.read(0x3F00 + (palette << 2) + color_index) if color_index else ppu.memory.read(0x3F00)
+    return color
+
+
+def reference_scrolled_pixel(ppu: PPU, x: int, y: int) -> int:
+    # Looks up the color at the given position in the 512x480 plane of name tables
+    x %= 512
+    y %= 480
+    name_table = 0x2000 + (y // 240) * 0x800 + (x // 256) * 0x400
+    return reference_pixel(ppu, x % 256, y % 240, name_table)
+
+
+class TestBackgroundRenderer:
+    def test_matches_reference(self):
+        # Rendering should produce the same pixels as decoding them one by one
+        for seed in range(2):
+            ppu = new_ppu(seed)
+            ppu.background_renderer.render_lines(0, 240)
+            for y in (0, 1, 7, 8, 100, 239):
+                for x in range(256):
+                    assert ppu.frame_buffer[y][x] == reference_pixel(ppu, x, y)
+
+    def test_lines(self):
+        # Rendering some of the lines should only draw those
+        ppu = new_ppu(0)
+        ppu.frame_buffer[:] = 0
+        ppu.background_renderer.render_lines(8, 17)
+        for y in (7, 8, 16, 17):
+            expected = [reference_pixel(ppu, x, y) if 8 <= y < 17 else 0 for x in range(256)]
+            assert list(ppu.frame_buffer[y]) == expected
+
+
+class TestScrolling:
+    def test_registers(self):
+        # Writes should update the internal registers as described in
+        # https://www.nesdev.org/wiki/PPU_scrolling#Summary
+        registers = new_ppu(0).registers
+        registers.write(0x2000, 0x00)
+        registers.read(0x2002)
+        assert registers.w == 0
+        registers.write(0x2005, 0x7D)
+        assert (registers.t, registers.x, registers.w) == (0x000F, 0x05, 1)
+        registers.write(0x2005, 0x5E)
+        assert (registers.t, registers.x, registers.w) == (0x616F, 0x05, 0)
+        registers.write(0x2006, 0x3D)
+        assert (registers.t, registers.w) == (0x3D6F, 1)
+        registers.write(0x2006, 0xF0)
+        assert (registers.t, registers.v, registers.w) == (0x3DF0, 0x3DF0, 0)
+
+        registers.write(0x2000, 0x02)
+        assert registers.t == 0x39F0
+
+    def test_vram_increment(self):
+        # PPUDATA accesses should move the address along by 1, or 32 (a column of tiles)
+        ppu = new_ppu(0)
+        registers = ppu.registers
+        skipped = ppu.memory.read(0x2022)
+        registers.write(0x2006, 0x20)
+        registers.write(0x2006, 0x00)
+        registers.write(0x2007, 0x11)
+        registers.write(0x2007, 0x22)
+        registers.write(0x2000, 0x04)
+        registers.write(0x2007, 0x33)
+        assert [ppu.memory.read(address) for address in (0x2000, 0x2001, 0x2002, 0x2022)] == [0x11, 0x22, 0x33, skipped]
+        assert registers.v == 0x2022
+
+    def test_scrolled(self):
+        # Lines should be drawn from the scroll position on, wrapping around the name tables
+        ppu = new_ppu(0)
+        ppu.registers.write(0x2000, 0x03)
+        ppu.registers.write(0x2005, 200)
+        ppu.registers.write(0x2005, 21)
+        ppu.advance(LINE_DOTS * 242, lambda _: None, lambda _: None)
+
+        for y in (0, 7, 100, 218, 219, 239):
+            for x in range(0, 256, 3):
+                assert ppu.frame_buffer[y][x] == reference_scrolled_pixel(ppu, 256 + 200 + x, 240 + 21 + y)
+
+    def test_split(self):
+        # Changing the X scroll mid-frame should only affect the lines after the change,
+        # while the Y scroll continues as before
+        ppu = new_ppu(1)
+        ppu.registers.write(0x2000, 0x00)
+        ppu.registers.write(0x2005, 13)
+        ppu.registers.write(0x2005, 21)
+        ppu.advance(LINE_DOTS * 101 + 300, lambda _: None, lambda _: None)
+        ppu.registers.write(0x2005, 77)
+        ppu.registers.write(0x2005, 0)
+        ppu.advance(LINE_DOTS * 141, lambda _: None, lambda _: None)
+
+        for y in (0, 50, 100, 101, 102, 239):
+            scroll_x = 13 if y <= 100 else 77
+            for x in range(0, 256, 3):
+                assert ppu.frame_buffer[y][x] == reference_scrolled_pixel(ppu, scroll_x + x, 21 + y)
+
+
+class TestDirtyTiles:
+    def test_tracks_writes(self):
+        # Writing tile IDs should mark that tile, and attributes their 4x4 tile area
+        ppu = new_ppu(0)
+        dirty = ppu.memory.dirty_tiles(ppu.memory.name_table_bank(1))
+        dirty[:] = False
+
+        ppu.memory.write(0x2400 + 3 * 32 + 5, 1)
+        assert list(zip(*dirty.nonzero())) == [(3, 5)]
+
+        dirty[:] = False
+        ppu.memory.write(0x2400 + 960 + 7 * 8 + 1, 1)
+        assert list(zip(*dirty.nonzero())) == [(28, 4), (28, 5), (28, 6), (28, 7), (29, 4), (29, 5), (29, 6), (29, 7)]
+
+    def test_redraws_changes(self):
+        # Changing tiles and attributes between frames should be reflected in what's drawn
+        ppu = new_ppu(1)
+        renderer = ppu.background_renderer
+        renderer.render_lines(0, 240)
+
+        ppu.memory.write(0x2400 + 2 * 32 + 9, 0x42)
+        ppu.memory.write(0x2400 + 960, 0x1B)
+        renderer.render_lines(0, 240)
+
+        for y in (0, 8, 16, 20, 31):
+            for x in range(256):
+                assert ppu.frame_buffer[y][x] == reference_pixel(ppu, x, y)
+
+
+class TestPalette:
+    def test_palette_ram(self):
+        # Palette RAM should be mirrored every 32 bytes, with $3F1x's first colors being $3F0x's
+        ppu = new_ppu(0)
+        ppu.memory.write(0x3F01, 0x12)
+        assert ppu.memory.read(0x3F21) == 0x12
+        assert ppu.memory.read(0x3FE1) == 0x12
+
+        ppu.memory.write(0x3F10, 0x05)
+        assert ppu.memory.read(0x3F00) == 0x05
+        ppu.memory.write(0x3F0C, 0x06)
+        assert ppu.memory.read(0x3F1C) == 0x06
+        ppu.memory.write(0x3F11, 0x07)
+        assert ppu.memory.read(0x3F01) == 0x12
+
+    def test_mask(self):
+        # Greyscale and emphasis from PPUMASK should be applied to the colors
+        ppu = new_ppu(0)
+        ppu.memory.write(0x3F00, 0x21)
+        ppu.memory.write(0x3F01, 0x16)
+        assert ppu.color_indices()[0] == ppu.color_indices()[4] == 0x21
+        assert system_palettes[0][0x21] == 0xFF4C9AEC
+        assert ppu.color_indices()[1] == 0x16
+
+        # Greyscale keeps only the column $x0 of each color
+        ppu.registers.write(0x2001, 0x01)
+        assert ppu.color_indices()[0] == 0x20
+        assert ppu.color_indices()[1] == 0x10
+
+        # Emphasizing red darkens green and blue
+        ppu.registers.write(0x2001, 0x20)
+        color = system_palettes[ppu.registers.ppumask.emphasis][ppu.color_indices()[0]]
+        assert (color >> 16) & 0xFF == 0x4C
+        assert (color >> 8) & 0xFF < 0x9A
+        assert color & 0xFF < 0xEC
+
+
+class TestFrameExporter:
+    def test_layouts(self):
+        # Every layout should show the same colors, using the emphasis each line was drawn with
+        ppu = new_ppu(0)
+        ppu.background_renderer.render_lines(0, 100)
+        ppu.registers.write(0x2001, 0x4A)
+        ppu.background_renderer.render_lines(100, 240)
+        exporter = ppu.exporter
+
+        argb = exporter.argb()
+        assert argb.shape == (240, 256)
+        assert (argb[:100] == system_palettes[0][ppu.frame_buffer[:100]]).all()
+        assert (argb[100:] == system_palettes[2][ppu.frame_buffer[100:]]).all()
+
+        rgba = exporter.rgba()
+        assert rgba.shape == (240, 256, 4)
+        assert (rgba[..., 0] == (argb >> 16) & 0xFF).all()
+        assert (rgba[..., 1] == (argb >> 8) & 0xFF).all()
+        assert (rgba[..., 2] == argb & 0xFF).all()
+        assert (rgba[..., 3] == 0xFF).all()
+
+        rgb = exporter.rgb()
+        assert rgb.shape == (240, 256, 3)
+        assert (rgb == rgba[..., :3]).all()
+        assert memoryview(rgb).tobytes() == rgba[..., :3].tobytes()
+
+        grey = exporter.grey()
+        assert grey.shape == (240, 256)
+        assert grey[0, 0] == round(0.299 * rgb[0, 0, 0] + 0.587 * rgb[0, 0, 1] + 0.114 * rgb[0, 0, 2])
+
+    def test_preallocated(self):
+        # Frames should be written into the same buffers every time, or into the ones given
+        ppu = new_ppu(0)
+        exporter = ppu.exporter
+        ppu.background_renderer.render_lines(0, 240)
+        for layout in (exporter.argb, exporter.rgba, exporter.rgb, exporter.grey):
+            first = layout()
+            assert np.shares_memory(layout(), first)
+
+        out = np.zeros((240, 256, 4), dtype=np.uint8)
+        rgba = exporter.rgba(out)
+        assert np.shares_memory(rgba, out)
+        assert (out == exporter.rgba()).all()
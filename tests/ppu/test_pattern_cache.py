@@ -0,0 +1,64 @@
+import random
+
+import numpy as np
+
+from src.Cartridge import Cartridge
+from src.cpu.CPU import CPU
+from src.CPUMemory import CPUMemory
+from src.mappers.mappers import create_mapper
+from src.ppu.PatternCache import decode_tiles
+from src.ppu.PPU import PPU
+from tests.roms import build_rom
+
+
+def new_ppu(chr_data: bytes = b"", chr_pages: int = 1) -> PPU:
+    cartridge = Cartridge(build_rom(bytes(), chr_pages=chr_pages, chr_data=chr_data))
+    cpu = CPU(CPUMemory())
+    ppu = PPU(cpu)
+    ppu.on_load(cartridge, create_mapper(cpu, ppu, cartridge))
+    return ppu
+
+
+def reference_tile(ppu: PPU, tile: int):
+    # Decodes a tile pixel by pixel out of PPU memory
+    rows = []
+    for y in range(8):
+        low = ppu.memory.read(tile * 16 + y)
+        high = ppu.memory.read(tile * 16 + y + 8)
+        rows.append([(((high >> (7 - x)) & 1) << 1) | ((low >> (7 - x)) & 1) for x in range(8)])
+    return rows
+
+
+class TestPatternCache:
+    def test_decode(self):
+        # Decoded tiles should match decoding them pixel by pixel
+        rng = random.Random(0)
+        ppu = new_ppu(bytes(rng.randrange(0x100) for _ in range(0x2000)))
+        for table in (0, 1):
+            tiles, indices = ppu.patterns.pattern_table(table)
+            for tile in range(0, 256, 7):
+                assert tiles[indices[tile]].tolist() == reference_tile(ppu, table * 256 + tile)
+
+    def test_decode_tiles(self):
+        # Each pixel takes its low bit from the first 8 bytes, and its high bit from the last 8
+        data = np.array([0x80] + [0] * 7 + [0x81] + [0] * 7, dtype=np.uint8)
+        tile = decode_tiles(data)
+        assert tile.shape == (1, 8, 8)
+        assert tile[0, 0].tolist() == [3, 0, 0, 0, 0, 0, 0, 2]
+        assert tile[0, 1:].sum() == 0
+
+    def test_chr_ram(self):
+        # Writes to CHR-RAM should show up in the decoded tiles
+        ppu = new_ppu(chr_pages=0)
+        tiles, indices = ppu.patterns.pattern_table(1)
+        assert tiles[indices[5]].sum() == 0
+
+        ppu.memory.write(0x1050, 0xFF)
+        ppu.memory.write(0x1058 + 7, 0x01)
+        tiles, indices = ppu.patterns.pattern_table(1)
+        assert tiles[indices[5]].tolist() == reference_tile(ppu, 0x105)
+        assert tiles[indices[5], 0].tolist() == [1] * 8
+        assert tiles[indices[5], 7].tolist() == [0] * 7 + [2]
+        # Other tiles are left alone
+        assert tiles[indices[4]].sum() == 0
+        assert tiles[indices[6]].sum() == 0
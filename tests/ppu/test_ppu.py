@@ -0,0 +1,104 @@
+from src.cpu.CPU import CPU
+from src.CPUMemory import CPUMemory
+from src.interrupts import Interrupt
+from src.ppu.PPU import FRAME_DOTS, LINE_DOTS, PPU
+
+
+def new_ppu() -> PPU:
+    ppu = PPU(CPU(CPUMemory()))
+    # No cartridge to render from
+    ppu.background_renderer.render_lines = lambda start, end: None
+    return ppu
+
+
+class TestPPUTiming:
+    def test_frame(self):
+        # A frame should last 262 lines of 341 dots, calling on_frame once at the end
+        ppu = new_ppu()
+        frames = []
+        ppu.advance(FRAME_DOTS - 1, frames.append, lambda _: None)
+        assert frames == []
+        assert (ppu.scanline, ppu.cycle) == (260, 340)
+
+        ppu.advance(1, frames.append, lambda _: None)
+        assert len(frames) == 1
+        assert ppu.frame == 1
+        assert (ppu.scanline, ppu.cycle) == (-1, 0)
+
+        # Advancing across several frames at once should finish each of them
+        ppu.advance(FRAME_DOTS * 2 + 5, frames.append, lambda _: None)
+        assert len(frames) == 3
+        assert ppu.frame == 3
+        assert (ppu.scanline, ppu.cycle) == (-1, 5)
+
+    def test_vblank(self):
+        # The vblank flag should be set (and an NMI requested if enabled) at dot 1 of line 241,
+        # and cleared at dot 1 of the pre-render line
+        ppu = new_ppu()
+        ppu.registers.ppuctrl.nmi_enable = 1
+        interrupts = []
+
+        ppu.advance(LINE_DOTS * 242 + 1, lambda _: None, interrupts.append)
+        assert ppu.registers.ppustatus.vblank_flag == 0
+        assert interrupts == []
+
+        ppu.advance(1, lambda _: None, interrupts.append)
+        assert ppu.registers.ppustatus.vblank_flag == 1
+        assert interrupts == [Interrupt.NMI]
+
+        ppu.advance(FRAME_DOTS - (LINE_DOTS * 242 + 2) + 1, lambda _: None, interrupts.append)
+        assert ppu.registers.ppustatus.vblank_flag == 1
+        ppu.advance(1, lambda _: None, interrupts.append)
+        assert ppu.registers.ppustatus.vblank_flag == 0
+
+    def test_step(self):
+        # Stepping dot by dot should end up in the same place as advancing at once
+        stepped = new_ppu()
+        advanced = new_ppu()
+        lines = []
+        stepped.background_renderer.render_lines = lambda start, end: lines.append((start, end))
+
+        for _ in range(LINE_DOTS * 242 + 7):
+            stepped.step(lambda _: None, lambda _: None)
+        advanced.advance(LINE_DOTS * 242 + 7, lambda _: None, lambda _: None)
+
+        assert (stepped.scanline, stepped.cycle) == (advanced.scanline, advanced.cycle)
+        assert lines == [(0, 240)]
+
+    def test_dots_until_event(self):
+        # Should count down to the next dot the CPU could notice
+        ppu = new_ppu()
+        assert ppu.dots_until_event() == 1
+        ppu.advance(1, lambda _: None, lambda _: None)
+        assert ppu.dots_until_event() == LINE_DOTS * 242
+        ppu.advance(LINE_DOTS * 242, lambda _: None, lambda _: None)
+        assert ppu.dots_until_event() == FRAME_DOTS - LINE_DOTS * 242 - 1
+
+
+class TestPPURendering:
+    def test_whole_frame(self):
+        # Without anything changing mid-frame, the visible area should be drawn in one go
+        ppu = new_ppu()
+        lines = []
+        ppu.background_renderer.render_lines = lambda start, end: lines.append((start, end))
+
+        ppu.advance(LINE_DOTS * 200, lambda _: None, lambda _: None)
+        assert lines == []
+        ppu.advance(FRAME_DOTS - LINE_DOTS * 200, lambda _: None, lambda _: None)
+        assert lines == [(0, 240)]
+
+    def test_raster_effect(self):
+        # Writing to a register mid-frame should draw the lines before it first
+        ppu = new_ppu()
+        lines = []
+        ppu.background_renderer.render_lines = lambda start, end: lines.append((start, end))
+
+        ppu.advance(LINE_DOTS * 101 + 20, lambda _: None, lambda _: None)
+        ppu.registers.write(0x2000, 0)
+        assert lines == [(0, 101)]
+
+        # Writes outside of the visible area don't split anything
+        ppu.advance(FRAME_DOTS - (LINE_DOTS * 101 + 20) + 10, lambda _: None, lambda _: None)
+        ppu.registers.write(0x2000, 0)
+        ppu.advance(FRAME_DOTS, lambda _: None, lambda _: None)
+        assert lines == [(0, 101), (101, 240), (0, 240)]
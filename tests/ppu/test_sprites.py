@@ -0,0 +1,169 @@
+import io
+import random
+
+from src.Cartridge import Cartridge
+from src.cpu.CPU import CPU
+from src.CPUMemory import CPUMemory
+from src.mappers.mappers import create_mapper
+from src.NES import NES
+from src.ppu.PPU import LINE_DOTS, PPU
+from tests.roms import build_rom
+
+
+def new_ppu(seed: int) -> PPU:
+    rng = random.Random(seed)
+    chr_data = bytes(rng.randrange(0x100) for _ in range(0x2000))
+    cartridge = Cartridge(build_rom(bytes(), chr_data=chr_data))
+    cpu = CPU(CPUMemory())
+    ppu = PPU(cpu)
+    ppu.on_load(cartridge, create_mapper(cpu, ppu, cartridge))
+
+    for address in range(0x2000, 0x3000):
+        ppu.memory.write(address, rng.randrange(0x100))
+    for address in range(0x3F00, 0x3F20):
+        ppu.memory.write(address, rng.randrange(0x40))
+    for address in range(0x100):
+        ppu.oam[address] = rng.randrange(0x100)
+    # Show background and sprites
+    ppu.registers.write(0x2001, 0x1E)
+    return ppu
+
+
+def reference_sprite_pixel(ppu: PPU, x: int, y: int, background_opaque: bool):
+    # Finds the color index of the sprite pixel drawn at (x, y) one step at a time, or None
+    height = 16 if ppu.registers.ppuctrl.sprite_size else 8
+    on_line = [i for i in range(64) if 0 <= y - (ppu.oam[i * 4] + 1) < height][:8]
+    for i in on_line:
+        sprite_y, tile, attributes, sprite_x = ppu.oam[i * 4 : i * 4 + 4]
+        if not 0 <= x - sprite_x < 8:
+            continue
+        row = y - (sprite_y + 1)
+        column = x - sprite_x
+        if attributes & 0x80:
+            row = height - 1 - row
+        if attributes & 0x40:
+            column = 7 - column
+        if height == 16:
+            address = (tile & 1) * 0x1000 + ((tile & 0xFE) + (row >> 3)) * 16 + (row & 7)
+        else:
+            address = ppu.registers.ppuctrl.sprite_pattern_table * 0x1000 + tile * 16 + row
+        low = ppu.memory.read(address)
+        high = ppu.memory.read(address + 8)
+        color_index = (((high >> (7 - column)) & 1) << 1) | ((low >> (7 - column)) & 1)
+        if color_index == 0:
+            continue
+        if attributes & 0x20 and background_opaque:
+            return None
+        return ppu.memory.read(0x3F10 + ((attributes & 3) << 2) + color_index)
+    return None
+
+
+class TestSpriteRenderer:
+    def test_matches_reference(self):
+        # Sprites should be drawn over the background as if drawn one pixel at a time
+        for seed, ctrl in ((0, 0x00), (1, 0x08), (2, 0x20)):
+            ppu = new_ppu(seed)
+            ppu.registers.write(0x2000, ctrl)
+            # Bunch some sprites up on the same lines
+            for i in range(0, 64, 3):
+                ppu.oam[i * 4] = 40
+            ppu.background_renderer.render_lines(0, 240)
+            background = ppu.frame_buffer.copy()
+            opaque = ppu.background_renderer.opaque.copy()
+            ppu.sprite_renderer.render_lines(0, 240)
+
+            for y in (0, 1, 40, 41, 45, 50, 57, 100, 239):
+                for x in range(256):
+                    expected = reference_sprite_pixel(ppu, x, y, opaque[y][x])
+                    if expected is None:
+                        expected = background[y][x]
+                    assert ppu.frame_buffer[y][x] == expected
+
+    def test_overflow(self):
+        # More than 8 sprites on a line should set the sprite overflow flag
+        ppu = new_ppu(0)
+        ppu.oam[:] = bytes([0xFF]) * 0x100
+        for i in range(8):
+            ppu.oam[i * 4] = 100
+        ppu.sprite_renderer.render_lines(0, 240)
+        assert ppu.registers.ppustatus.sprite_overflow == 0
+
+        ppu.oam[8 * 4] = 93
+        ppu.sprite_renderer.render_lines(0, 240)
+        assert ppu.registers.ppustatus.sprite_overflow == 1
+
+
+class TestSpriteZeroHit:
+    def new_ppu(self) -> PPU:
+        # A fully opaque sprite 0 at (100, 51) over a fully opaque background
+        chr_data = bytes([0xFF] * 0x2000)
+        cartridge = Cartridge(build_rom(bytes(), chr_data=chr_data))
+        cpu = CPU(CPUMemory())
+        ppu = PPU(cpu)
+        ppu.on_load(cartridge, create_mapper(cpu, ppu, cartridge))
+        ppu.oam[:] = bytes([0xFF]) * 0x100
+        ppu.oam[0:4] = bytes([50, 0, 0, 100])
+        ppu.registers.write(0x2001, 0x1E)
+        return ppu
+
+    def test_hit(self):
+        # The flag should be visible from the dot sprite 0 hits, until the end of vblank
+        ppu = self.new_ppu()
+        ppu.advance(LINE_DOTS * 52 + 100, lambda _: None, lambda _: None)
+        assert ppu.registers.read(0x2002) & 0x40 == 0
+        ppu.advance(1, lambda _: None, lambda _: None)
+        assert ppu.registers.read(0x2002) & 0x40 == 0x40
+        assert ppu.registers.peek(0x2002) & 0x40 == 0x40
+
+        ppu.advance(LINE_DOTS * 240, lambda _: None, lambda _: None)
+        assert ppu.registers.peek(0x2002) & 0x40 == 0
+
+    def test_until_hit(self):
+        # The CPU should be able to wait for the hit, without skipping past it
+        ppu = self.new_ppu()
+        ppu.advance(2, lambda _: None, lambda _: None)
+        assert ppu.dots_until_event() == LINE_DOTS * 52 + 101 - 2
+
+    def test_no_hit(self):
+        # No hit when sprite 0 is only over transparent background, or rendering is off
+        ppu = self.new_ppu()
+        ppu.memory.write(0x3F00, 0)
+        ppu.oam[0] = 0xF0
+        ppu.advance(LINE_DOTS * 241, lambda _: None, lambda _: None)
+        assert ppu.registers.peek(0x2002) & 0x40 == 0
+
+
+class TestOAM:
+    def test_registers(self):
+        # OAMDATA should read and write OAM at OAMADDR, incrementing it on writes
+        ppu = new_ppu(0)
+        ppu.registers.write(0x2003, 0xFF)
+        ppu.registers.write(0x2004, 0x12)
+        ppu.registers.write(0x2004, 0x34)
+        assert ppu.oam[0xFF] == 0x12
+        assert ppu.oam[0x00] == 0x34
+        assert ppu.registers.read(0x2004) == ppu.oam[0x01]
+
+    def test_dma(self):
+        # Writing to $4014 should copy that page into OAM (from OAMADDR), stalling the CPU
+        # fmt: off
+        program = bytes([
+            0xA9, 0x04,        # 8000 LDA #$04
+            0x8D, 0x03, 0x20,  # 8002 STA $2003
+            0xA9, 0x02,        # 8005 LDA #$02
+            0x8D, 0x14, 0x40,  # 8007 STA $4014
+            0x4C, 0x0A, 0x80,  # 800A JMP $800A
+        ])
+        # fmt: on
+        nes = NES()
+        nes.load_cartridge(io.BytesIO(build_rom(program)))
+        cpu = nes.cpu
+        for i in range(0x100):
+            cpu.memory.write(0x200 + i, i)
+
+        start = cpu.cycles
+        for _ in range(4):
+            cpu.step()
+        assert cpu.cycles - start in (2 + 4 + 2 + 4 + 513, 2 + 4 + 2 + 4 + 514)
+        assert nes.ppu.oam[4:] == bytes(range(0xFC))
+        assert nes.ppu.oam[:4] == bytes(range(0xFC, 0x100))
@@ -0,0 +1,13 @@
+from src.cpu.CPU import CPU
+from src.CPUMemory import CPUMemory
+from src.ppu.PPU import PPU
+
+
+class TestPPUStatus:
+    def test_read_clears_vblank(self):
+        # Reading PPUSTATUS should return the vblank flag, then clear it
+        ppu = PPU(CPU(CPUMemory()))
+        ppu.registers.ppustatus.vblank_flag = 1
+        assert ppu.registers.read(0x2002) & 0x80 == 0x80
+        assert ppu.registers.read(0x2002) & 0x80 == 0
+        assert ppu.registers.ppustatus.vblank_flag == 0
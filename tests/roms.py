@@ -0,0 +1,29 @@
+from typing import Optional
+
+
+def build_rom(
+    program: bytes,
+    reset: int = 0x8000,
+    nmi: Optional[int] = None,
+    mapper_id: int = 0,
+    prg_pages: int = 2,
+    chr_pages: int = 1,
+    flags6: int = 0,
+    chr_data: bytes = b"",
+) -> bytes:
+    """
+    Builds an INES image with the given program at the start of PRG-ROM (and CHR data at the start of CHR-ROM)
+    and the reset/NMI vectors pointing at the given addresses.
+    """
+    header = [0x4E, 0x45, 0x53, 0x1A, prg_pages, chr_pages, flags6 | ((mapper_id & 0xF) << 4), mapper_id & 0xF0]
+    prg = bytearray(0x4000 * prg_pages)
+    prg[: len(program)] = program
+
+    nmi = reset if nmi is None else nmi
+    prg[-6:-4] = bytes([nmi & 0xFF, nmi >> 8])
+    prg[-4:-2] = bytes([reset & 0xFF, reset >> 8])
+
+    chr = bytearray(0x2000 * chr_pages)
+    chr[: len(chr_data)] = chr_data
+
+    return bytes(header + [0] * 8) + bytes(prg) + bytes(chr)
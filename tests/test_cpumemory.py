@@ -1,6 +1,9 @@
+from src.Cartridge import Cartridge
 from src.controllers.Controller import Controller
 from src.cpu.CPU import CPU
 from src.CPUMemory import CPUMemory
+from src.mappers.mappers import create_mapper
+from tests.roms import build_rom
 
 
 class TestCPUMemory:
@@ -230,3 +233,106 @@ class TestOpenBus:
         memory = CPUMemory()
         memory.set_save_state(state)
         assert memory.read(address) == 0x73
+
+
+class TestPages:
+    def new_memory(self, prg_pages: int = 2) -> CPUMemory:
+        program = bytes(i & 0xFF for i in range(0x4000 * prg_pages - 6))
+        cartridge = Cartridge(build_rom(program, prg_pages=prg_pages))
+        memory = CPUMemory()
+        memory.on_load(mapper=create_mapper(CPU(memory), None, cartridge))
+        return memory
+
+    def test_prg_rom(self):
+        # Reading PRG-ROM directly should match going through the mapper
+        # (including the mirror of the first page on 16 KiB carts)
+        for prg_pages in (1, 2):
+            memory = self.new_memory(prg_pages)
+            mapper = memory._CPUMemory__mapper
+            for address in range(0x8000, 0x10000):
+                assert memory.read(address) == mapper.cpu_read(address)
+
+    def test_bank_switch(self):
+        # Pages should be repointed at whatever the mapper maps after a bank switch
+        memory = self.new_memory()
+        mapper = memory._CPUMemory__mapper
+        mapper.get_prg_page(1)[0] = 0x42
+        assert memory.read(0xC000) == 0x42
+
+        mapper.cpu_read_page = lambda page: None
+        mapper.cpu_read = lambda address: 0x99
+        mapper._on_bank_switch()
+        assert memory.read(0xC000) == 0x99
+        assert memory.read(0x0000) == 0x00
+
+    def test_partial_bank_switch(self):
+        # Only the pages a bank switch changed should be remapped
+        memory = self.new_memory(4)
+        mapper = memory._CPUMemory__mapper
+        remaps = []
+        read_page = mapper.cpu_read_page
+        mapper.cpu_read_page = lambda page: remaps.append(page) or read_page(page)
+        mapper._map_prg(0xA000, 4, 0x2000)
+        assert remaps == list(range(0xA0, 0xC0))
+        assert memory.read(0xA000) == mapper.get_prg_page(2)[0]
+
+    def test_reload(self):
+        # Loading the same mapper again shouldn't remap pages more than once per bank switch
+        memory = self.new_memory()
+        mapper = memory._CPUMemory__mapper
+        memory.on_load(mapper=mapper)
+        memory.on_load(mapper=mapper)
+
+        remaps = []
+        read_page = mapper.cpu_read_page
+        mapper.cpu_read_page = lambda page: remaps.append(page) or read_page(page)
+        mapper._on_bank_switch()
+        assert remaps
+        assert len(remaps) == len(set(remaps))
+
+    def test_read_hooks(self):
+        # Read hooks should see every read from their page and can change the value read
+        memory = CPUMemory()
+        memory.write(0x0010, 0x20)
+        memory.write(0x0110, 0x30)
+        reads = []
+
+        def watch(address: int, value: int) -> int:
+            reads.append((address, value))
+            return value + 1
+
+        memory.add_read_hook(0x00, watch)
+        assert memory.read(0x0010) == 0x21
+        # The value read is what ends up on the bus
+        assert memory.read(0x5000) == 0x21
+
+        # Mirrors are separate pages
+        assert memory.read(0x0810) == 0x20
+        assert memory.read(0x0110) == 0x30
+        assert reads == [(0x0010, 0x20)]
+
+        memory.remove_read_hook(0x00, watch)
+        assert memory.read(0x0010) == 0x20
+        assert reads == [(0x0010, 0x20)]
+
+    def test_write_hooks(self):
+        # Write hooks should see every write to their page and can change or drop the write
+        memory = CPUMemory()
+        writes = []
+
+        def freeze(address: int, value: int):
+            writes.append((address, value))
+            return None if address == 0x0020 else value ^ 0xFF
+
+        memory.add_write_hook(0x00, freeze)
+        memory.write(0x0020, 0x12)
+        memory.write(0x0021, 0x12)
+        memory.write(0x0120, 0x12)
+        assert writes == [(0x0020, 0x12), (0x0021, 0x12)]
+        assert memory.read(0x0020) == 0x00
+        assert memory.read(0x0021) == 0xED
+        assert memory.read(0x0120) == 0x12
+
+        memory.remove_write_hook(0x00, freeze)
+        memory.write(0x0020, 0x12)
+        assert memory.read(0x0020) == 0x12
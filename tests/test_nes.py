@@ -0,0 +1,113 @@
+import io
+
+from src.NES import NES
+from tests.roms import build_rom
+
+
+def new_nes(program: bytes, nmi=None) -> NES:
+    nes = NES()
+    nes.load_cartridge(io.BytesIO(build_rom(program, nmi=nmi)))
+    # No CHR to render from
+    nes.ppu.background_renderer.render_lines = lambda start, end: None
+    return nes
+
+
+class TestNES:
+    def test_vblank_polling(self):
+        # Polling PPUSTATUS should see the vblank flag set exactly once per frame
+        # (reading it clears the flag)
+        # fmt: off
+        program = bytes([
+            0xAD, 0x02, 0x20,  # 8000 LDA $2002
+            0x10, 0xFB,        # 8003 BPL $8000
+            0xE6, 0x10,        # 8005 INC $10
+            0x4C, 0x00, 0x80,  # 8007 JMP $8000
+        ])
+        # fmt: on
+        nes = new_nes(program)
+        memory = nes.cpu.memory
+        for frame in range(1, 4):
+            nes.run(lambda _: None)
+            assert memory.read(0x10) == frame
+
+    def test_nmi(self):
+        # An NMI should be serviced once per frame while enabled
+        # fmt: off
+        program = bytes([
+            0xA9, 0x80,        # 8000 LDA #$80
+            0x8D, 0x00, 0x20,  # 8002 STA $2000
+            0x4C, 0x05, 0x80,  # 8005 JMP $8005
+            0xE6, 0x10,        # 8008 INC $10 (NMI)
+            0x40,              # 800A RTI
+        ])
+        # fmt: on
+        nes = new_nes(program, nmi=0x8008)
+        cpu = nes.cpu
+        frames = []
+        for _ in range(3):
+            nes.run(frames.append)
+        assert len(frames) == 3
+        assert cpu.memory.read(0x10) == 3
+        assert cpu.pc.get_value() == 0x8005
+
+    def test_frame_length(self):
+        # The CPU should run for a frame's worth of cycles (341 * 262 / 3) per frame
+        nes = new_nes(bytes([0x4C, 0x00, 0x80]))  # JMP $8000
+        cpu = nes.cpu
+        nes.run(lambda _: None)
+        start = cpu.cycles
+        nes.run(lambda _: None)
+        assert abs((cpu.cycles - start) - 341 * 262 / 3) < 4
+
+
+class TestHeadless:
+    # fmt: off
+    PROGRAM = bytes([
+        0xE6, 0x10,        # 8000 INC $10
+        0x4C, 0x00, 0x80,  # 8002 JMP $8000
+    ])
+    # fmt: on
+
+    def test_run_frames(self):
+        # Should run the given amount of frames and report what was run
+        nes = new_nes(self.PROGRAM)
+        result = nes.run_frames(3)
+        assert result.frames == 3
+        assert nes.ppu.frame == 3
+        assert result.cycles == nes.cpu.cycles - 7
+        assert result.frame_buffer is not nes.ppu.frame_buffer
+        assert (result.frame_buffer == nes.ppu.frame_buffer).all()
+
+    def test_result_frame_buffer(self):
+        # The result's frame buffer should be a snapshot of the lines drawn so far, unaffected by running on
+        nes = new_nes(self.PROGRAM)
+        drawn = []
+        nes.ppu.background_renderer.render_lines = lambda start, end: drawn.append((start, end))
+        result = nes.run_cycles(10000)
+        assert drawn and drawn[-1][1] > 0
+        snapshot = result.frame_buffer.copy()
+        nes.ppu.frame_buffer[:] = 1
+        nes.run_cycles(1000)
+        assert (result.frame_buffer == snapshot).all()
+
+    def test_run_cycles(self):
+        # Should run for at least the given amount of cycles, stopping right after
+        nes = new_nes(self.PROGRAM)
+        result = nes.run_cycles(1000)
+        assert 1000 <= result.cycles < 1010
+        assert result.frames == 0
+
+        result = nes.run_cycles(100000)
+        assert 100000 <= result.cycles < 100010
+        assert result.frames == 3
+
+    def test_run_until(self):
+        # Should stop as soon as the predicate holds
+        nes = new_nes(self.PROGRAM)
+        result = nes.run_until(lambda nes: nes.cpu.memory.read(0x10) == 0x20)
+        assert nes.cpu.memory.read(0x10) == 0x20
+        assert result.frames == 0
+
+        # Or once we're out of cycles
+        result = nes.run_until(lambda nes: False, max_cycles=500)
+        assert 500 <= result.cycles < 510
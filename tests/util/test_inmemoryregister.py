@@ -0,0 +1,94 @@
+import pickle
+
+import pytest
+
+from src.util.InMemoryRegister import BitField, InMemoryRegister
+
+
+class Declared(InMemoryRegister):
+    low = BitField(0, 3)
+    flag = BitField(7)
+
+
+class Added(InMemoryRegister):
+    def on_load(self):
+        self.add_field("low", 0, 3).add_field("flag", 7, 1)
+
+
+class Layout(InMemoryRegister):
+    pass
+
+
+class TestInMemoryRegister:
+    def test_fields(self):
+        # Fields should read and write their segment of the value, whichever way they're declared
+        for register in (Declared(), Added()):
+            register.set_value(0b1010_1101)
+            assert register.low == 0b101
+            assert register.flag == 1
+
+            register.flag = 0
+            assert register.get_value() == 0b0010_1101
+            register.low = 0b1111
+            assert register.low == 0b111
+            assert register.get_value() == 0b0010_1111
+            register.flag = True
+            assert register.get_value() == 0b1010_1111
+
+    def test_other_attributes(self):
+        # Attributes which aren't fields shouldn't affect the value
+        register = Declared()
+        register.set_value(0x81)
+        register.other = 3
+        assert register.get_value() == 0x81
+        assert isinstance(Declared.flag, BitField)
+        assert Declared.flag.name == "flag"
+
+
+class Status(InMemoryRegister):
+    def on_load(self):
+        self.add_field("mode", 2, 2).add_field("vblank_flag", 7, 1)
+
+
+class TestFieldAssignment:
+    def test_assign(self):
+        # Assigning a field should store its own bits, both in the field and the register value
+        register = Status()
+        register.vblank_flag = 1
+        register.mode = 3
+        assert register.vblank_flag == 1
+        assert register.mode == 3
+        assert register.get_value() == 0x8C
+
+        register.vblank_flag = 0
+        assert register.vblank_flag == 0
+        assert register.mode == 3
+        assert register.get_value() == 0x0C
+
+    def test_added_fields_per_instance(self):
+        # Fields added to one register shouldn't change the layout, or the type, of other instances of its class
+        a = Layout().add_field("field", 0, 2)
+        b = Layout().add_field("field", 4, 4)
+        c = Layout()
+        a.set_value(0xFF)
+        b.set_value(0xFF)
+        assert a.field == 0b11
+        assert b.field == 0xF
+        assert type(a) is type(b) is Layout
+
+        # Instances without the field can use the name as a plain attribute
+        c.set_value(0xFF)
+        c.field = 3
+        assert c.field == 3
+        assert c.get_value() == 0xFF
+
+        # And they survive pickling
+        a = pickle.loads(pickle.dumps(a))
+        assert a.field == 0b11
+        a.field = 0
+        assert a.get_value() == 0xFC
+
+    def test_added_field_conflict(self):
+        # Adding a field which the class already declares is an error
+        with pytest.raises(ValueError):
+            Declared().add_field("flag", 0, 1)
@@ -0,0 +1,75 @@
+"""
+Times reading PRG-ROM through NROM and decoding translator blocks from it.
+
+Usage: python tools/benchmark_prg.py [--repeat N]
+
+Prints the median of N runs (3 by default) of:
+- NROM.cpu_read over all of $8000-$FFFF, in ns per read, for NROM-128 and NROM-256
+- Translator block decoding over random NROM-128 code, in us per block
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import timeit
+
+# Same import paths as the tests (see pyproject.toml)
+_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path[:0] = [_root, os.path.join(_root, "src")]
+
+from src.Cartridge import Cartridge  # noqa: E402
+from src.cpu.CPU import CPU  # noqa: E402
+from src.CPUMemory import CPUMemory  # noqa: E402
+from src.mappers.mappers import create_mapper  # noqa: E402
+from tests.roms import build_rom  # noqa: E402
+
+
+def new_cpu(prg_pages: int, program: bytes) -> CPU:
+    cpu = CPU(CPUMemory())
+    mapper = create_mapper(cpu, None, Cartridge(build_rom(program, prg_pages=prg_pages)))
+    cpu.on_load(mapper)
+    cpu.memory.on_load(mapper=mapper)
+    return cpu
+
+
+def time_cpu_read(prg_pages: int, repeat: int) -> float:
+    mapper = new_cpu(prg_pages, bytes(0x4000 * prg_pages - 6)).translator.mapper
+    cpu_read = mapper.cpu_read
+    addresses = range(0x8000, 0x10000)
+
+    def run():
+        for address in addresses:
+            cpu_read(address)
+
+    runs = timeit.repeat(run, number=1, repeat=repeat)
+    return statistics.median(runs) / len(addresses) * 1e9
+
+
+def time_decode(repeat: int) -> float:
+    rng = random.Random(0)
+    translator = new_cpu(1, bytes(rng.randrange(0x100) for _ in range(0x4000 - 6))).translator
+    decode = translator._Translator__decode
+    entries = range(0x8000, 0xC000, 0x10)
+
+    def run():
+        for pc in entries:
+            decode(pc)
+
+    runs = timeit.repeat(run, number=1, repeat=repeat)
+    return statistics.median(runs) / len(entries) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="runs to take the median of")
+    args = parser.parse_args()
+
+    for prg_pages, name in ((1, "NROM-128"), (2, "NROM-256")):
+        print(f"{name} cpu_read over $8000-$FFFF: {time_cpu_read(prg_pages, args.repeat):.0f} ns/read")
+    print(f"Translator block decoding (random NROM-128 code): {time_decode(args.repeat):.2f} us/block")
+
+
+if __name__ == "__main__":
+    main()